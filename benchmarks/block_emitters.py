@@ -0,0 +1,92 @@
+"""TeX generation time of block-engine documents with native emitters.
+
+Renders (without compiling) documents of 50, 500 and 2,000 heavy blocks —
+a 30-row table, a list with nested text and a sub-list, a 20-person name
+roster and a resultatrakning of 40 line items, repeated — and prints the
+median time and the time per block.
+
+    PYTHONPATH=. python benchmarks/block_emitters.py [--repeat 5] [--blocks 50 500 2000]
+"""
+
+import argparse
+import statistics
+import time
+
+from klartex.block_engine import block_overrides
+from klartex.renderer import _render_block_engine
+from klartex.tex_escape import escape_view
+
+_PATTERN = [
+    {
+        "type": "table",
+        "header": ["Konto", "Benämning", "Belopp"],
+        "rows": [[f"{3000 + i}", f"Post {i} med *betoning*", f"{i * 125}"] for i in range(30)],
+    },
+    {
+        "type": "list",
+        "items": [
+            "Första punkten",
+            {"text": "Andra", "content": [
+                {"type": "text", "text": "Nästlad text med \"citat\"."},
+                {"type": "list", "style": "numbered", "items": ["a", "b", "c"]},
+            ]},
+        ],
+    },
+    {
+        "type": "name_roster",
+        "title": "Närvarande",
+        "people": [{"name": f"Person {i}", "role": "Ledamot"} for i in range(20)],
+    },
+    {
+        "type": "resultatrakning",
+        "rubrik_ar1": "2025",
+        "rubrik_ar2": "2024",
+        "grupper": [
+            {
+                "rubrik": f"Grupp {g}",
+                "poster": [
+                    {"post": f"Post {i}", "belopp_ar1": 1000 * i, "belopp_ar2": -50 * i}
+                    for i in range(10)
+                ],
+                "summa": {"label": "Summa", "belopp_ar1": 45000, "belopp_ar2": -2250},
+            }
+            for g in range(4)
+        ],
+    },
+]
+
+
+def block_data(blocks: int) -> dict:
+    """A block-engine document with `blocks` top-level blocks."""
+    return {"body": [_PATTERN[i % len(_PATTERN)] for i in range(blocks)]}
+
+
+def render_tex(data: dict) -> str:
+    return _render_block_engine(escape_view(data, block_overrides(data["body"])))
+
+
+def time_render(data: dict, repeat: int) -> float:
+    """Median seconds per render over `repeat` runs, after one warm-up."""
+    render_tex(data)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render_tex(data)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--blocks", type=int, nargs="+", default=[50, 500, 2000])
+    args = parser.parse_args()
+
+    print(f"{'blocks':>8s}{'time':>12s}{'per block':>12s}")
+    for blocks in args.blocks:
+        seconds = time_render(block_data(blocks), args.repeat)
+        print(f"{blocks:8d}{seconds * 1000:10.1f}ms{seconds / blocks * 1e6:10.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Per-engine render latency on the test fixtures.
+
+Renders every fixture in tests/fixtures that maps to a template (recipe
+fixtures are named after their template; block fixtures have a ``body``)
+with each installed engine and prints the median wall-clock time. The
+``auto`` column shows which engine `select_engine` picks for the fixture.
+
+    python benchmarks/engine_latency.py [--repeat 5] [--engines xelatex pdflatex]
+
+Formats are built before timing starts, so the numbers are steady-state
+latencies; pass ``--no-formats`` to time cold preamble loading instead.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import time
+from pathlib import Path
+
+from klartex.engines import ENGINE_NAMES, ENGINES
+from klartex.renderer import get_registry, render_detailed
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+
+def fixture_cases() -> list[tuple[str, str, dict]]:
+    """Return (fixture name, template name, data) for renderable fixtures."""
+    registry = get_registry()
+    cases = []
+    for path in sorted(FIXTURES.glob("*.json")):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if path.stem in registry:
+            cases.append((path.stem, path.stem, data))
+        elif "body" in data:
+            cases.append((path.stem, "_block", data))
+    return cases
+
+
+def time_render(template: str, data: dict, engine: str, repeat: int) -> float:
+    """Median seconds per render over `repeat` runs, after one warm-up."""
+    render_detailed(template, data, engine=engine, aux_store=False)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render_detailed(template, data, engine=engine, aux_store=False)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--engines", nargs="+", default=list(ENGINE_NAMES))
+    parser.add_argument("--no-formats", action="store_true")
+    args = parser.parse_args()
+
+    if args.no_formats:
+        os.environ["KLARTEX_NO_FORMATS"] = "1"
+    engines = [e for e in args.engines if shutil.which(ENGINES[e].name)]
+    if not engines:
+        raise SystemExit("No TeX engine installed")
+
+    header = f"{'fixture':32s}" + "".join(f"{e:>12s}" for e in engines) + f"{'auto':>12s}"
+    print(header)
+    print("-" * len(header))
+    for name, template, data in fixture_cases():
+        row = f"{name:32s}"
+        for engine in engines:
+            try:
+                row += f"{time_render(template, data, engine, args.repeat) * 1000:10.0f}ms"
+            except Exception:
+                row += f"{'failed':>12s}"
+        try:
+            picked = render_detailed(template, data, engine="auto", aux_store=False).engine
+        except Exception:
+            picked = "-"
+        print(row + f"{picked:>12s}")
+
+
+if __name__ == "__main__":
+    main()
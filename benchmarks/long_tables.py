@@ -0,0 +1,73 @@
+"""Render time of the table block against its row count.
+
+Renders a three-column table block with 100, 1,000 and 10,000 rows and
+prints the median wall-clock time and the time per row. Tables over
+``LONG_TABLE_ROWS`` rows are set as a longtable with content-fitted column
+widths, so the time per row should stay roughly flat. ``--tabularx`` also
+times the old single-box tabularx layout (``column_fit: tabularx``) for
+comparison; it cannot break across pages, so large tables overflow and TeX
+may run out of memory.
+
+    python benchmarks/long_tables.py [--repeat 3] [--rows 100 1000 10000] [--tabularx]
+"""
+
+import argparse
+import statistics
+import time
+
+from klartex import block_engine
+from klartex.renderer import render_detailed
+
+
+def table_data(rows: int, fit: str = "content") -> dict:
+    """A block-engine document with one `rows`-row table."""
+    return {
+        "body": [
+            {
+                "type": "table",
+                "header": ["Konto", "Benämning", "Belopp"],
+                "rows": [
+                    [str(1000 + i), f"Verifikation {i} avseende **post** {i % 17}", f"{i * 37 % 10000}"]
+                    for i in range(rows)
+                ],
+                "columns": [{"width": "2cm"}, {}, {"align": "right"}],
+                "column_fit": fit,
+            }
+        ]
+    }
+
+
+def time_render(data: dict, repeat: int) -> float:
+    """Median seconds per render over `repeat` runs, after one warm-up."""
+    render_detailed("_block", data, aux_store=False)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render_detailed("_block", data, aux_store=False)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--tabularx", action="store_true")
+    args = parser.parse_args()
+
+    layouts = [("longtable", block_engine.LONG_TABLE_ROWS, "content")]
+    if args.tabularx:
+        layouts.append(("tabularx", float("inf"), "tabularx"))
+    print(f"{'layout':12s}{'rows':>8s}{'time':>12s}{'per row':>12s}")
+    for layout, threshold, fit in layouts:
+        block_engine.LONG_TABLE_ROWS = threshold
+        for rows in args.rows:
+            try:
+                seconds = time_render(table_data(rows, fit), args.repeat)
+                print(f"{layout:12s}{rows:8d}{seconds * 1000:10.0f}ms{seconds / rows * 1e6:10.0f}us")
+            except Exception as e:
+                print(f"{layout:12s}{rows:8d}{'failed':>12s}  {str(e).splitlines()[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""PDF size against render time per output profile on the test fixtures.
+
+Renders every renderable fixture in tests/fixtures with each output profile
+and prints the median wall-clock time and the PDF size, so the trade-off
+between the ``archive`` and ``preview`` profiles can be read per document.
+
+    python benchmarks/output_profiles.py [--repeat 5] [--engine xelatex]
+"""
+
+import argparse
+import statistics
+import time
+
+from engine_latency import fixture_cases
+
+from klartex.output_profiles import OUTPUT_PROFILES
+from klartex.renderer import render_detailed
+
+
+def measure(template: str, data: dict, engine: str, profile: str, repeat: int) -> tuple[float, int]:
+    """Median seconds per render over `repeat` runs and the PDF size."""
+    pdf = render_detailed(
+        template, data, engine=engine, output_profile=profile, aux_store=False
+    ).pdf
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render_detailed(template, data, engine=engine, output_profile=profile, aux_store=False)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), len(pdf)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--engine", default="xelatex")
+    args = parser.parse_args()
+
+    profiles = list(OUTPUT_PROFILES)
+    header = f"{'fixture':32s}" + "".join(f"{p:>22s}" for p in profiles)
+    print(header)
+    print("-" * len(header))
+    for name, template, data in fixture_cases():
+        row = f"{name:32s}"
+        for profile in profiles:
+            try:
+                seconds, size = measure(template, data, args.engine, profile, args.repeat)
+                row += f"{seconds * 1000:10.0f}ms {size / 1024:8.1f}KB"
+            except Exception:
+                row += f"{'failed':>22s}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Escaping time for large tabular payloads.
+
+Times `escape_data` on tests/fixtures/sie-exportrapport.json grown to
+1,000, 10,000 and 100,000 ledger rows and prints the median time and the
+time per string. ``--legacy`` also times the previous escaper (one
+`str.replace` pass per special character plus a sentinel swap for
+backslashes) for comparison.
+
+    python benchmarks/tex_escape.py [--repeat 5] [--rows 1000 10000 100000] [--legacy]
+"""
+
+import argparse
+import copy
+import json
+import statistics
+import time
+from pathlib import Path
+
+from klartex import tex_escape as escape_mod
+from klartex.tex_escape import escape_data
+
+FIXTURE = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "sie-exportrapport.json"
+
+
+def legacy_tex_escape(value: str) -> str:
+    """The escaper before the translation table."""
+    result = value.replace("\\", "\x00BACKSLASH\x00")
+    for char, escaped in escape_mod._REPLACEMENTS.items():
+        if char == "\\":
+            continue
+        result = result.replace(char, escaped)
+    return result.replace("\x00BACKSLASH\x00", r"\textbackslash{}")
+
+
+def sie_report(base: dict, rows: int) -> dict:
+    """The fixture grown to about `rows` ledger rows, every tenth with
+    characters that need escaping."""
+    data = copy.deepcopy(base)
+    grupper = []
+    count = 0
+    while count < rows:
+        grupp = copy.deepcopy(base["grupper"][len(grupper) % len(base["grupper"])])
+        grupp["rubrik"] = f"{len(grupper)} — {grupp['rubrik']}"
+        grupp["poster"] = [
+            {**post, "post": f"{1000 + count + i} {post['post']}" + (" & moms 25 %" if i % 10 == 0 else "")}
+            for i, post in enumerate(grupp["poster"] * 25)
+        ]
+        count += len(grupp["poster"])
+        grupper.append(grupp)
+    data["grupper"] = grupper
+    return data
+
+
+def count_strings(data) -> int:
+    if isinstance(data, str):
+        return 1
+    if isinstance(data, dict):
+        return sum(count_strings(v) for v in data.values())
+    if isinstance(data, list):
+        return sum(count_strings(v) for v in data)
+    return 0
+
+
+def time_escape(data, repeat: int) -> float:
+    """Median seconds per `escape_data` call over `repeat` runs."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        escape_data(data)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--legacy", action="store_true")
+    args = parser.parse_args()
+
+    base = json.loads(FIXTURE.read_text(encoding="utf-8"))
+    current = escape_mod.tex_escape
+    modes = [("single-scan", current)]
+    if args.legacy:
+        modes.append(("legacy", legacy_tex_escape))
+    print(f"{'escaper':12s}{'rows':>8s}{'strings':>10s}{'time':>12s}{'per string':>12s}")
+    for mode, escaper in modes:
+        escape_mod.tex_escape = escaper
+        try:
+            for rows in args.rows:
+                data = sie_report(base, rows)
+                strings = count_strings(data)
+                seconds = time_escape(data, args.repeat)
+                print(
+                    f"{mode:12s}{rows:8d}{strings:10d}{seconds * 1000:10.2f}ms"
+                    f"{seconds / strings * 1e9:10.0f}ns"
+                )
+        finally:
+            escape_mod.tex_escape = current
+
+
+if __name__ == "__main__":
+    main()
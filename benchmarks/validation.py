@@ -0,0 +1,96 @@
+"""Schema validation cost per block.
+
+Validates block-engine documents of 50, 500 and 5,000 mixed blocks (a
+heading, text, a list, a table and a clause with nested blocks, repeated)
+the way `render` does — template schema, then every block — and prints the
+median time and the time per block. ``--legacy`` also times the previous
+approach, which re-read each block's schema from disk and ran a fresh
+`jsonschema.validate` (rebuilding and self-checking the validator) per
+block.
+
+    python benchmarks/validation.py [--repeat 5] [--blocks 50 500 5000] [--legacy]
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import jsonschema
+
+from klartex.block_engine import _child_block_lists
+from klartex.renderer import _validate_blocks, get_registry
+from klartex.schema_validation import _SCHEMAS_DIR, validate
+
+_PATTERN = [
+    {"type": "heading", "text": "Rubrik", "level": 2},
+    {"type": "text", "text": "Stycke med **fet** och *kursiv* text."},
+    {"type": "list", "items": ["Ett", "Två", {"text": "Tre", "content": [{"type": "text", "text": "Inne"}]}]},
+    {"type": "table", "header": ["A", "B"], "rows": [["1", "2"], ["3", "4"]]},
+    {
+        "type": "clause",
+        "number": "§ 1.",
+        "text": "Villkor",
+        "content": [
+            {"type": "text", "text": "Underpunkt."},
+            {"type": "clause", "number": "1.1", "text": "Nästlad"},
+        ],
+    },
+]
+
+
+def block_data(blocks: int) -> dict:
+    """A block-engine document with `blocks` top-level blocks."""
+    return {"body": [_PATTERN[i % len(_PATTERN)] for i in range(blocks)]}
+
+
+def validate_current(data: dict) -> None:
+    template = get_registry()["_block"]
+    validate(template.get_validator(), data)
+    _validate_blocks(data["body"], "body")
+
+
+def validate_legacy(data: dict) -> None:
+    from klartex.components import get_component
+
+    def walk(blocks):
+        for block in blocks:
+            path = _SCHEMAS_DIR / get_component(block["type"]).block_schema_path
+            jsonschema.validate(block, json.loads(path.read_text(encoding="utf-8")))
+            for _, children in _child_block_lists(block):
+                walk(children)
+
+    jsonschema.validate(data, get_registry()["_block"].get_validation_schema())
+    walk(data["body"])
+
+
+def time_validation(fn, data: dict, repeat: int) -> float:
+    """Median seconds per validation over `repeat` runs, after one warm-up."""
+    fn(data)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--blocks", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--legacy", action="store_true")
+    args = parser.parse_args()
+
+    modes = [("compiled", validate_current)]
+    if args.legacy:
+        modes.append(("legacy", validate_legacy))
+    print(f"{'mode':12s}{'blocks':>8s}{'time':>12s}{'per block':>12s}")
+    for mode, fn in modes:
+        for blocks in args.blocks:
+            seconds = time_validation(fn, block_data(blocks), args.repeat)
+            print(f"{mode:12s}{blocks:8d}{seconds * 1000:10.1f}ms{seconds / blocks * 1e6:10.1f}us")
+
+
+if __name__ == "__main__":
+    main()
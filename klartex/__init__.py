@@ -1,5 +1,16 @@
 """Klartex — PDF generation via LaTeX."""
 
-from klartex.renderer import render
+from klartex.limits import ResourceLimitExceeded, ResourceLimits
+from klartex.preview import Preview
+from klartex.progress import Progress
+from klartex.renderer import RenderResult, render, render_detailed
 
-__all__ = ["render"]
+__all__ = [
+    "Preview",
+    "Progress",
+    "RenderResult",
+    "ResourceLimitExceeded",
+    "ResourceLimits",
+    "render",
+    "render_detailed",
+]
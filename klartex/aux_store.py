@@ -0,0 +1,95 @@
+"""Local store of .aux files from earlier renders, used to seed new ones.
+
+A document compiled without an .aux file needs a second xelatex pass just to
+resolve ``\\pageref{LastPage}`` and other cross-references. A service that
+renders the same document again — a reprint, a retried request — can start
+xelatex from the aux file of the previous render and converge in one pass.
+
+The store is opt-in (``render(..., aux_store=True)``). An aux file is TeX
+that is ``\\input`` at ``\\begin{document}``, so entries are keyed by a hash
+of the whole request: template, data (including ``lang``) and the class
+options and other settings the document is compiled with. Documents whose
+aux file may hold arbitrary TeX — ones with ``latex`` blocks or a
+caller-supplied page template — are never seeded or stored (see
+`may_use_store`).
+
+The store keeps at most `MAX_ENTRIES` files; storing a new one removes the
+least recently used beyond that.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import Iterable
+from pathlib import Path
+
+from klartex.cache import cache_dir
+
+MAX_ENTRIES = 256
+
+
+def may_use_store(
+    has_latex_blocks: bool, page_template_source: str | None = None
+) -> bool:
+    """Whether a render may be seeded from, and saved to, the store."""
+    return not has_latex_blocks and page_template_source is None
+
+
+def aux_key(template_name: str, data: dict, options: Iterable[str] = ()) -> str:
+    """Return the store key for a render request.
+
+    `options` are the class options and compile settings (engine, preview,
+    instrumentation) that change what the document writes to its aux file.
+    """
+    content = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    h = hashlib.sha256()
+    for part in (template_name, str(data.get("lang", "")), ",".join(options), content):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def load_aux(key: str) -> bytes | None:
+    """Return the stored aux file for `key`, or None."""
+    path = cache_dir("aux") / f"{key}.aux"
+    try:
+        aux = path.read_bytes()
+        os.utime(path)
+    except OSError:
+        return None
+    return aux
+
+
+def store_aux(key: str, aux: bytes, max_entries: int = MAX_ENTRIES) -> None:
+    """Store `aux` under `key`, replacing any earlier entry atomically, and
+    evict the least recently used entries beyond `max_entries`."""
+    aux_dir = cache_dir("aux")
+    fd, tmp_name = tempfile.mkstemp(dir=aux_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(aux)
+        os.replace(tmp_name, aux_dir / f"{key}.aux")
+    except OSError:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        return
+    _evict(aux_dir, max_entries)
+
+
+def _evict(aux_dir: Path, max_entries: int) -> None:
+    """Remove the least recently used aux files beyond `max_entries`."""
+    entries = []
+    for path in aux_dir.glob("*.aux"):
+        try:
+            entries.append((path.stat().st_mtime, path))
+        except OSError:
+            pass
+    entries.sort()
+    for _, path in entries[: max(len(entries) - max_entries, 0)]:
+        try:
+            path.unlink()
+        except OSError:
+            pass
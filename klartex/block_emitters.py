@@ -0,0 +1,344 @@
+"""Native Python emitters for the block engine's heaviest block types.
+
+``_block_engine.tex.jinja`` renders a block through the recursive
+``render_block`` macro and a chain of type checks. Tables, lists, rosters
+and financial statements would be built there cell by cell from macro
+calls; for these types ``render_block`` instead calls `emit_block`, which
+looks the block's emitter up in `EMITTERS` and writes the TeX into one list
+buffer shared with every nested block, joined once per top-level block.
+Nested blocks of a type without an emitter are handed back to the Jinja
+``render_block`` macro, so any other type can still be rendered — and new
+types added — in the template alone.
+
+tests/test_block_emitters.py checks the emitted TeX against golden files in
+tests/fixtures/golden/.
+"""
+
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from klartex.inline_markup import render_inline
+from klartex.numformat import RunningTotals, format_amount
+from klartex.table_layout import table_colspec
+
+# Block type -> emitter. An emitter writes a block's own TeX (without the
+# instrument markers) into ``emitter.out``.
+EMITTERS: dict[str, Callable[["BlockEmitter", Mapping, bool], None]] = {}
+
+# Table block size names -> size commands.
+_SIZE_MACROS = {"normal": "normalsize", "small": "small", "footnotesize": "footnotesize"}
+
+# Horizontal gap between columns, as a fraction of \linewidth.
+_COLUMN_GAP = 0.04
+
+# Written before every minipage of a columns block (see the template).
+_MINIPAGE_NOTE = (
+    "% \\null\\vspace{-\\baselineskip} forces a text-level baseline at the top of\n"
+    "% each minipage. Without it, [t] alignment uses the first item's natural\n"
+    "% baseline — which for \\includegraphics is the image bottom, so an image\n"
+    "% column pairs with a text column at image-bottom-to-text-top, looking\n"
+    "% wildly mis-aligned. The prefix is invisible for text-text columns\n"
+    "% (verified) and only matters when an image or other zero-strut content\n"
+    "% is the first item.\n"
+)
+
+
+def emitter(block_type: str):
+    """Register the decorated function as the emitter of `block_type`."""
+
+    def register(fn):
+        EMITTERS[block_type] = fn
+        return fn
+
+    return register
+
+
+class BlockEmitter:
+    """Renders blocks into a shared buffer.
+
+    Args:
+        lang: Document language, for inline markup.
+        block_settings: Document-level per-type spacing (``block_settings``).
+        instrument: Wrap every block in cost markers (klartex/instrument.py).
+        long_table_rows: Row count above which a top-level table or roster
+            may break across pages.
+        fallback: Renders a block of a type without an emitter; the
+            template's ``render_block`` macro, called as
+            ``fallback(block, lang)``.
+    """
+
+    __slots__ = ("lang", "block_settings", "instrument", "long_table_rows", "fallback", "out")
+
+    def __init__(
+        self,
+        lang: str,
+        block_settings: Mapping,
+        instrument: bool,
+        long_table_rows: int,
+        fallback: Callable[[Mapping, str], str],
+    ):
+        self.lang = lang
+        self.block_settings = block_settings
+        self.instrument = instrument
+        self.long_table_rows = long_table_rows
+        self.fallback = fallback
+        self.out: list[str] = []
+
+    def block(self, block: Mapping, top_level: bool = False) -> None:
+        """Write `block` as ``render_block`` would."""
+        emit = EMITTERS.get(block.get("type"))
+        if emit is None:
+            self.out.append(str(self.fallback(block, self.lang)))
+            return
+        out = self.out
+        if self.instrument:
+            path = block.get("_kx_path", "")
+            out.append(f"\n\n\n\\kxblockstart{{{path}}}\n\n")
+            emit(self, block, top_level)
+            out.append(f"\\kxblockend{{{path}}}\n")
+        else:
+            out.append("\n\n\n\n")
+            emit(self, block, top_level)
+
+    def blocks(self, blocks) -> None:
+        """Write nested `blocks`, one per line."""
+        for sub in blocks:
+            self.block(sub)
+            self.out.append("\n")
+
+    def spacing(self, block: Mapping) -> tuple[Any, Any]:
+        """Effective (spacing_before, spacing_after) of `block`: its own
+        fields, else the document's block_settings for its type."""
+        settings = self.block_settings.get(block.get("type"), {}) if self.block_settings else {}
+        return (
+            block.get("spacing_before") or settings.get("spacing_before"),
+            block.get("spacing_after") or settings.get("spacing_after"),
+        )
+
+    def inline(self, value, newlines: str = "break") -> str:
+        """The ``inline`` filters: `value` with its inline markup rendered."""
+        if value is None:
+            return ""
+        return render_inline(str(value), lang=self.lang, newlines=newlines)
+
+
+def emit_block(
+    block: Mapping,
+    top_level: bool = False,
+    *,
+    lang: str,
+    block_settings: Mapping,
+    instrument: bool,
+    long_table_rows: int,
+    fallback: Callable[[Mapping, str], str],
+) -> str:
+    """Render `block` and its nested blocks to TeX; see `BlockEmitter`."""
+    emitter = BlockEmitter(lang, block_settings, instrument, long_table_rows, fallback)
+    emitter.block(block, top_level)
+    return "".join(emitter.out)
+
+
+def _vspace(out: list[str], length) -> None:
+    if length:
+        out.append(f"\\vspace{{{length}}}\n")
+
+
+@emitter("text")
+def _emit_text(em: BlockEmitter, block: Mapping, top_level: bool) -> None:
+    before, after = em.spacing(block)
+    out = em.out
+    out.append("\n")
+    _vspace(out, before)
+    out.append(f"\\noindent {em.inline(block.get('text'))}\n\n")
+    _vspace(out, after)
+
+
+@emitter("list")
+def _emit_list(em: BlockEmitter, block: Mapping, top_level: bool) -> None:
+    before, after = em.spacing(block)
+    out = em.out
+    _vspace(out, before)
+    _list(em, block["items"], block.get("style", "bullet"))
+    out.append("\n")
+    _vspace(out, after)
+    out.append("\n")
+
+
+def _list(em: BlockEmitter, items, style: str) -> None:
+    env = "enumerate" if style == "numbered" else "itemize"
+    out = em.out
+    out.append(f"\\begin{{{env}}}\n")
+    for item in items:
+        if isinstance(item, str):
+            out.append(f"\\item {em.inline(item)}\n")
+        else:
+            out.append(f"\\item {em.inline(item.get('text'))}\n")
+            em.blocks(item.get("content", ()))
+    out.append(f"\\end{{{env}}}\n")
+
+
+@emitter("table")
+def _emit_table(em: BlockEmitter, block: Mapping, top_level: bool) -> None:
+    before, after = em.spacing(block)
+    header = block["header"]
+    rows = block["rows"]
+    size = block.get("size", "small")
+    fit = block.get("column_fit", "content")
+    long = top_level and len(rows) > em.long_table_rows
+    env = "longtable" if long else ("tabularx" if fit == "tabularx" else "tabular")
+    spec = table_colspec(header, rows, block.get("columns"), size, long, fit)
+    cell = em.inline
+    head = " & ".join(f"\\textbf{{{cell(c, 'cell')}}}" for c in header) + " \\\\\n"
+
+    out = em.out
+    out.append(
+        f"\\vspace{{{before or '1em'}}}\n"
+        "\\begingroup\n"
+        f"\\{_SIZE_MACROS.get(size, 'small')}\n"
+        "\\renewcommand{\\arraystretch}{1.3}\n"
+        "\\setlength{\\tabcolsep}{4pt}\n"
+    )
+    if long:
+        out.append(
+            "\\setlength{\\LTpre}{0pt}\\setlength{\\LTpost}{0pt}"
+            "\\setlength{\\LTleft}{0pt}\\setlength{\\LTright}{0pt}\n"
+            f"\\begin{{longtable}}{{@{{}}{spec}@{{}}}}\n"
+            f"\\toprule\n{head}\\midrule\n\\endhead\n\\bottomrule\n\\endlastfoot\n"
+        )
+    else:
+        width = "{\\linewidth}" if env == "tabularx" else ""
+        out.append(
+            f"\\noindent\\begin{{{env}}}{width}{{@{{}}{spec}@{{}}}}\n"
+            f"\\toprule\n{head}\\midrule\n"
+        )
+    # Rows are separated by rules, not newlines (the template's trimmed
+    # block tags leave none).
+    rule = f"\\cmidrule[0.2pt]{{1-{len(header)}}}"
+    out.append(rule.join(
+        " & ".join([cell(c, "cell") for c in row]) + " \\\\" for row in rows
+    ))
+    if not long:
+        out.append("\\bottomrule\n")
+    out.append(f"\\end{{{env}}}\n\\endgroup\n\\vspace{{{after or '1em'}}}\n\n\n\n")
+
+
+@emitter("columns")
+def _emit_columns(em: BlockEmitter, block: Mapping, top_level: bool) -> None:
+    columns = block["items"]
+    out = em.out
+    if len(columns) == 1:
+        em.blocks(columns[0])
+        out.append("\n")
+        return
+    width = round((1.0 - (len(columns) - 1) * _COLUMN_GAP) / len(columns), 4)
+    out.append("\\noindent\n")
+    for i, col in enumerate(columns):
+        out.append(_MINIPAGE_NOTE)
+        out.append(f"\\begin{{minipage}}[t]{{{width}\\linewidth}}\\null\\vspace{{-\\baselineskip}}\n")
+        em.blocks(col)
+        out.append("\\end{minipage}")
+        if i < len(columns) - 1:
+            out.append(f"\\hspace{{{_COLUMN_GAP}\\linewidth}}")
+    out.append("\\par\n\n")
+
+
+@emitter("name_roster")
+def _emit_name_roster(em: BlockEmitter, block: Mapping, top_level: bool) -> None:
+    people = block["people"]
+    title = block.get("title", "")
+    lines = [
+        f"\\person{{{p.get('name', '')}}}{{{p.get('role', '')}}}{{{p.get('note', '')}}}\n"
+        for p in people
+    ]
+    out = em.out
+    out.append("\\vspace{1em}\n")
+    if top_level and len(people) > em.long_table_rows:
+        out.append(f"\\begin{{rollista}}{{{title}}}\n")
+        out.extend(lines)
+        out.append("\\end{rollista}\n")
+    else:
+        out.append(f"\\namnrollista{{{title}}}{{%\n")
+        out.extend(lines)
+        out.append("}\n")
+    out.append("\\vspace{1em}\n\n")
+
+
+def _table_option(breakable: bool, transport) -> str:
+    """The optional argument of the financial table environments."""
+    if not breakable:
+        return "[nobreak]"
+    return "[transport]" if transport else ""
+
+
+@emitter("resultatrakning")
+def _emit_resultatrakning(em: BlockEmitter, block: Mapping, top_level: bool) -> None:
+    transport = block.get("transport", False)
+    carry = RunningTotals("belopp_ar1", "belopp_ar2") if transport and top_level else None
+    out = em.out
+    out.append(
+        "\\vspace{1.5em}\n"
+        f"\\begin{{resultatrakning}}{_table_option(top_level, transport)}"
+        f"{{{block.get('rubrik_ar1', '')}}}{{{block.get('rubrik_ar2', '')}}}\n"
+    )
+    for grupp in block["grupper"]:
+        out.append(f"\\rrgrupp{{{grupp.get('rubrik', '')}}}\n")
+        for post in grupp["poster"]:
+            notref = post.get("notref")
+            ref = f"[{notref}]" if notref is not None else ""
+            out.append(
+                f"\\rrpost{ref}{{{post.get('post', '')}}}"
+                f"{{{format_amount(post.get('belopp_ar1'))}}}"
+                f"{{{format_amount(post.get('belopp_ar2'))}}}\n"
+            )
+            if carry is not None:
+                out.append(f"\\kxtransport{{{carry.add(post)}}}\n")
+        summa = grupp["summa"]
+        out.append(_sum_line("rrsumma", summa))
+    resultat = block.get("resultat")
+    if resultat:
+        out.append(_sum_line("rrresultat", resultat))
+    out.append("\\end{resultatrakning}\n\n\\vspace{1.5em}\n\n")
+
+
+def _sum_line(command: str, row: Mapping) -> str:
+    return (
+        f"\\{command}{{{row.get('label', '')}}}"
+        f"{{{format_amount(row.get('belopp_ar1'))}}}"
+        f"{{{format_amount(row.get('belopp_ar2'))}}}\n"
+    )
+
+
+@emitter("budgettabell")
+def _emit_budgettabell(em: BlockEmitter, block: Mapping, top_level: bool) -> None:
+    transport = block.get("transport", False)
+    carry = (
+        RunningTotals("budget", "utfall_ar1", "utfall_ar2") if transport and top_level else None
+    )
+    out = em.out
+    out.append(
+        "\\vspace{1.5em}\n"
+        f"\\begin{{budgettabell}}{_table_option(top_level, transport)}"
+        f"{{{block.get('rubrik_budget', '')}}}{{{block.get('rubrik_ar1', '')}}}"
+        f"{{{block.get('rubrik_ar2', '')}}}\n"
+    )
+    for post in block["poster"]:
+        procent = post.get("procent")
+        out.append(
+            f"\\budgetpost{{{post.get('konto', '')}}}{{{post.get('post', '')}}}"
+            f"{{{format_amount(post.get('budget'))}}}"
+            f"{{{format_amount(post.get('utfall_ar1'))}}}"
+            f"{{{format_amount(post.get('utfall_ar2'))}}}"
+            f"{{{procent if procent is not None else ''}}}\n"
+        )
+        if carry is not None:
+            out.append(f"\\kxtransport{{{carry.add(post)}}}\n")
+    out.append("\\end{budgettabell}\n\n\\vspace{1.5em}\n\n")
+
+
+@emitter("notapparat")
+def _emit_notapparat(em: BlockEmitter, block: Mapping, top_level: bool) -> None:
+    out = em.out
+    out.append("\\vspace{1.5em}\n\\begin{notapparat}\n")
+    for item in block["noter"]:
+        out.append(f"\\notentry{{{item.get('notnr', '')}}}{{{item.get('text', '')}}}\n")
+    out.append("\\end{notapparat}\n\n\\vspace{1.5em}\n\n")
@@ -19,9 +19,11 @@ Data shape::
     }
 """
 
+from collections.abc import Mapping, Sequence
 from typing import Any
 
-from klartex.components import _COMPONENTS
+from klartex.block_emitters import EMITTERS
+from klartex.components import _COMPONENTS, component_packages
 from klartex.page_templates import load_page_template, read_page_template_source
 
 # Block types recognized by the block engine template
@@ -32,19 +34,26 @@ KNOWN_BLOCK_TYPES = {
 # The sentinel template name used to invoke the block engine
 BLOCK_ENGINE_TEMPLATE = "_block"
 
+# Tables with more body rows than this are set as a page-breaking longtable
+# instead of a tabularx, which cannot break and typesets the table repeatedly
+# to find its column widths.
+LONG_TABLE_ROWS = 40
+
 
 def prepare_block_context(
     data: dict,
     page_template_source: str | None = None,
+    instrument: bool = False,
 ) -> dict[str, Any]:
     """Build the Jinja context for the block engine meta-template.
 
     Args:
-        data: User data with ``page_template``, ``lang``, and ``body[]``.
-              Data should already be escaped via ``escape_data()`` before
-              calling this function.
+        data: User data with ``page_template``, ``lang``, and ``body[]``,
+              as an escaping view (``escape_view(data, block_overrides(...))``).
         page_template_source: Optional raw .tex.jinja content. When set,
               overrides the built-in page template lookup.
+        instrument: Wrap every block in cost markers (klartex/instrument.py).
+              The blocks' paths come from ``block_overrides(..., paths=True)``.
 
     Returns:
         Context dict for rendering ``_block_engine.tex.jinja``.
@@ -70,6 +79,10 @@ def prepare_block_context(
     # Extract document title from body blocks (first heading or title_page)
     doc_title = _extract_doc_title(data["body"])
 
+    sty_packages = block_sty_packages(data["body"])
+    if instrument:
+        sty_packages.append("klartex-instrument")
+
     return {
         "body": data["body"],
         "lang": data.get("lang", "sv"),
@@ -78,9 +91,94 @@ def prepare_block_context(
         "page_template": page_tmpl,
         "external_page_template": external_page_template,
         "doc_title": doc_title,
+        "sty_packages": sty_packages,
+        "instrument": instrument,
+        "long_table_rows": LONG_TABLE_ROWS,
+        "native_blocks": frozenset(EMITTERS),
     }
 
 
+def _child_block_lists(block: dict, path: str = "") -> list[tuple[str, list]]:
+    """Return the nested block carriers of `block` as (path, blocks) pairs.
+
+    Single source of truth for which block types nest other blocks. Both
+    recursive validation and `block_overrides` walk these carriers, so any
+    new nesting block only needs to be added here. Works on raw data and on
+    escaping views alike.
+    """
+    btype = block.get("type")
+    if btype == "list":
+        return [
+            (f"{path}.items[{i}].content", item.get("content", []))
+            for i, item in enumerate(block.get("items", []))
+            if isinstance(item, Mapping)
+        ]
+    if btype == "columns":
+        return [
+            (f"{path}.items[{i}]", col)
+            for i, col in enumerate(block.get("items", []))
+            if isinstance(col, Sequence) and not isinstance(col, str)
+        ]
+    if btype == "clause":
+        return [(f"{path}.content", block.get("content", []))]
+    return []
+
+
+def block_overrides(
+    blocks: list,
+    paths: bool = False,
+    path: str = "body",
+    overrides: dict[int, dict[str, Any]] | None = None,
+) -> dict[int, dict[str, Any]]:
+    """Return what escaping must leave raw in `blocks` and nested blocks.
+
+    Keyed by the ``id()`` of each block dict, for ``escape_view``: block
+    types stay unescaped for the template's dispatch (``name_roster``, not
+    ``name\\_roster``), as does the source of ``latex`` blocks. With
+    `paths`, each block also gets its path (``body[3].items[1][0]``) under
+    ``_kx_path`` for the instrument markers.
+    """
+    if overrides is None:
+        overrides = {}
+    for i, block in enumerate(blocks):
+        if not isinstance(block, dict):
+            continue
+        where = f"{path}[{i}]"
+        raw = {"type": block["type"]} if "type" in block else {}
+        if block.get("type") == "latex" and "source" in block:
+            raw["source"] = block["source"]
+        if paths:
+            raw["_kx_path"] = where
+        overrides[id(block)] = raw
+        for child_path, child_blocks in _child_block_lists(block, where):
+            block_overrides(child_blocks, paths, child_path, overrides)
+    return overrides
+
+
+def _block_types(blocks: list) -> set[str]:
+    """Return the types of `blocks` and of all blocks nested in them."""
+    types = set()
+    for block in blocks:
+        if not isinstance(block, Mapping):
+            continue
+        types.add(block.get("type"))
+        for _, child_blocks in _child_block_lists(block):
+            types |= _block_types(child_blocks)
+    return types
+
+
+def block_sty_packages(body: list) -> list[str]:
+    """Return the component packages the blocks of `body` need.
+
+    Raw ``latex`` blocks may use any component's macros, so a body with one
+    loads them all, plus ``\\klartexnum`` from klartex-numformat.
+    """
+    types = _block_types(body)
+    if "latex" in types:
+        return component_packages(_COMPONENTS) + ["klartex-numformat"]
+    return component_packages(types)
+
+
 def _extract_doc_title(body: list[dict]) -> str:
     """Extract a document title from body blocks for PDF metadata.
 
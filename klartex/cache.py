@@ -0,0 +1,32 @@
+"""On-disk cache location shared by the compile pipeline.
+
+Precompiled formats and other artifacts that are expensive to produce and
+safe to reuse across processes live under one root:
+
+- ``$KLARTEX_CACHE_DIR`` if set,
+- else ``$XDG_CACHE_HOME/klartex``,
+- else ``~/.cache/klartex``.
+"""
+
+import os
+from pathlib import Path
+
+
+def cache_root() -> Path:
+    """Return the klartex cache root (not created)."""
+    explicit = os.environ.get("KLARTEX_CACHE_DIR")
+    if explicit:
+        return Path(explicit)
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg) if xdg else Path.home() / ".cache"
+    return base / "klartex"
+
+
+def cache_dir(*parts: str) -> Path:
+    """Return a subdirectory of the cache root, creating it if needed.
+
+    Example: ``cache_dir("formats")`` -> ``~/.cache/klartex/formats``.
+    """
+    path = cache_root().joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
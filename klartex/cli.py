@@ -8,7 +8,8 @@ from typing import Optional
 
 import typer
 
-from klartex.renderer import render, get_registry
+from klartex.preview import Preview, parse_block_range
+from klartex.renderer import DEFAULT_MAX_PASSES, get_registry, render_detailed
 
 app = typer.Typer(help="Klartex — PDF generation via LaTeX", invoke_without_command=True)
 
@@ -55,6 +56,43 @@ def main(
             "the data file, then ./page_template.tex.jinja in cwd."
         ),
     ),
+    max_passes: int = typer.Option(
+        DEFAULT_MAX_PASSES,
+        "--max-passes",
+        min=1,
+        help="Upper bound on xelatex passes; stops earlier once the .aux file settles.",
+    ),
+    engine: str = typer.Option(
+        "xelatex",
+        "--engine",
+        help="TeX engine: xelatex, pdflatex, lualatex, or auto (pdflatex for Latin-1 documents without custom fonts).",
+    ),
+    output_profile: str = typer.Option(
+        "default",
+        "--output-profile",
+        help="PDF output: default, archive (maximum compression, PDF 1.7) or preview (no compression, fastest).",
+    ),
+    preview: bool = typer.Option(
+        False,
+        "--preview",
+        help="Fast draft: one pass, placeholder images, no hyperlinks.",
+    ),
+    preview_pages: Optional[int] = typer.Option(
+        None,
+        "--preview-pages",
+        min=1,
+        help="Preview only the first N pages (implies --preview).",
+    ),
+    preview_blocks: Optional[str] = typer.Option(
+        None,
+        "--preview-blocks",
+        help="Preview only body blocks START:END, end exclusive (implies --preview).",
+    ),
+    instrument: bool = typer.Option(
+        False,
+        "--instrument",
+        help="Report TeX time and pages per block (block engine only).",
+    ),
     version: Optional[bool] = typer.Option(None, "--version", "-V", help="Show version and exit.", callback=_version_callback, is_eager=True),
 ):
     """Render JSON data to PDF. Reads from stdin if no --data is given."""
@@ -103,17 +141,49 @@ def main(
         raise typer.Exit(1)
 
     try:
-        pdf_bytes = render(template, raw, page_template_source=page_template_source)
+        draft = None
+        if preview or preview_pages is not None or preview_blocks is not None:
+            draft = Preview(
+                pages=preview_pages,
+                blocks=parse_block_range(preview_blocks) if preview_blocks else None,
+            )
+        result = render_detailed(
+            template,
+            raw,
+            page_template_source=page_template_source,
+            max_passes=max_passes,
+            engine=engine,
+            output_profile=output_profile,
+            preview=draft,
+            instrument=instrument,
+        )
     except Exception as e:
         typer.echo(f"Error: {e}", err=True)
         raise typer.Exit(1)
+    pdf_bytes = result.pdf
 
     try:
         output.write_bytes(pdf_bytes)
     except OSError as e:
         typer.echo(f"Error: could not write output to {output}: {e}", err=True)
         raise typer.Exit(1)
-    typer.echo(f"Written {len(pdf_bytes)} bytes to {output}")
+    passes = "pass" if result.passes == 1 else "passes"
+    typer.echo(f"Written {len(pdf_bytes)} bytes to {output} ({result.passes} {result.engine} {passes})")
+    if result.block_costs:
+        _echo_block_costs(result.block_costs)
+
+
+def _echo_block_costs(costs: dict, limit: int = 15) -> None:
+    """Print the most expensive blocks of an instrumented render to stderr."""
+    typer.echo(f"{'block':40s} {'seconds':>8s} {'pages':>9s}", err=True)
+    for cost in sorted(costs.values(), key=lambda c: c.seconds, reverse=True)[:limit]:
+        if cost.first_page is None:
+            pages = "-"
+        elif cost.last_page in (None, cost.first_page):
+            pages = str(cost.first_page)
+        else:
+            pages = f"{cost.first_page}-{cost.last_page}"
+        typer.echo(f"{cost.path:40s} {cost.seconds:8.3f} {pages:>9s}", err=True)
 
 
 @app.command("templates")
@@ -147,6 +217,60 @@ def list_blocks():
             typer.echo(f"  {name:25s} {spec.description}")
 
 
+@app.command("formats")
+def build_formats(
+    engine: str = typer.Option("xelatex", "--engine", help="xelatex or pdflatex"),
+):
+    """Precompile the preamble formats for the built-in page templates."""
+    from klartex.engines import get_engine
+    from klartex.tex_format import warm_formats
+
+    try:
+        backend = get_engine(engine)
+    except ValueError as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1)
+    names = warm_formats(engine) if backend.supports_formats else []
+    if not names:
+        typer.echo(f"Error: no formats could be built (is {engine} installed?)", err=True)
+        raise typer.Exit(1)
+    for name in names:
+        typer.echo(f"  {name}")
+
+
+@app.command("fonts")
+def check_fonts(
+    page_templates: list[Path] = typer.Argument(
+        None, help="Page template files to check in addition to the built-in ones"
+    ),
+):
+    """Resolve the fonts used by page templates and warm the font caches."""
+    from klartex.fonts import font_exists, preflight_fonts
+
+    sources = {}
+    for path in page_templates or []:
+        if not path.is_file():
+            typer.echo(f"Error: page template file not found: {path}", err=True)
+            raise typer.Exit(1)
+        sources[str(path)] = path.read_text(encoding="utf-8")
+    try:
+        resolved = preflight_fonts(sources)
+    except RuntimeError as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1)
+    missing = False
+    for family, files in resolved.items():
+        if files is not None:
+            typer.echo(f"  {family:30s} {files.regular}")
+        elif font_exists(family):
+            typer.echo(f"  {family:30s} (variable font, loaded by name)")
+        else:
+            typer.echo(f"  {family:30s} MISSING")
+            missing = True
+    if missing:
+        raise typer.Exit(1)
+
+
 @app.command("example")
 def show_example(
     template: str = typer.Argument(help="Template name"),
@@ -6,13 +6,11 @@ Each component defines:
 - description: Human-readable description
 """
 
-import json
+from collections.abc import Mapping
 from dataclasses import dataclass, field
-from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
-# Path to block schema files
-_SCHEMAS_DIR = Path(__file__).resolve().parent / "schemas" / "blocks"
+from klartex.schema_validation import load_block_schema
 
 
 @dataclass
@@ -25,13 +23,13 @@ class ComponentSpec:
     block_schema_path: str | None = None
 
     def get_block_schema(self) -> dict | None:
-        """Load and return the JSON Schema for this block type, or None."""
+        """Return the JSON Schema for this block type, or None.
+
+        Loaded once per file and shared; do not modify it.
+        """
         if not self.block_schema_path:
             return None
-        path = _SCHEMAS_DIR / self.block_schema_path
-        if not path.exists():
-            return None
-        return json.loads(path.read_text(encoding="utf-8"))
+        return load_block_schema(self.block_schema_path)
 
 
 # Registry of known component types
@@ -56,7 +54,7 @@ _COMPONENTS: dict[str, ComponentSpec] = {
     ),
     "parties": ComponentSpec(
         name="parties",
-        sty_package=None,
+        sty_package="klartex-fieldset",
         description="Side-by-side display of two contract parties",
         block_schema_path="parties.schema.json",
     ),
@@ -212,7 +210,22 @@ def list_components() -> dict[str, ComponentSpec]:
     return dict(_COMPONENTS)
 
 
-def resolve_data_path(data: dict, path: str) -> Any:
+def component_packages(component_types: Iterable[str]) -> list[str]:
+    """Return the .sty packages needed by `component_types`.
+
+    Deduplicated and in registry order regardless of the order the types
+    appear in, so documents using the same components share a preamble (and
+    its precompiled format, see klartex/tex_format.py).
+    """
+    wanted = set(component_types)
+    packages = []
+    for name, spec in _COMPONENTS.items():
+        if name in wanted and spec.sty_package and spec.sty_package not in packages:
+            packages.append(spec.sty_package)
+    return packages
+
+
+def resolve_data_path(data: Mapping, path: str) -> Any:
     """Resolve a dot-notation path against a data dict.
 
     Example: resolve_data_path({"party1": {"name": "Acme"}}, "party1.name") -> "Acme"
@@ -222,7 +235,7 @@ def resolve_data_path(data: dict, path: str) -> Any:
     parts = path.split(".")
     current = data
     for part in parts:
-        if isinstance(current, dict) and part in current:
+        if isinstance(current, Mapping) and part in current:
             current = current[part]
         else:
             return None
@@ -232,7 +245,7 @@ def resolve_data_path(data: dict, path: str) -> Any:
 def extract_component_data(
     component_type: str,
     data_map: dict[str, str] | None,
-    data: dict,
+    data: Mapping,
 ) -> dict[str, Any]:
     """Extract data for a component using its data_map.
 
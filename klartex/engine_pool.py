@@ -0,0 +1,283 @@
+"""Pool of pre-spawned, warm xelatex processes.
+
+Every cold xelatex pass pays for process start-up, kpathsea initialisation
+and loading the format before it typesets a single line. The pool starts
+processes ahead of time, each in its own working directory, with the format
+already loaded: the process is started with a first line that reads the job
+name from the terminal, so it parks at that prompt with everything but the
+document in memory. A pass hands a prepared ``document.tex`` to an idle
+process by answering the prompt, and collects its output files afterwards.
+
+Each process serves exactly one pass and exits. Its replacement is spawned
+as soon as it is leased, so it loads the format while the pass typesets.
+
+Processes are keyed by their command line, the search-path environment
+(TEXINPUTS, TEXFORMATS) and their resource limits; a pass whose key has no
+idle process runs cold. A key is warmed once it has been seen more than
+once, so one-off keys never leave engines behind. The pool parks at most
+`max_idle` processes over all keys and kills those of the least recently
+used keys to stay under it.
+
+Usage::
+
+    from klartex import engine_pool
+
+    engine_pool.start(size=4, max_idle=16)   # once, at server start-up
+    ...                         # render() as usual
+    engine_pool.stop()
+"""
+
+import atexit
+from collections import OrderedDict
+import shutil
+import subprocess
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from klartex.limits import ResourceLimits
+from klartex.progress import PassWatcher
+from klartex.workdir_pool import stage_workdir
+
+# Parks the process at a terminal prompt with the format loaded, then
+# inputs whatever file name it is sent, in the same interaction mode as a
+# cold run. scrollmode is needed only for the \read from the terminal.
+_PARK_LINE = r"\read16 to\kxjob\nonstopmode\input{\kxjob}"
+
+# Environment entries that decide how a process resolves files.
+_KEY_ENV = ("TEXINPUTS", "TEXFORMATS")
+
+# Passes a key must have seen before it is warmed.
+_WARM_AFTER_HITS = 2
+
+# Keys whose hit counts are remembered, least recently used dropped first.
+_MAX_TRACKED_KEYS = 256
+
+
+@dataclass
+class _Warm:
+    """An idle process parked at the prompt in `workdir`."""
+
+    proc: subprocess.Popen
+    workdir: Path
+
+
+class EnginePool:
+    """Warm xelatex processes, `size` per recurring command line and at
+    most `max_idle` (default ``4 * size``) in all."""
+
+    def __init__(self, size: int = 2, max_idle: int | None = None):
+        if size < 1:
+            raise ValueError(f"Pool size must be at least 1, got {size}")
+        if max_idle is None:
+            max_idle = 4 * size
+        if max_idle < size:
+            raise ValueError(f"max_idle must be at least size ({size}), got {max_idle}")
+        self.size = size
+        self.max_idle = max_idle
+        self._root = Path(tempfile.mkdtemp(prefix="klartex-pool-"))
+        self._idle: dict[tuple, list[_Warm]] = {}
+        # Passes seen per key, least recently used first.
+        self._hits: OrderedDict[tuple, int] = OrderedDict()
+        # Processes being spawned per key, counted against `size` so that
+        # concurrent passes do not each top the key up.
+        self._pending: dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._closed = False
+
+    @staticmethod
+    def _key(
+        args: list[str], env: dict[str, str], limits: ResourceLimits = ResourceLimits()
+    ) -> tuple:
+        return (tuple(args), tuple(env.get(name, "") for name in _KEY_ENV), limits)
+
+    def _spawn(
+        self, args: list[str], env: dict[str, str], limits: ResourceLimits
+    ) -> _Warm:
+        with self._lock:
+            self._counter += 1
+            workdir = self._root / f"w{self._counter}"
+        workdir.mkdir()
+        stage_workdir(workdir)
+        cmd = [
+            args[0],
+            "-interaction=scrollmode",
+            "-jobname=document",
+            *[a for a in args[1:] if not a.startswith("-interaction=")],
+            _PARK_LINE,
+        ]
+        proc = subprocess.Popen(
+            limits.command(cmd),
+            cwd=workdir,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        return _Warm(proc=proc, workdir=workdir)
+
+    def _replenish(
+        self,
+        key: tuple,
+        args: list[str],
+        env: dict[str, str],
+        limits: ResourceLimits = ResourceLimits(),
+    ) -> None:
+        """Top up idle processes for `key` to `size`."""
+        with self._lock:
+            if self._closed:
+                return
+            missing = max(self._missing(key), 0)
+            self._pending[key] = self._pending.get(key, 0) + missing
+        try:
+            while missing:
+                warm = self._spawn(args, env, limits)
+                with self._lock:
+                    missing -= 1
+                    self._pending[key] -= 1
+                    if self._closed:
+                        _retire(warm)
+                        return
+                    self._idle.setdefault(key, []).append(warm)
+                    evicted = self._evict(keep=key)
+                for old in evicted:
+                    _retire(old)
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self._pending[key] -= missing
+
+    def _missing(self, key: tuple) -> int:
+        """Processes `key` lacks, counting those being spawned. Call under
+        the lock."""
+        return self.size - len(self._idle.get(key, [])) - self._pending.get(key, 0)
+
+    def _evict(self, keep: tuple) -> list[_Warm]:
+        """Take the idle processes of the least recently used keys other
+        than `keep` off the pool until it is within `max_idle`, and return
+        them for retiring. Call under the lock."""
+        parked = sum(map(len, self._idle.values())) + sum(self._pending.values())
+        order = {k: i for i, k in enumerate(self._hits)}
+        evicted = []
+        for key in sorted(self._idle, key=lambda k: order.get(k, -1)):
+            if parked <= self.max_idle:
+                break
+            if key != keep:
+                warms = self._idle.pop(key)
+                parked -= len(warms)
+                evicted.extend(warms)
+        return evicted
+
+    def _hit(self, key: tuple) -> int:
+        """Count a pass for `key` and return its passes so far. Call under
+        the lock."""
+        hits = self._hits.pop(key, 0) + 1
+        self._hits[key] = hits
+        while len(self._hits) > _MAX_TRACKED_KEYS:
+            self._hits.popitem(last=False)
+        return hits
+
+    def _lease(self, key: tuple) -> _Warm | None:
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                warm = idle.pop(0)
+                if warm.proc.poll() is None:
+                    return warm
+                _retire(warm)
+        return None
+
+    def run_pass(
+        self,
+        args: list[str],
+        env: dict[str, str],
+        jobdir: Path,
+        watcher: PassWatcher,
+        limits: ResourceLimits = ResourceLimits(),
+    ) -> subprocess.CompletedProcess | None:
+        """Run one pass over ``jobdir/document.tex`` on a warm process.
+
+        `args` is the xelatex command line without the input file. The
+        ``document.*`` files of `jobdir` (source, aux, hyperref outlines...)
+        are copied into the process's directory before the pass and its
+        outputs copied back after it. Returns None when no warm process is
+        available for this command line and `limits`; the caller runs the
+        pass cold. The pass is supervised by `watcher` (klartex/progress.py).
+
+        Raises:
+            RuntimeError: if the pass stalls or runs over its budget.
+        """
+        key = self._key(args, env, limits)
+        warm = self._lease(key)
+        # Replace the leased process (or warm a recurring key) while the pass
+        # runs, unless spawns already under way cover it.
+        with self._lock:
+            hits = self._hit(key)
+            missing = self._missing(key)
+        if missing > 0 and hits >= _WARM_AFTER_HITS:
+            threading.Thread(
+                target=self._replenish, args=(key, args, env, limits), daemon=True
+            ).start()
+        if warm is None:
+            return None
+        try:
+            for path in jobdir.glob("document.*"):
+                shutil.copy2(path, warm.workdir / path.name)
+            stdout = watcher.run(warm.proc, input=b"document.tex\n")
+            for path in warm.workdir.glob("document.*"):
+                if path.name != "document.tex":
+                    shutil.copy2(path, jobdir / path.name)
+            return subprocess.CompletedProcess(
+                warm.proc.args, warm.proc.returncode, stdout=stdout, stderr=b""
+            )
+        finally:
+            _retire(warm)
+
+    def close(self) -> None:
+        """Stop all idle processes and remove the pool's directories."""
+        with self._lock:
+            self._closed = True
+            idle = [w for ws in self._idle.values() for w in ws]
+            self._idle.clear()
+            self._hits.clear()
+        for warm in idle:
+            _retire(warm)
+        shutil.rmtree(self._root, ignore_errors=True)
+
+
+def _retire(warm: _Warm) -> None:
+    """Kill (if still running) and clean up a pooled process."""
+    if warm.proc.poll() is None:
+        warm.proc.kill()
+        warm.proc.communicate()
+    shutil.rmtree(warm.workdir, ignore_errors=True)
+
+
+_pool: EnginePool | None = None
+
+
+def start(size: int = 2, max_idle: int | None = None) -> EnginePool:
+    """Enable the process-wide pool used by `render()`."""
+    global _pool
+    stop()
+    _pool = EnginePool(size, max_idle)
+    return _pool
+
+
+def stop() -> None:
+    """Disable and tear down the process-wide pool, if any."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+def get_pool() -> EnginePool | None:
+    """Return the active process-wide pool, or None."""
+    return _pool
+
+
+atexit.register(stop)
@@ -0,0 +1,101 @@
+"""TeX engine backends.
+
+klartex-base.cls loads fontspec under the Unicode engines (XeTeX, LuaTeX) and
+T1/lmodern under pdfTeX, so the same document compiles under all three with
+Latin Modern as the body font. pdflatex skips fontspec and fontconfig
+entirely and is markedly faster for documents that need neither: Latin-1
+text in the default font.
+
+``select_engine`` picks pdflatex for such documents and xelatex otherwise;
+``render(..., engine="auto")`` uses it.
+"""
+
+import re
+from dataclasses import dataclass
+
+ENGINE_NAMES = ("xelatex", "pdflatex", "lualatex")
+
+
+@dataclass(frozen=True)
+class Engine:
+    """How to run one TeX engine."""
+
+    name: str
+    # Passes stop at XDV and xdvipdfmx writes the PDF once; otherwise every
+    # pass writes document.pdf itself.
+    produces_xdv: bool
+    # Preamble formats (tex_format.py) can be dumped and loaded. LuaTeX
+    # formats do not preserve the Lua state fontspec relies on.
+    supports_formats: bool
+    install_hint: str
+
+    def pass_args(self) -> list[str]:
+        """Command line of one pass, without format or input file."""
+        args = [
+            self.name,
+            "-interaction=nonstopmode",
+            "-halt-on-error",
+            "-no-shell-escape",
+        ]
+        if self.produces_xdv:
+            args.append("-no-pdf")
+        return args
+
+
+ENGINES = {
+    "xelatex": Engine(
+        name="xelatex",
+        produces_xdv=True,
+        supports_formats=True,
+        install_hint="apt install texlive-xetex",
+    ),
+    "pdflatex": Engine(
+        name="pdflatex",
+        produces_xdv=False,
+        supports_formats=True,
+        install_hint="apt install texlive-latex-base",
+    ),
+    "lualatex": Engine(
+        name="lualatex",
+        produces_xdv=False,
+        supports_formats=False,
+        install_hint="apt install texlive-luatex",
+    ),
+}
+
+# Characters pdflatex handles with the class's T1 + utf8 input setup: all of
+# Latin-1 plus the typographic punctuation the templates and inline markup
+# emit. Only characters inputenc's utf8 T1/TS1 tables declare belong here
+# (not, for example, the primes ′ and ″).
+_PDFTEX_EXTRA = set("–—‘’‚“”„…•€‰")
+
+# Preamble commands that need fontspec (a Unicode engine).
+_FONTSPEC_RE = re.compile(
+    r"\\(?:set(?:main|sans|mono)font|newfontfamily|newfontface|fontspec"
+    r"|defaultfontfeatures)\b|\{fontspec\}"
+)
+
+
+def get_engine(name: str) -> Engine:
+    """Return the backend called `name`.
+
+    Raises:
+        ValueError: if `name` is not a known engine.
+    """
+    if name not in ENGINES:
+        available = ", ".join(ENGINE_NAMES)
+        raise ValueError(f"Unknown engine '{name}'. Available: {available}, auto")
+    return ENGINES[name]
+
+
+def needs_unicode_engine(tex_source: str) -> bool:
+    """True when `tex_source` uses fontspec or characters beyond what
+    pdflatex typesets with the default font setup."""
+    if _FONTSPEC_RE.search(tex_source):
+        return True
+    return any(ord(c) > 0xFF and c not in _PDFTEX_EXTRA for c in tex_source)
+
+
+def select_engine(tex_source: str) -> str:
+    """Pick the cheapest engine that typesets `tex_source` equivalently."""
+    return "xelatex" if needs_unicode_engine(tex_source) else "pdflatex"
@@ -0,0 +1,305 @@
+"""Font preflight and resolution cache for page templates.
+
+A page template that says ``\\setmainfont{Inter}`` makes fontspec ask
+fontconfig for the family on every render — seconds on a cold or contended
+cache — and a missing font only surfaces as an xelatex error after the
+preamble has loaded. Before compiling we resolve each family named by
+``\\setmainfont`` and friends with ``fc-list``, record the regular, bold,
+italic and bold-italic files under ``cache_dir("fonts")``, and rewrite the
+command to load those files directly::
+
+    \\setmainfont{Inter}
+    -> \\setmainfont{Inter-Regular.otf}[Path=/usr/share/fonts/inter/,
+           BoldFont=Inter-Bold.otf, ...]
+
+Families that are not installed raise ValueError before xelatex starts.
+Commands that already load by file, or set the face options themselves, are
+left alone. Without fontconfig (``fc-list`` not on PATH) nothing is checked
+or rewritten.
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from klartex.cache import cache_dir
+from klartex.texmf import worker_dir
+
+# \setmainfont[pre]{Name}[post], \newfontfamily\cmd[pre]{Name}[post], ...
+_FONT_CMD_RE = re.compile(
+    r"\\(?P<cmd>set(?:main|sans|mono)font|newfontfamily\s*\\[A-Za-z@]+"
+    r"|newfontface\s*\\[A-Za-z@]+|fontspec)\s*"
+    r"(?:\[(?P<pre>[^\[\]]*)\])?\s*"
+    r"\{(?P<name>[^{}\\]+)\}"
+    r"(?:\[(?P<post>[^\[\]]*)\])?"
+)
+
+# Options that pick faces or files themselves; such commands are not
+# rewritten.
+_FACE_OPTIONS = re.compile(
+    r"\b(?:Path|Extension|UprightFont|BoldFont|ItalicFont|BoldItalicFont"
+    r"|SlantedFont|BoldSlantedFont|SmallCapsFont|FontFace)\s*="
+)
+
+_FONT_EXTENSIONS = (".otf", ".ttf", ".ttc", ".pfb", ".woff", ".woff2")
+
+# fontconfig weight and slant values of the four standard faces. Regular
+# weights in order of preference: medium only stands in for a missing
+# regular.
+_REGULAR_WEIGHTS = (80, 100)  # regular, medium
+_BOLD_WEIGHT = 200
+_ROMAN_SLANT = 0
+_ITALIC_SLANTS = {100, 110}  # italic, oblique
+
+_resolved: dict[str, "FontFiles"] | None = None
+# Guards `_resolved` and its file; renders resolve fonts from several threads.
+_lock = threading.Lock()
+
+
+@dataclass
+class FontFiles:
+    """Font files of one family, by face. Only `regular` is required."""
+
+    regular: str
+    bold: str | None = None
+    italic: str | None = None
+    bold_italic: str | None = None
+    # The family is installed but has no static regular face to load by file
+    # (e.g. only a variable font, whose file is `regular`); it is loaded by
+    # name.
+    by_name: bool = False
+
+    def paths(self) -> list[str]:
+        return [p for p in (self.regular, self.bold, self.italic, self.bold_italic) if p]
+
+    def exist(self) -> bool:
+        return all(os.path.exists(p) for p in self.paths())
+
+
+def referenced_fonts(source: str) -> list[str]:
+    """Return the family names `source` loads by name, in order."""
+    names = []
+    for m in _FONT_CMD_RE.finditer(source):
+        name = m.group("name").strip()
+        if not _is_file_name(name) and name not in names:
+            names.append(name)
+    return names
+
+
+def _is_file_name(name: str) -> bool:
+    return "/" in name or name.lower().endswith(_FONT_EXTENSIONS)
+
+
+def _cache_path() -> Path:
+    return cache_dir("fonts") / "resolved.json"
+
+
+def _load_cache() -> dict[str, FontFiles]:
+    """The resolution cache, read from disk on first use. Call with `_lock`
+    held."""
+    global _resolved
+    if _resolved is None:
+        try:
+            raw = json.loads(_cache_path().read_text(encoding="utf-8"))
+            _resolved = {name: FontFiles(**files) for name, files in raw.items()}
+        except (OSError, ValueError, TypeError):
+            _resolved = {}
+    return _resolved
+
+
+def _save_cache(resolved: dict[str, FontFiles]) -> None:
+    path = _cache_path()
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({n: asdict(files) for n, files in resolved.items()}, f, indent=1)
+        os.replace(tmp_name, path)
+    except OSError:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+
+
+def _fc_escape(name: str) -> str:
+    return re.sub(r"([\\\-:,])", r"\\\1", name)
+
+
+def _fc_list(family: str, fmt: str) -> list[str]:
+    """Run ``fc-list`` for `family` and return its output lines."""
+    # Query the fontconfig cache xelatex will use (klartex/texmf.py), which
+    # also warms it.
+    env = os.environ.copy()
+    env["XDG_CACHE_HOME"] = str(worker_dir() / "xdg-cache")
+    result = subprocess.run(
+        ["fc-list", "--format", fmt, f":family={_fc_escape(family)}"],
+        capture_output=True,
+        timeout=60,
+        env=env,
+    )
+    return result.stdout.decode(errors="replace").splitlines()
+
+
+def _faces(family: str) -> list[tuple[str, int | None, int | None]]:
+    """Return (file, weight, slant) for the faces of `family`.
+
+    Variable fonts report ranges ("[0 210]") and get None for those.
+    """
+    faces = []
+    for line in _fc_list(family, "%{file}\t%{weight}\t%{slant}\n"):
+        parts = line.split("\t")
+        if len(parts) != 3 or not parts[0]:
+            continue
+        faces.append((parts[0], _fc_int(parts[1]), _fc_int(parts[2])))
+    return sorted(faces)
+
+
+def _fc_int(value: str) -> int | None:
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _pick(faces, weights, slants) -> str | None:
+    """The first static face in `slants` with the most preferred of
+    `weights`."""
+    for wanted in weights:
+        for path, weight, slant in faces:
+            if weight == wanted and slant in slants:
+                return path
+    return None
+
+
+def resolve_font(family: str) -> FontFiles | None:
+    """Return the files of `family` (cached), or None if not installed.
+
+    Returns None as well when the family has no static regular face, e.g.
+    only a variable font, which cannot be split into per-face files; that
+    outcome is cached too, see `font_exists`.
+    """
+    cached = _cached(family)
+    if cached is not None:
+        return None if cached.by_name else cached
+    faces = _faces(family)
+    if not faces:
+        return None
+    regular = _pick(faces, _REGULAR_WEIGHTS, {_ROMAN_SLANT})
+    if regular is None:
+        files = FontFiles(regular=faces[0][0], by_name=True)
+    else:
+        files = FontFiles(
+            regular=regular,
+            bold=_pick(faces, (_BOLD_WEIGHT,), {_ROMAN_SLANT}),
+            italic=_pick(faces, _REGULAR_WEIGHTS, _ITALIC_SLANTS),
+            bold_italic=_pick(faces, (_BOLD_WEIGHT,), _ITALIC_SLANTS),
+        )
+    with _lock:
+        resolved = _load_cache()
+        resolved[family] = files
+        _save_cache(resolved)
+    return None if files.by_name else files
+
+
+def _cached(family: str) -> FontFiles | None:
+    """The cached resolution of `family`, if its files still exist."""
+    with _lock:
+        cached = _load_cache().get(family)
+    if cached is not None and cached.exist():
+        return cached
+    return None
+
+
+def font_exists(family: str) -> bool:
+    """True when fontconfig knows `family` in any form."""
+    if _cached(family) is not None:
+        return True
+    return any(line.strip() for line in _fc_list(family, "%{file}\n"))
+
+
+def _file_options(files: FontFiles) -> tuple[str, str] | None:
+    """Return (file name, fontspec options) for loading `files`, or None
+    when the faces live in different directories."""
+    paths = [Path(p) for p in files.paths()]
+    if len({p.parent for p in paths}) != 1:
+        return None
+    options = [f"Path={paths[0].parent}/"]
+    for key, option in (
+        ("bold", "BoldFont"),
+        ("italic", "ItalicFont"),
+        ("bold_italic", "BoldItalicFont"),
+    ):
+        path = getattr(files, key)
+        if path:
+            options.append(f"{option}={Path(path).name}")
+    return Path(files.regular).name, ", ".join(options)
+
+
+def apply_font_files(source: str, where: str = "page template") -> str:
+    """Check and rewrite the font commands of `source` to load by file.
+
+    Raises:
+        ValueError: if a referenced family is not installed.
+    """
+    if not shutil.which("fc-list") or not _FONT_CMD_RE.search(source):
+        return source
+
+    def rewrite(m: re.Match) -> str:
+        name = m.group("name").strip()
+        if _is_file_name(name):
+            return m.group(0)
+        files = resolve_font(name)
+        if files is None:
+            if font_exists(name):
+                return m.group(0)
+            cmd = m.group("cmd").split("\\")[0].strip()
+            raise ValueError(
+                f"Font '{name}' (\\{cmd} in {where}) is not installed"
+            )
+        user_options = ", ".join(
+            o.strip() for o in (m.group("pre"), m.group("post")) if o and o.strip()
+        )
+        if _FACE_OPTIONS.search(user_options):
+            return m.group(0)
+        loaded = _file_options(files)
+        if loaded is None:
+            return m.group(0)
+        file_name, options = loaded
+        if user_options:
+            options = f"{options}, {user_options}"
+        return f"\\{m.group('cmd')}{{{file_name}}}[{options}]"
+
+    return _FONT_CMD_RE.sub(rewrite, source)
+
+
+def preflight_fonts(sources: dict[str, str] | None = None) -> dict[str, FontFiles | None]:
+    """Resolve every font referenced by the built-in page templates and
+    `sources` (name -> page template source), warming the caches.
+
+    Returns family -> files, with None for families that are not installed
+    (or have no static regular face, e.g. only a variable font).
+
+    Raises:
+        RuntimeError: if fontconfig's ``fc-list`` is not available.
+    """
+    if not shutil.which("fc-list"):
+        raise RuntimeError("fc-list not found; font preflight needs fontconfig")
+    from klartex.page_templates import list_page_templates, read_page_template_source
+
+    all_sources = {
+        pt["name"]: read_page_template_source(pt["name"])
+        for pt in list_page_templates()
+    }
+    all_sources.update(sources or {})
+    result: dict[str, FontFiles | None] = {}
+    for source in all_sources.values():
+        for family in referenced_fonts(source):
+            if family not in result:
+                result[family] = resolve_font(family)
+    return result
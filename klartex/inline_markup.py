@@ -1,8 +1,8 @@
 """Inline markup → LaTeX for prose-bearing fields.
 
-Runs *after* `escape_data()`. The escape pass leaves our markers (``*``,
-``**``, `` ` ``, ``"``) untouched, so we can detect them here without
-fighting the escape state machine.
+Runs *after* escaping (`escape_view()`). The escape pass leaves our markers
+(``*``, ``**``, `` ` ``, ``"``) untouched, so we can detect them here
+without fighting the escape state machine.
 
 Markers (deliberately narrow — see issue #25):
 
@@ -16,14 +16,12 @@ strikethrough, escape hatches (``\\*`` to print a literal ``*`` etc.).
 """
 
 import re
+from functools import lru_cache
 
-# Code spans first so * / ** inside backticks aren't treated as markup.
-_CODE_RE = re.compile(r"`([^`]+)`")
-# Bold must run before italic (longer marker wins). Non-greedy so adjacent
-# pairs don't merge: ``**a** **b**`` → two bolds, not one.
-_BOLD_RE = re.compile(r"\*\*(.+?)\*\*", re.DOTALL)
-# Italic: a single * not adjacent to another *.
-_ITALIC_RE = re.compile(r"(?<!\*)\*([^*\n]+)\*(?!\*)")
+# One scan splits the text into the tokens that can carry markup: code
+# spans (atomic, so ``*`` and ``"`` inside backticks are never markup),
+# single ``*``, ``"`` and newlines. Everything between them is plain text.
+_TOKEN_RE = re.compile(r"(`[^`]+`|[*\"\n])")
 
 # (open, close) for paired double quotes per language.
 _QUOTE_PAIRS = {
@@ -31,9 +29,16 @@ _QUOTE_PAIRS = {
     "en": ("“", "”"),  # “…”
 }
 
-_CODE_PLACEHOLDER = "\x00KX_CODE_{}\x00"
+_NEWLINES = {"cell": " \\newline ", "space": " ", "break": " \\\\ "}
 
+# Token kinds.
+_TEXT, _CODE, _STAR, _QUOTE, _NEWLINE = range(5)
 
+# Labels, amounts and names recur across the cells of a roster or ledger.
+_CACHE_SIZE = 16384
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
 def render_inline(text: str, lang: str = "sv", newlines: str = "break") -> str:
     """Convert inline markup to LaTeX. ``text`` is assumed pre-escaped.
 
@@ -45,48 +50,109 @@ def render_inline(text: str, lang: str = "sv", newlines: str = "break") -> str:
       columns (``p{...}``/``X``).
     - ``"space"``: collapse to a space — for LR-mode cells (``l`` columns)
       where no in-cell line break exists.
+
+    Results are cached by (text, lang, newlines).
     """
-    if not text:
+    # Splitting on the captured token pattern alternates text and tokens.
+    parts = _TOKEN_RE.split(text)
+    if len(parts) == 1:
         return text
+    # Literal newlines in JSON strings ("line 1\nline 2") become LaTeX line
+    # breaks within the current paragraph. For separate paragraphs, use
+    # separate text blocks.
+    newline = _NEWLINES.get(newlines, _NEWLINES["break"])
+    # Token values are rewritten in place into their output.
+    kinds, out = _tokenize(parts)
+    for i, kind in enumerate(kinds):
+        if kind == _CODE:
+            code = out[i].replace("\n", newline)
+            out[i] = f"\\texttt{{{code}}}"
+        elif kind == _NEWLINE:
+            out[i] = newline
+    if _STAR in kinds:
+        _mark_emphasis(kinds, out)
+    if _QUOTE in kinds:
+        _smart_quotes(kinds, out, lang)
+    return "".join(out)
 
-    code_spans: list[str] = []
 
-    def stash(match: re.Match) -> str:
-        code_spans.append(match.group(1))
-        return _CODE_PLACEHOLDER.format(len(code_spans) - 1)
+def _tokenize(parts: list[str]) -> tuple[list[int], list[str]]:
+    """Turn the text/token alternation of `parts` into parallel lists of
+    token kinds and values (the code span's content for code tokens)."""
+    kinds: list[int] = []
+    values: list[str] = []
+    for i, part in enumerate(parts):
+        if not i & 1:
+            if part:
+                kinds.append(_TEXT)
+                values.append(part)
+        elif part == "*":
+            kinds.append(_STAR)
+            values.append(part)
+        elif part == '"':
+            kinds.append(_QUOTE)
+            values.append(part)
+        elif part == "\n":
+            kinds.append(_NEWLINE)
+            values.append(part)
+        else:
+            kinds.append(_CODE)
+            values.append(part[1:-1])
+    return kinds, values
 
-    text = _CODE_RE.sub(stash, text)
-    text = _BOLD_RE.sub(r"\\textbf{\1}", text)
-    text = _ITALIC_RE.sub(r"\\textit{\1}", text)
-    text = _smart_quotes(text, lang)
 
-    for i, code in enumerate(code_spans):
-        text = text.replace(_CODE_PLACEHOLDER.format(i), f"\\texttt{{{code}}}")
+def _mark_emphasis(kinds: list[int], out: list[str]) -> None:
+    """Turn the ``*`` tokens that delimit bold and italic spans into
+    ``\\textbf{``/``\\textit{`` and ``}`` in `out`.
 
-    # Literal newlines in JSON strings ("line 1\nline 2") become LaTeX line
-    # breaks within the current paragraph. For separate paragraphs, use
-    # separate text blocks. Done last so it doesn't interfere with the regex
-    # passes above that operate within a single line.
-    if newlines == "cell":
-        text = text.replace("\n", " \\newline ")
-    elif newlines == "space":
-        text = text.replace("\n", " ")
-    else:
-        text = text.replace("\n", " \\\\ ")
+    Every token stands for at least one character, so "at least one
+    character between markers" is "at least one token between them".
 
-    return text
+    Bold: the first ``**``, paired with the next ``**`` that leaves content
+    between them. If an opener has no closer, no later one can have either.
+    Italic then applies to the ``*`` left over, as if scanning the text with
+    bold already replaced: a ``*`` not preceded by one, then a run without
+    ``*`` or newline, then a ``*`` not followed by one. Delimiters may cross
+    bold spans; the output is what the old regex passes produced.
+    """
+    n = len(kinds)
+    star = [kind == _STAR for kind in kinds]
+    i = 0
+    while i < n - 1:
+        if not (star[i] and star[i + 1]):
+            i += 1
+            continue
+        j = i + 3
+        while j < n - 1 and not (star[j] and star[j + 1]):
+            j += 1
+        if j >= n - 1:
+            break
+        out[i], out[i + 1] = "\\textbf{", ""
+        out[j], out[j + 1] = "}", ""
+        star[i] = star[i + 1] = star[j] = star[j + 1] = False
+        i = j + 2
+    i = 0
+    while i < n:
+        if not star[i] or (i > 0 and star[i - 1]):
+            i += 1
+            continue
+        j = i + 1
+        while j < n and not star[j] and kinds[j] != _NEWLINE:
+            j += 1
+        if j == n:
+            break
+        if star[j] and j > i + 1 and not (j + 1 < n and star[j + 1]):
+            out[i], out[j] = "\\textit{", "}"
+            i = j + 1
+        else:
+            # No italic opens at i, or at anything before j.
+            i = j if star[j] else j + 1
 
 
-def _smart_quotes(text: str, lang: str) -> str:
+def _smart_quotes(kinds: list[int], out: list[str], lang: str) -> None:
     open_q, close_q = _QUOTE_PAIRS.get(lang, _QUOTE_PAIRS["sv"])
-    if open_q == close_q:
-        return text.replace('"', open_q)
-    out: list[str] = []
     in_quote = False
-    for ch in text:
-        if ch == '"':
-            out.append(close_q if in_quote else open_q)
+    for i, kind in enumerate(kinds):
+        if kind == _QUOTE:
+            out[i] = close_q if in_quote else open_q
             in_quote = not in_quote
-        else:
-            out.append(ch)
-    return "".join(out)
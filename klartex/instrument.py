@@ -0,0 +1,77 @@
+"""Per-block TeX cost attribution for block-engine documents.
+
+With ``render_detailed(..., instrument=True)`` the block engine wraps every
+block — top-level and nested — in ``\\kxblockstart``/``\\kxblockend`` markers
+(cls/klartex-instrument.sty). Each marker logs the engine's elapsed time when
+TeX reaches it and the page it lands on when that page is shipped out.
+`parse_block_costs` reads them back from the final pass's log into
+`BlockCost` entries keyed by block path, e.g. ``body[3].items[1][0]``.
+
+Times are inclusive: a clause's cost contains its nested blocks'. TeX
+typesets a page only once it is full, so the output routine's work for a
+page is charged to whichever block completed it. Timing needs an engine
+with an elapsed-time primitive (pdfTeX, recent XeTeX, LuaTeX); elsewhere
+all times are zero. The markers add whatsits between blocks, which can
+shift page breaks slightly compared with an uninstrumented render.
+"""
+
+import re
+from dataclasses import dataclass
+
+# \sys_timer: units per second.
+_TIMER_SCALE = 65536
+
+# TeX's default max_print_line: log lines are hard-wrapped at this width.
+_LOG_WIDTH = 79
+
+_MARK_RE = re.compile(r"KX(TIME|PAGE):(start|end):([^:\s]+):(\d+)")
+
+
+@dataclass
+class BlockCost:
+    """Where one block ended up and what typesetting it cost."""
+
+    path: str
+    # Elapsed engine time between the block's start and end markers.
+    seconds: float
+    # Pages the block starts and ends on (None if a marker never shipped,
+    # e.g. a block on a page after a preview page limit).
+    first_page: int | None
+    last_page: int | None
+
+
+def unwrap_log(log: str) -> str:
+    """Undo TeX's hard wrapping of log lines at `_LOG_WIDTH` characters."""
+    out = []
+    for line in log.split("\n"):
+        if out and len(out[-1]) % _LOG_WIDTH == 0 and out[-1]:
+            out[-1] += line
+        else:
+            out.append(line)
+    return "\n".join(out)
+
+
+def parse_block_costs(log: str) -> dict[str, BlockCost]:
+    """Return the per-block costs recorded in an instrumented run's log,
+    in document order."""
+    times: dict[tuple[str, str], int] = {}
+    pages: dict[tuple[str, str], int] = {}
+    order: list[str] = []
+    for kind, edge, path, value in _MARK_RE.findall(unwrap_log(log)):
+        if kind == "TIME":
+            if edge == "start" and (edge, path) not in times:
+                order.append(path)
+            times[(edge, path)] = int(value)
+        else:
+            pages[(edge, path)] = int(value)
+    costs = {}
+    for path in order:
+        start, end = times.get(("start", path)), times.get(("end", path))
+        elapsed = (end - start) / _TIMER_SCALE if end is not None else 0.0
+        costs[path] = BlockCost(
+            path=path,
+            seconds=max(elapsed, 0.0),
+            first_page=pages.get(("start", path)),
+            last_page=pages.get(("end", path)),
+        )
+    return costs
@@ -0,0 +1,171 @@
+"""Per-render resource limits for the TeX child processes.
+
+Apart from the wall-clock timeout, nothing bounds what an xelatex run may
+use: a pathological ``latex`` block or runaway table can take a whole core
+and gigabytes of memory, which forces callers to keep concurrency low.
+`ResourceLimits` caps each engine and driver process with rlimits
+(address space, CPU seconds, size of any file written) and the document's
+page count, and a limit that is hit surfaces as `ResourceLimitExceeded`.
+
+The rlimits are set by running the command under util-linux ``prlimit``,
+which applies them and then executes the command in the same process.
+(A ``preexec_fn`` is not safe while other threads run, and the engine
+and workdir pools start processes from several threads.)
+
+Usage::
+
+    render("_block", data, limits=ResourceLimits(
+        address_space=1024**3, cpu_seconds=20, file_size=50 * 1024**2,
+        max_pages=200,
+    ))
+"""
+
+import os
+import re
+import shutil
+import signal
+import subprocess
+from dataclasses import dataclass
+
+# Memory-allocation failures as reported by web2c (xmalloc) and the driver.
+_OUT_OF_MEMORY_RE = re.compile(
+    r"memory exhausted|out of memory|cannot allocate memory", re.IGNORECASE
+)
+
+# "Output written on document.xdv (3 pages, ...)"
+_PAGES_RE = re.compile(r"Output written on \S+ \((\d+) pages?")
+
+
+class ResourceLimitExceeded(RuntimeError):
+    """A render hit one of its `ResourceLimits`.
+
+    `limit` names the field that was exceeded, e.g. ``"cpu_seconds"``.
+    """
+
+    def __init__(self, limit: str, message: str):
+        super().__init__(message)
+        self.limit = limit
+
+
+@dataclass(frozen=True)
+class ResourceLimits:
+    """Caps applied to every TeX child process of a render. None = no cap."""
+
+    # Virtual address space per process, in bytes (RLIMIT_AS).
+    address_space: int | None = None
+    # CPU time per process, in seconds (RLIMIT_CPU).
+    cpu_seconds: int | None = None
+    # Largest file a process may write, in bytes (RLIMIT_FSIZE).
+    file_size: int | None = None
+    # Pages in the typeset document.
+    max_pages: int | None = None
+
+    def command(self, cmd: list[str]) -> list[str]:
+        """Return `cmd` run under ``prlimit`` with the rlimits, or `cmd`
+        unchanged when there are none.
+
+        Raises:
+            RuntimeError: if rlimits are set and ``prlimit`` is not installed.
+        """
+        caps = []
+        if self.address_space is not None:
+            caps.append(f"--as={self.address_space}:{self.address_space}")
+        if self.cpu_seconds is not None:
+            # Soft limit sends SIGXCPU; the hard limit a second later is the
+            # SIGKILL backstop.
+            caps.append(f"--cpu={self.cpu_seconds}:{self.cpu_seconds + 1}")
+        if self.file_size is not None:
+            caps.append(f"--fsize={self.file_size}:{self.file_size}")
+        if not caps:
+            return cmd
+        prlimit = shutil.which("prlimit")
+        if prlimit is None:
+            raise RuntimeError("prlimit not found; resource limits need util-linux")
+        return [prlimit, *caps, "--", *cmd]
+
+    def check_exit(
+        self,
+        program: str,
+        returncode: int,
+        output: str,
+        cpu_used: float | None = None,
+    ) -> None:
+        """Raise `ResourceLimitExceeded` if a failed run hit a limit.
+
+        Args:
+            program: Name for the error message, e.g. "xelatex".
+            returncode: The process's exit status (negative: killed by signal).
+            output: Its captured terminal output.
+            cpu_used: CPU seconds the process used, if measured (see
+                `wait_cpu_seconds`). A SIGKILL only counts as the CPU limit's
+                backstop when this reached the limit; the OOM killer, the
+                stall watchdog and pool shutdown kill with SIGKILL too.
+        """
+        if returncode == 0:
+            return
+        if self.cpu_seconds is not None and (
+            returncode == -signal.SIGXCPU
+            or (
+                returncode == -signal.SIGKILL
+                and cpu_used is not None
+                and cpu_used >= self.cpu_seconds
+            )
+        ):
+            raise ResourceLimitExceeded(
+                "cpu_seconds",
+                f"{program} exceeded the CPU limit of {self.cpu_seconds}s",
+            )
+        if self.file_size is not None and returncode == -signal.SIGXFSZ:
+            raise ResourceLimitExceeded(
+                "file_size",
+                f"{program} exceeded the output file size limit of "
+                f"{self.file_size} bytes",
+            )
+        if self.address_space is not None and _OUT_OF_MEMORY_RE.search(output):
+            raise ResourceLimitExceeded(
+                "address_space",
+                f"{program} exceeded the memory limit of "
+                f"{self.address_space} bytes",
+            )
+
+    def check_pages(self, program: str, output: str) -> None:
+        """Raise `ResourceLimitExceeded` if a pass typeset too many pages."""
+        if self.max_pages is None:
+            return
+        m = _PAGES_RE.search(output)
+        if m:
+            self.check_page_count(program, int(m.group(1)))
+
+    def check_page_count(self, program: str, pages: int) -> None:
+        """Raise `ResourceLimitExceeded` if `pages` is over the page limit.
+
+        Called per shipout while a pass runs, so a runaway document is
+        stopped at the first page over the limit.
+        """
+        if self.max_pages is not None and pages > self.max_pages:
+            raise ResourceLimitExceeded(
+                "max_pages",
+                f"{program} typeset {pages} pages, more than the limit "
+                f"of {self.max_pages}",
+            )
+
+
+def wait_cpu_seconds(proc: subprocess.Popen) -> float | None:
+    """Wait for `proc` to exit and return the CPU seconds (user + system)
+    it used, or None where that cannot be measured.
+
+    The time is read from ``/proc`` after the process exits and before it
+    is reaped; `proc` is reaped (``proc.wait()``) either way.
+    """
+    cpu = None
+    if proc.returncode is None and hasattr(os, "waitid"):
+        try:
+            os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+            with open(f"/proc/{proc.pid}/stat", "rb") as f:
+                # Fields after the parenthesized command name, from state.
+                fields = f.read().rsplit(b")", 1)[1].split()
+            cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        except (OSError, ValueError, IndexError):
+            pass
+    proc.wait()
+    return cpu
@@ -0,0 +1,76 @@
+"""Swedish formatting of financial amounts.
+
+Amounts in resultatrakning, budgettabell and balansräkning tables used to be
+formatted at TeX time by ``\\klartexnum`` (siunitx's ``\\num``). Loading
+siunitx and parsing every number in TeX dominated the preamble and body of
+large sie-exportrapport documents, so amounts are now formatted here while
+the template is rendered, with the same conventions:
+
+- rounded to whole units, halves away from zero;
+- digits grouped in threes with a thin space (``\\,``) from four digits up;
+- decimal comma (only reachable with `places` > 0);
+- a math minus for negative amounts.
+
+The result is TeX source; templates use it through the ``amount`` filter.
+`RunningTotals` keeps the running sums behind carried-forward ("transport")
+lines of page-breaking financial tables (klartex-transport.sty).
+"""
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+_GROUP_SEPARATOR = "\\,"
+_GROUP_MINIMUM_DIGITS = 4
+_DECIMAL_MARKER = ","
+_MINUS = "$-$"
+
+
+def format_amount(value: int | float | str | None, places: int = 0) -> str:
+    """Format `value` as an amount rounded to `places` decimals.
+
+    None and empty strings give an empty cell; a value that is not a number
+    is returned unchanged.
+    """
+    if value is None or value == "":
+        return ""
+    if isinstance(value, bool):
+        return str(value)
+    try:
+        number = Decimal(str(value)).quantize(
+            Decimal(1).scaleb(-places), rounding=ROUND_HALF_UP
+        )
+    except InvalidOperation:
+        return str(value)
+    sign, digits, _ = number.as_tuple()
+    text = "".join(map(str, digits)).rjust(places + 1, "0")
+    integer, fraction = text[: len(text) - places], text[len(text) - places :]
+    if len(integer) >= _GROUP_MINIMUM_DIGITS:
+        head = len(integer) % 3 or 3
+        groups = [integer[:head]] + [
+            integer[i : i + 3] for i in range(head, len(integer), 3)
+        ]
+        integer = _GROUP_SEPARATOR.join(groups)
+    result = integer + (_DECIMAL_MARKER + fraction if fraction else "")
+    if sign and any(digits):
+        result = _MINUS + result
+    return result
+
+
+class RunningTotals:
+    """Running sums of some amount fields over the rows of a table.
+
+    Sums are exact (decimal), so a long ledger carries no float drift into
+    its transport lines.
+    """
+
+    def __init__(self, *fields: str):
+        self.fields = fields
+        self.sums = [Decimal(0)] * len(fields)
+
+    def add(self, row: dict) -> str:
+        """Add the fields of `row` and return the running totals as TeX
+        arguments, ``{<total1>}{<total2>}...``, for ``\\kxtransport``."""
+        for i, name in enumerate(self.fields):
+            value = row.get(name)
+            if value is not None and value != "":
+                self.sums[i] += Decimal(str(value))
+        return "".join("{" + format_amount(total) + "}" for total in self.sums)
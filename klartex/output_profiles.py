@@ -0,0 +1,100 @@
+"""PDF output profiles: compression and PDF version.
+
+By default the PDF is written with the driver's defaults (xdvipdfmx under
+xelatex, the engine itself under pdflatex and lualatex). A profile trades
+file size against driver time:
+
+- ``default``: engine defaults, as before.
+- ``archive``: maximum stream compression, PDF 1.7 and compressed object
+  streams — smallest files, for bulk archival runs.
+- ``preview``: no stream compression — the fastest driver stage, for
+  interactive previews. Files are several times larger.
+
+Under xelatex the profile becomes xdvipdfmx flags (``-z``, ``-V``); xdvipdfmx
+writes object streams by itself for PDF 1.5 and later. Under pdflatex and
+lualatex it becomes the engine's PDF parameters, set just before
+``\\begin{document}`` so preamble formats (klartex/tex_format.py) are shared
+between profiles.
+"""
+
+from dataclasses import dataclass
+
+from klartex.engines import Engine
+
+
+@dataclass(frozen=True)
+class OutputProfile:
+    """How the PDF is written. None leaves the engine default in place."""
+
+    name: str
+    # Stream compression level, 0 (none) to 9 (maximum).
+    compression: int | None = None
+    # PDF version as "1.N".
+    pdf_version: str | None = None
+    # Pack objects into compressed object streams (PDF 1.5+). pdfTeX and
+    # LuaTeX only.
+    object_streams: bool | None = None
+
+    def driver_args(self) -> list[str]:
+        """Extra xdvipdfmx arguments."""
+        args = []
+        if self.compression is not None:
+            args += ["-z", str(self.compression)]
+        if self.pdf_version is not None:
+            args += ["-V", self._minor_version()]
+        return args
+
+    def engine_setup(self, engine: Engine) -> str:
+        """TeX assignments applying the profile under an engine that writes
+        the PDF itself; empty for xdvipdfmx engines."""
+        if engine.produces_xdv:
+            return ""
+        if engine.name == "lualatex":
+            compress = "\\pdfvariable compresslevel"
+            objcompress = "\\pdfvariable objcompresslevel"
+            minor = "\\pdfvariable minorversion"
+        else:
+            compress = "\\pdfcompresslevel"
+            objcompress = "\\pdfobjcompresslevel"
+            minor = "\\pdfminorversion"
+        lines = []
+        if self.compression is not None:
+            lines.append(f"{compress}={self.compression}")
+        if self.object_streams is not None:
+            lines.append(f"{objcompress}={2 if self.object_streams else 0}")
+        if self.pdf_version is not None:
+            lines.append(f"{minor}={self._minor_version()}")
+        return "\n".join(lines)
+
+    def _minor_version(self) -> str:
+        return self.pdf_version.split(".", 1)[1]
+
+
+OUTPUT_PROFILES = {
+    "default": OutputProfile(name="default"),
+    "archive": OutputProfile(
+        name="archive", compression=9, pdf_version="1.7", object_streams=True
+    ),
+    "preview": OutputProfile(name="preview", compression=0, object_streams=False),
+}
+
+
+def get_output_profile(name: str) -> OutputProfile:
+    """Return the output profile called `name`.
+
+    Raises:
+        ValueError: if `name` is not a known profile.
+    """
+    if name not in OUTPUT_PROFILES:
+        available = ", ".join(OUTPUT_PROFILES)
+        raise ValueError(f"Unknown output profile '{name}'. Available: {available}")
+    return OUTPUT_PROFILES[name]
+
+
+def apply_output_profile(tex_source: str, engine: Engine, profile: OutputProfile) -> str:
+    """Insert the profile's engine setup before ``\\begin{document}``."""
+    setup = profile.engine_setup(engine)
+    marker = "\\begin{document}"
+    if not setup or marker not in tex_source:
+        return tex_source
+    return tex_source.replace(marker, f"{setup}\n{marker}", 1)
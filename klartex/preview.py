@@ -0,0 +1,70 @@
+"""Draft preview mode: trade fidelity for latency.
+
+Editors re-render a document on every change just to show it. With
+``render(..., preview=Preview(...))`` a render
+
+- typesets a single pass (cross-references come from the aux store when an
+  earlier render of the same document shape left one there; nothing is
+  stored back),
+- loads klartex-base with its ``preview`` option: graphics in draft mode
+  (framed placeholders with the file name instead of the image) and no
+  hyperref, so no links, bookmarks or PDF metadata,
+- writes the PDF with the ``preview`` output profile (no compression),
+- optionally stops after the first `pages` pages,
+- optionally typesets only ``body[start:end]`` of a block-engine document.
+
+Usage::
+
+    render("_block", data, preview=Preview(pages=2))
+    render("_block", data, preview=Preview(blocks=(40, 60)))
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Preview:
+    """What a preview render typesets. None = everything."""
+
+    # Stop after this many pages.
+    pages: int | None = None
+    # Half-open range [start, end) of top-level `body` blocks; end may be
+    # None for "to the end".
+    blocks: tuple[int, int | None] | None = None
+
+    def __post_init__(self):
+        if self.pages is not None and self.pages < 1:
+            raise ValueError(f"Preview pages must be at least 1, got {self.pages}")
+        if self.blocks is not None:
+            start, end = self.blocks
+            if start < 0 or (end is not None and end <= start):
+                raise ValueError(f"Invalid preview block range {start}:{end}")
+
+    def select_body(self, body: list) -> list:
+        """Return the blocks of `body` the preview typesets."""
+        if self.blocks is None:
+            return body
+        start, end = self.blocks
+        if start >= len(body):
+            raise ValueError(
+                f"Preview block range starts at {start}, but body has "
+                f"{len(body)} blocks"
+            )
+        return body[start:end]
+
+
+def parse_block_range(text: str) -> tuple[int, int | None]:
+    """Parse ``START:END`` (END optional, exclusive) as used by the CLI.
+
+    Raises:
+        ValueError: if `text` is not a block range.
+    """
+    start, sep, end = text.partition(":")
+    try:
+        if not sep:
+            raise ValueError
+        return int(start or 0), int(end) if end else None
+    except ValueError:
+        raise ValueError(
+            f"Invalid block range '{text}', expected START:END (e.g. 10:20)"
+        ) from None
@@ -0,0 +1,168 @@
+"""Streaming supervision of TeX passes: progress and stall detection.
+
+A pass used to run under ``subprocess.run(..., timeout=60)``: its output was
+buffered until exit, and a fixed minute was both too short for a legitimately
+long document (a 300-page sie-exportrapport) and far too long for a stuck
+one-pager. `PassWatcher` instead reads the engine's terminal output as it is
+written and
+
+- counts page shipouts (TeX prints ``[1] [2] ...`` as each page is shipped)
+  and reports them to a callback,
+- kills the pass when it has printed nothing for `stall_timeout` seconds,
+- kills it when it exceeds an overall `budget`, which `pass_budget` scales
+  with the size of the document.
+
+Both timeouts surface as RuntimeError, like any other compile failure.
+"""
+
+import os
+import re
+import selectors
+import subprocess
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from klartex.limits import wait_cpu_seconds
+
+# Seconds without any terminal output before a pass counts as stuck. Engines
+# print while loading every file and shipping every page; long silences are
+# fontconfig cache builds, which run per worker and only once.
+DEFAULT_STALL_TIMEOUT = 30.0
+
+# Overall budget of one pass: a base plus a share per KB of source and per
+# page typeset by the previous pass.
+_BUDGET_BASE = 60.0
+_BUDGET_PER_KB = 0.25
+_BUDGET_PER_PAGE = 0.5
+
+# A shipout: "[<\count0>(.<\count1>...)" opening the page's bracket, preceded
+# by whitespace, the end of a previous page or a special, and followed by the
+# page's specials, its closing bracket or a line break.
+_SHIPOUT_RE = re.compile(r"(?<![^\s\]}>)])\[-?\d+(?:\.-?\d+)*(?=[\s\]{<])")
+
+# Longer than any shipout token, so one split across reads is seen whole.
+_TOKEN_WINDOW = 24
+
+
+@dataclass(frozen=True)
+class Progress:
+    """A page shipped out during a render."""
+
+    engine: str
+    # 1-based number of the pass being run.
+    pass_number: int
+    # Pages shipped out so far in this pass.
+    pages: int
+
+
+def pass_budget(source_size: int, pages: int = 0) -> float:
+    """Return the overall time budget, in seconds, of one pass over a source
+    of `source_size` bytes that typeset `pages` pages last time."""
+    return _BUDGET_BASE + _BUDGET_PER_KB * source_size / 1024 + _BUDGET_PER_PAGE * pages
+
+
+class ShipoutCounter:
+    """Counts page shipouts in terminal output fed in arbitrary chunks."""
+
+    def __init__(self):
+        self.pages = 0
+        self._rest = ""
+        self._pos = 0
+
+    def feed(self, data: bytes) -> int:
+        """Consume `data` and return the number of new shipouts in it."""
+        text = self._rest + data.decode("latin-1")
+        pos = self._pos
+        new = 0
+        for m in _SHIPOUT_RE.finditer(text, pos):
+            new += 1
+            pos = m.end()
+        # Keep the unmatched tail, where a token may continue in the next
+        # chunk, plus one character of context for the lookbehind.
+        resume = max(pos, len(text) - _TOKEN_WINDOW, 0)
+        cut = max(resume - 1, 0)
+        self._rest = text[cut:]
+        self._pos = resume - cut
+        self.pages += new
+        return new
+
+
+class PassWatcher:
+    """Supervises one pass of `program`.
+
+    `on_page` is called with the running page count after every shipout; an
+    exception it raises (e.g. a page limit) kills the pass and propagates.
+    """
+
+    def __init__(
+        self,
+        program: str,
+        stall_timeout: float = DEFAULT_STALL_TIMEOUT,
+        budget: float = _BUDGET_BASE,
+        on_page: Callable[[int], None] | None = None,
+    ):
+        self.program = program
+        self.stall_timeout = stall_timeout
+        self.budget = budget
+        self.on_page = on_page
+        self.pages = 0
+        # CPU seconds the finished pass used, where measurable.
+        self.cpu_seconds: float | None = None
+
+    def run(self, proc: subprocess.Popen, input: bytes | None = None) -> bytes:
+        """Wait for `proc` while streaming its stdout; return the output.
+
+        `proc` must have been started with ``stdout=PIPE`` (and ``stdin=PIPE``
+        when `input` is given). It is killed if the pass stalls, runs over
+        budget or `on_page` raises.
+
+        Raises:
+            RuntimeError: if the pass stalled or ran over budget.
+        """
+        try:
+            output = self._stream(proc, input)
+        except BaseException:
+            proc.kill()
+            proc.wait()
+            raise
+        self.cpu_seconds = wait_cpu_seconds(proc)
+        return output
+
+    def _stream(self, proc: subprocess.Popen, input: bytes | None) -> bytes:
+        if input is not None:
+            try:
+                proc.stdin.write(input)
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        counter = ShipoutCounter()
+        chunks = []
+        fd = proc.stdout.fileno()
+        start = last = time.monotonic()
+        with selectors.DefaultSelector() as sel:
+            sel.register(fd, selectors.EVENT_READ)
+            while True:
+                now = time.monotonic()
+                if now - start >= self.budget:
+                    raise RuntimeError(
+                        f"{self.program} timed out after {self.budget:.0f}s"
+                    )
+                if now - last >= self.stall_timeout:
+                    raise RuntimeError(
+                        f"{self.program} stalled: no output for "
+                        f"{self.stall_timeout:g}s"
+                    )
+                wait = min(start + self.budget, last + self.stall_timeout) - now
+                if not sel.select(wait):
+                    continue
+                data = os.read(fd, 65536)
+                if not data:
+                    break
+                chunks.append(data)
+                last = time.monotonic()
+                for _ in range(counter.feed(data)):
+                    self.pages += 1
+                    if self.on_page is not None:
+                        self.on_page(self.pages)
+        return b"".join(chunks)
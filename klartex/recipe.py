@@ -7,23 +7,27 @@ This module does NOT generate LaTeX. LaTeX generation is handled
 entirely by the meta-template (_recipe_base.tex.jinja).
 """
 
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
-import jsonschema
 import yaml
+from jsonschema.protocols import Validator
 
 from klartex.components import (
     ComponentSpec,
+    component_packages,
     extract_component_data,
     get_component,
 )
 from klartex.page_templates import load_page_template, read_page_template_source
+from klartex.schema_validation import compile_validator, validate
 
 # Path to the recipe format schema
 _SCHEMA_PATH = Path(__file__).resolve().parent / "schemas" / "recipe.schema.json"
 _recipe_schema: dict | None = None
+_recipe_validator: Validator | None = None
 
 
 def _get_recipe_schema() -> dict:
@@ -36,6 +40,14 @@ def _get_recipe_schema() -> dict:
     return _recipe_schema
 
 
+def _get_recipe_validator() -> Validator:
+    """Return the compiled validator for the recipe schema."""
+    global _recipe_validator
+    if _recipe_validator is None:
+        _recipe_validator = compile_validator(_get_recipe_schema())
+    return _recipe_validator
+
+
 @dataclass
 class RecipeComponent:
     """A component entry in a recipe."""
@@ -85,8 +97,7 @@ def load_recipe(path: Path) -> Recipe:
     raw = yaml.safe_load(path.read_text())
 
     # Validate against recipe schema
-    schema = _get_recipe_schema()
-    jsonschema.validate(raw, schema)
+    validate(_get_recipe_validator(), raw)
 
     # Parse template section
     tmpl = raw["template"]
@@ -133,18 +144,18 @@ def load_recipe(path: Path) -> Recipe:
 
 def prepare_recipe_context(
     recipe: Recipe,
-    data: dict,
+    data: Mapping,
     page_template_source: str | None = None,
 ) -> dict[str, Any]:
     """Build a template context dict for the Jinja meta-template.
 
     The context includes the recipe structure, resolved component data,
-    and page template settings. Data should already be escaped via
-    escape_data() before calling this function.
+    and page template settings. Data should already be wrapped by
+    escape_view() before calling this function.
 
     Args:
         recipe: Parsed recipe
-        data: Template data (already escaped for LaTeX)
+        data: Template data (an escaping view, see klartex/tex_escape.py)
 
     Returns:
         Context dict for rendering _recipe_base.tex.jinja
@@ -181,7 +192,7 @@ def prepare_recipe_context(
         # Build display value with optional suffix fields (e.g., time_start/time_end).
         # List-typed values (e.g. attendees, adjusters) are joined with ', ' so the
         # downstream description_list renderer can treat every value as a string.
-        if isinstance(value, list):
+        if isinstance(value, Sequence) and not isinstance(value, str):
             display_value = ", ".join(str(v) for v in value)
         elif value is not None:
             display_value = value
@@ -215,15 +226,11 @@ def prepare_recipe_context(
         })
 
     # Collect required .sty packages
-    sty_packages = []
-    seen = set()
-    for comp in recipe.components:
-        if comp.spec and comp.spec.sty_package and comp.spec.sty_package not in seen:
-            sty_packages.append(comp.spec.sty_package)
-            seen.add(comp.spec.sty_package)
+    sty_packages = component_packages(comp.type for comp in recipe.components)
 
     # Resolve page template
-    if page_template_source is not None:
+    external_page_template = page_template_source is not None
+    if external_page_template:
         page_tmpl = load_page_template("none")
     else:
         page_tmpl = load_page_template(rendered_page_template)
@@ -234,6 +241,7 @@ def prepare_recipe_context(
         "data": data,
         "title": rendered_title,
         "page_template_source": page_template_source,
+        "external_page_template": external_page_template,
         "metadata": resolved_metadata,
         "components": resolved_components,
         "sty_packages": sty_packages,
@@ -241,12 +249,12 @@ def prepare_recipe_context(
     }
 
 
-def _resolve_path(data: dict, path: str) -> Any:
+def _resolve_path(data: Mapping, path: str) -> Any:
     """Resolve a dot-notation path in a data dict."""
     parts = path.split(".")
     current = data
     for part in parts:
-        if isinstance(current, dict) and part in current:
+        if isinstance(current, Mapping) and part in current:
             current = current[part]
         else:
             return None
@@ -5,7 +5,10 @@ import json
 from dataclasses import dataclass, field
 from pathlib import Path
 
+from jsonschema.protocols import Validator
+
 from klartex.block_engine import BLOCK_ENGINE_TEMPLATE
+from klartex.schema_validation import compile_validator
 
 
 @dataclass
@@ -16,6 +19,7 @@ class TemplateInfo:
     recipe_path: Path | None = None
     is_block_engine: bool = False
     validation_schema: dict | None = None
+    _validator: Validator | None = field(default=None, init=False, repr=False, compare=False)
 
     def get_validation_schema(self) -> dict:
         """Return the schema used for runtime validation.
@@ -26,6 +30,13 @@ class TemplateInfo:
         """
         return self.validation_schema if self.validation_schema is not None else self.schema
 
+    def get_validator(self) -> Validator:
+        """Return the compiled validator for `get_validation_schema()`,
+        built on first use."""
+        if self._validator is None:
+            self._validator = compile_validator(self.get_validation_schema())
+        return self._validator
+
 
 # Path to block engine schema
 _SCHEMAS_DIR = Path(__file__).resolve().parent / "schemas"
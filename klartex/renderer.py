@@ -1,24 +1,59 @@
 """Core rendering pipeline: JSON data -> .tex -> PDF."""
 
+import hashlib
 import json
 import shutil
 import subprocess
 import tempfile
+from collections.abc import Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable, Iterator
 
 import jinja2
 import jsonschema
 
+from klartex.aux_store import aux_key, load_aux, may_use_store, store_aux
+from klartex.block_emitters import emit_block
+from klartex.fonts import apply_font_files
 from klartex.inline_markup import render_inline
+from klartex.instrument import BlockCost, parse_block_costs
+from klartex.limits import ResourceLimits
+from klartex.numformat import RunningTotals, format_amount
+from klartex.output_profiles import (
+    OutputProfile,
+    apply_output_profile,
+    get_output_profile,
+)
+from klartex.preview import Preview
+from klartex.progress import DEFAULT_STALL_TIMEOUT, PassWatcher, Progress, pass_budget
 from klartex.registry import discover_templates
-from klartex.tex_escape import escape_data
-from klartex.block_engine import BLOCK_ENGINE_TEMPLATE
+from klartex.schema_validation import block_validator, validate
+from klartex.tex_escape import escape_view
+from klartex.tex_format import ensure_format, split_preamble
+from klartex.tex_preflight import preflight_balance, preflight_tex
+from klartex.workdir_pool import get_pool as get_workdir_pool
+from klartex.workdir_pool import stage_workdir
+from klartex.texmf import tex_env
+from klartex.block_engine import (
+    BLOCK_ENGINE_TEMPLATE,
+    KNOWN_BLOCK_TYPES,
+    _child_block_lists,
+    block_overrides,
+)
+from klartex.engine_pool import get_pool as get_engine_pool
+from klartex.engines import get_engine, select_engine
 
 # Paths relative to this package
 _ROOT = Path(__file__).resolve().parent
 TEMPLATES_DIR = _ROOT / "templates"
 CLS_DIR = _ROOT / "cls"
 
+# Upper bound on xelatex passes per render. Compilation stops earlier as soon
+# as a pass leaves the .aux file unchanged.
+DEFAULT_MAX_PASSES = 3
+
 # Template registry (discovered at import time)
 _registry = None
 
@@ -73,9 +108,42 @@ def _inline_flat_filter(ctx, value):
     return render_inline(str(value), lang=ctx.get("lang", "sv"), newlines="space")
 
 
+@jinja2.pass_context
+def _emit_block_global(ctx, block, top_level=False):
+    """Jinja global: render a block with its native emitter
+    (klartex/block_emitters.py), handing nested blocks of other types back
+    to the template's ``render_block`` macro."""
+    return emit_block(
+        block,
+        top_level,
+        lang=ctx.get("lang", "sv"),
+        block_settings=ctx.get("block_settings"),
+        instrument=ctx.get("instrument", False),
+        long_table_rows=ctx["long_table_rows"],
+        fallback=ctx["render_block"],
+    )
+
+
 _jinja_env.filters["inline"] = _inline_filter
 _jinja_env.filters["inline_cell"] = _inline_cell_filter
 _jinja_env.filters["inline_flat"] = _inline_flat_filter
+_jinja_env.filters["amount"] = format_amount
+_jinja_env.globals["running_totals"] = RunningTotals
+_jinja_env.globals["emit_block"] = _emit_block_global
+
+
+@dataclass
+class RenderResult:
+    """A rendered PDF plus facts about how it was compiled."""
+
+    pdf: bytes
+    passes: int
+    # Engine that compiled the document (resolved when "auto" was asked for).
+    engine: str = "xelatex"
+    # Final .aux file, for callers that keep their own seed store.
+    aux: bytes | None = None
+    # Per-block costs by block path, for instrumented block-engine renders.
+    block_costs: dict[str, BlockCost] | None = None
 
 
 def render(
@@ -83,9 +151,41 @@ def render(
     data: dict,
     page_template_source: str | None = None,
     asset_dir: Path | str | None = None,
+    **options,
 ) -> bytes:
     """Render a template with data to PDF bytes.
 
+    Thin wrapper around `render_detailed` for callers that only need the PDF;
+    keyword `options` are passed through to it.
+    """
+    return render_detailed(
+        template_name,
+        data,
+        page_template_source=page_template_source,
+        asset_dir=asset_dir,
+        **options,
+    ).pdf
+
+
+def render_detailed(
+    template_name: str,
+    data: dict,
+    page_template_source: str | None = None,
+    asset_dir: Path | str | None = None,
+    max_passes: int = DEFAULT_MAX_PASSES,
+    aux: bytes | None = None,
+    aux_store: bool = False,
+    engine: str = "xelatex",
+    search_cwd: bool = True,
+    limits: ResourceLimits | None = None,
+    progress: Callable[[Progress], None] | None = None,
+    stall_timeout: float = DEFAULT_STALL_TIMEOUT,
+    output_profile: str = "default",
+    preview: Preview | None = None,
+    instrument: bool = False,
+) -> RenderResult:
+    """Render a template with data to a PDF and compile statistics.
+
     Args:
         template_name: Name of the template (e.g. "protokoll")
         data: Template data as a dict (validated against schema)
@@ -97,9 +197,45 @@ def render(
             against it. Searched between the bundled `cls/` and the caller's
             cwd. Useful when callers (e.g. a server) keep page-template
             bundles in a known location separate from the working directory.
+        max_passes: Upper bound on xelatex passes. Compilation stops as soon
+            as a pass leaves the .aux file unchanged.
+        aux: Optional .aux file from an earlier render of the same document
+            (e.g. ``RenderResult.aux``) to start xelatex from. Takes
+            precedence over the local store.
+        aux_store: Look up a seed in, and save the final .aux to, the local
+            store keyed by a hash of the request (see klartex/aux_store.py).
+            Ignored for documents with ``latex`` blocks or a
+            `page_template_source`.
+        engine: TeX engine: "xelatex", "pdflatex", "lualatex", or "auto" to
+            use pdflatex when the document needs neither fontspec nor
+            characters outside Latin-1 (see klartex/engines.py).
+        search_cwd: Search the caller's working directory for files. Servers
+            should pass False and keep assets in an `asset_dir`, ideally
+            registered with ``klartex.texmf.register_asset_dir``.
+        limits: Optional caps on memory, CPU time, output file size and
+            page count for the TeX processes (see klartex/limits.py).
+        progress: Optional callback, called with a `Progress` for every
+            page the engine ships out.
+        stall_timeout: Seconds a pass may go without printing anything
+            before it is killed. Each pass also has an overall budget that
+            grows with the document (see klartex/progress.py).
+        output_profile: PDF compression and version: "default", "archive"
+            (smallest files) or "preview" (fastest driver stage); see
+            klartex/output_profiles.py.
+        preview: Render a fast draft instead: one pass, draft graphics, no
+            hyperref, the "preview" output profile (unless another profile
+            is given) and optionally only some pages or blocks; see
+            klartex/preview.py.
+        instrument: For block-engine templates, mark every block and return
+            its elapsed TeX time and page span in
+            ``RenderResult.block_costs`` (see klartex/instrument.py).
 
     Returns:
-        PDF file contents as bytes
+        RenderResult with the PDF bytes, the number of passes run and the
+        final .aux file
+
+    Raises:
+        ResourceLimitExceeded: if compilation hit one of `limits`.
     """
     registry = get_registry()
 
@@ -108,66 +244,107 @@ def render(
         raise ValueError(f"Unknown template '{template_name}'. Available: {available}")
 
     template_info = registry[template_name]
+    if engine != "auto":
+        get_engine(engine)
+    get_output_profile(output_profile)
 
     # Validate data against schema (use validation_schema to avoid oneOf noise;
     # per-block validation below gives better error messages)
-    jsonschema.validate(data, template_info.get_validation_schema())
+    validate(template_info.get_validator(), data)
 
     # Validate block types and payloads before escaping (escaping mangles underscores)
+    latex_blocks: list[tuple[str, str]] = []
     if template_info.is_block_engine:
-        _validate_blocks(data.get("body", []), "body")
-
-    # Escape user data for LaTeX safety
-    escaped_data = escape_data(data)
+        _validate_blocks(data.get("body", []), "body", latex_blocks)
+        _check_latex_balance(latex_blocks)
+
+    if preview is not None:
+        if preview.blocks is not None:
+            if not template_info.is_block_engine:
+                raise ValueError("Preview block ranges need a block-engine template")
+            data = {**data, "body": preview.select_body(data["body"])}
+        max_passes = 1
+        if output_profile == "default":
+            output_profile = "preview"
+
+    # Seed the first pass with the aux file of an earlier render of the same
+    # request, so re-renders converge in one pass. Aux files are TeX, so
+    # documents that can write arbitrary TeX to theirs never use the store.
+    store_key = None
+    if aux_store and may_use_store(bool(latex_blocks), page_template_source):
+        options = [engine]
+        if preview is not None:
+            options.append(f"preview:{preview.pages}")
+        if instrument:
+            options.append("instrument")
+        store_key = aux_key(template_name, data, options)
+        if aux is None:
+            aux = load_aux(store_key)
+
+    # Check the page template's structure and fonts, and load the fonts by
+    # file (fails fast, see klartex/tex_preflight.py and klartex/fonts.py).
+    if page_template_source is not None:
+        problem = preflight_tex(page_template_source)
+        if problem:
+            raise ValueError(f"Invalid page template: {problem}")
+        page_template_source = apply_font_files(page_template_source)
 
     # Block engine path
     if template_info.is_block_engine:
-        # Walk nested block structures and restore unescaped block type strings
-        # (escaping turns "description_list" into "description\_list", which then
-        # fails to match the dispatch). Also restore raw source on latex blocks.
-        _restore_block_types(data.get("body", []), escaped_data["body"])
-        tex_source = _render_block_engine(escaped_data, page_template_source)
-        return _compile_tex(tex_source, asset_dir=asset_dir)
-
-    # Recipe path
-    tex_source = _render_recipe(template_info, escaped_data, page_template_source)
-    return _compile_tex(tex_source, asset_dir=asset_dir)
-
-
-def _child_block_lists(block: dict, path: str = "") -> list[tuple[str, list]]:
-    """Return the nested block carriers of `block` as (path, blocks) pairs.
+        # User data is escaped for LaTeX safety as the template reads it,
+        # except block types (escaping turns "description_list" into
+        # "description\_list", which then fails to match the dispatch) and
+        # the raw source of latex blocks.
+        escaped_data = escape_view(
+            data, block_overrides(data.get("body", []), paths=instrument)
+        )
+        tex_source = _render_block_engine(
+            escaped_data, page_template_source, preview, instrument
+        )
+    else:
+        # Recipe path
+        escaped_data = escape_view(data)
+        tex_source = _render_recipe(
+            template_info, escaped_data, page_template_source, preview
+        )
 
-    Single source of truth for which block types nest other blocks. Both
-    recursive validation and `_restore_block_types` walk these carriers, so
-    any new nesting block only needs to be added here.
-    """
-    btype = block.get("type")
-    if btype == "list":
-        return [
-            (f"{path}.items[{i}].content", item.get("content", []))
-            for i, item in enumerate(block.get("items", []))
-            if isinstance(item, dict)
-        ]
-    if btype == "columns":
-        return [
-            (f"{path}.items[{i}]", col)
-            for i, col in enumerate(block.get("items", []))
-            if isinstance(col, list)
-        ]
-    if btype == "clause":
-        return [(f"{path}.content", block.get("content", []))]
-    return []
-
-
-def _validate_blocks(blocks: list, path: str) -> None:
+    if engine == "auto":
+        engine = select_engine(tex_source)
+
+    result = _compile_tex(
+        tex_source,
+        asset_dir=asset_dir,
+        max_passes=max_passes,
+        seed_aux=aux,
+        engine=engine,
+        search_cwd=search_cwd,
+        limits=limits,
+        progress=progress,
+        stall_timeout=stall_timeout,
+        output_profile=output_profile,
+        instrument=instrument and template_info.is_block_engine,
+    )
+    if store_key is not None and result.aux is not None:
+        store_aux(store_key, result.aux)
+    return result
+
+
+def _validate_blocks(
+    blocks: list, path: str, latex_blocks: list[tuple[str, str]] | None = None
+) -> None:
     """Validate every block against its schema, recursing into nested carriers.
 
-    `path` locates the current block list in error messages, e.g.
-    ``body[2].content[0]`` or ``body[1].items[0][3]``.
-    """
-    from klartex.block_engine import KNOWN_BLOCK_TYPES
-    from klartex.components import get_component
+    A single pass over the block tree: each block is checked by the compiled
+    validator of its type (see klartex/schema_validation.py), nested blocks
+    only once, by their own type's validator. `path` locates the current
+    block list in error messages, e.g. ``body[2].content[0]`` or
+    ``body[1].items[0][3]``.
 
+    ``latex`` blocks are only checked for disallowed constructs here, since
+    a group or environment may span several of them; their (path, source)
+    pairs are appended to `latex_blocks`, in document order, for
+    `_check_latex_balance`.
+    """
     for i, block in enumerate(blocks):
         where = f"{path}[{i}]"
         if not isinstance(block, dict):
@@ -181,126 +358,302 @@ def _validate_blocks(blocks: list, path: str) -> None:
                 f"Unknown block type '{block_type}' at {where}. "
                 f"Available: {available}"
             )
-        spec = get_component(block_type)
-        block_schema = spec.get_block_schema()
-        if block_schema:
+        validator = block_validator(block_type)
+        if validator is not None:
             try:
-                jsonschema.validate(block, block_schema)
+                validate(validator, block)
             except jsonschema.ValidationError as e:
                 raise ValueError(
                     f"Invalid '{block_type}' block at {where}: {e.message}"
                 ) from e
+        if block_type == "latex":
+            source = block.get("source", "")
+            problem = preflight_tex(source, balance=False)
+            if problem:
+                raise ValueError(f"Invalid 'latex' block at {where}: {problem}")
+            if latex_blocks is not None:
+                latex_blocks.append((where, source))
         for child_path, child_blocks in _child_block_lists(block, where):
-            _validate_blocks(child_blocks, child_path)
+            _validate_blocks(child_blocks, child_path, latex_blocks)
 
 
-def _restore_block_types(orig_blocks: list, esc_blocks: list) -> None:
-    """Walk parallel block-arrays and copy unescaped `type` (and raw `latex.source`)
-    from the original onto the escape-mangled copy.
+def _check_latex_balance(latex_blocks: list[tuple[str, str]]) -> None:
+    """Check that the ``latex`` blocks of a document, read in order, leave
+    no brace or environment unbalanced.
 
-    Recurses into the nested block carriers listed by `_child_block_lists`.
+    Raises:
+        ValueError: naming the block the problem is in.
     """
-    for orig, esc in zip(orig_blocks, esc_blocks):
-        if not isinstance(orig, dict) or not isinstance(esc, dict):
-            continue
-        btype = orig.get("type")
-        if btype is None:
-            continue
-        esc["type"] = btype
-        if btype == "latex" and "source" in orig:
-            esc["source"] = orig["source"]
-        for (_, o_kids), (_, e_kids) in zip(
-            _child_block_lists(orig), _child_block_lists(esc)
-        ):
-            _restore_block_types(o_kids, e_kids)
+    unbalanced = preflight_balance([source for _, source in latex_blocks])
+    if unbalanced:
+        index, problem = unbalanced
+        raise ValueError(f"Invalid 'latex' block at {latex_blocks[index][0]}: {problem}")
 
 
 def _render_block_engine(
-    escaped_data: dict, page_template_source: str | None = None
+    escaped_data: Mapping,
+    page_template_source: str | None = None,
+    preview: Preview | None = None,
+    instrument: bool = False,
 ) -> str:
     """Render using the universal block engine path."""
     from klartex.block_engine import prepare_block_context
 
-    context = prepare_block_context(escaped_data, page_template_source)
+    context = prepare_block_context(escaped_data, page_template_source, instrument)
+    context["preview"] = preview
     template = _jinja_env.get_template("_block_engine.tex.jinja")
     return template.render(context)
 
 
 def _render_recipe(
-    template_info, escaped_data: dict, page_template_source: str | None = None
+    template_info,
+    escaped_data: Mapping,
+    page_template_source: str | None = None,
+    preview: Preview | None = None,
 ) -> str:
     """Render using the YAML recipe path."""
     from klartex.recipe import load_recipe, prepare_recipe_context
 
     recipe = load_recipe(template_info.recipe_path)
     context = prepare_recipe_context(recipe, escaped_data, page_template_source)
+    context["preview"] = preview
     template = _jinja_env.get_template("_recipe_base.tex.jinja")
     return template.render(context)
 
 
-def _compile_tex(tex_source: str, asset_dir: Path | str | None = None) -> bytes:
-    """Compile LaTeX source to PDF bytes."""
-    if not shutil.which("xelatex"):
+def _file_digest(path: Path) -> str | None:
+    """SHA-256 of a file's contents, or None if it does not exist."""
+    if not path.exists():
+        return None
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+@contextmanager
+def _job_dir(
+    asset_dir: Path | str | None, fmt_dir: Path | None, search_cwd: bool
+) -> Iterator[tuple[Path, dict[str, str]]]:
+    """Yield a staged working directory and the environment for a compile.
+
+    Leases from the workdir pool when workdir_pool.start() was called,
+    otherwise stages a fresh temporary directory.
+    """
+    pool = get_workdir_pool()
+    if pool is not None:
+        with pool.lease() as path:
+            yield path, pool.env(asset_dir, fmt_dir, search_cwd)
+        return
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        stage_workdir(tmp)
+        yield tmp, tex_env(asset_dir, fmt_dir, search_cwd)
+
+
+def _compile_tex(
+    tex_source: str,
+    asset_dir: Path | str | None = None,
+    max_passes: int = DEFAULT_MAX_PASSES,
+    seed_aux: bytes | None = None,
+    engine: str = "xelatex",
+    search_cwd: bool = True,
+    limits: ResourceLimits | None = None,
+    progress: Callable[[Progress], None] | None = None,
+    stall_timeout: float = DEFAULT_STALL_TIMEOUT,
+    output_profile: str = "default",
+    instrument: bool = False,
+) -> RenderResult:
+    """Compile LaTeX source to PDF bytes.
+
+    Runs `engine` until the .aux file stops changing between passes
+    (LastPage, equal-height box groups and other cross-references have
+    settled), at most `max_passes` times. `seed_aux` is placed as
+    ``document.aux`` before the first pass; if the first pass reproduces it,
+    one pass is enough. `search_cwd` puts the caller's working directory on
+    TEXINPUTS (see klartex/texmf.py). `limits` caps every child process.
+
+    Passes stream their output: `progress` is called per page shipped out,
+    and a pass is killed after `stall_timeout` seconds of silence or when it
+    runs over a budget scaled by source size and page count.
+    `output_profile` sets PDF compression and version. With `instrument`,
+    block cost markers are read back from the final pass's log.
+    """
+    if max_passes < 1:
+        raise ValueError(f"max_passes must be at least 1, got {max_passes}")
+    backend = get_engine(engine)
+    profile = get_output_profile(output_profile)
+    limits = limits or ResourceLimits()
+    if not shutil.which(backend.name):
         raise RuntimeError(
-            "xelatex not found. Install TeX Live:\n"
+            f"{backend.name} not found. Install TeX Live:\n"
             "  macOS:  brew install --cask mactex\n"
-            "  Ubuntu: apt install texlive-xetex"
+            f"  Ubuntu: {backend.install_hint}"
         )
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmp = Path(tmpdir)
+    # Engines that write the PDF themselves get the profile's settings in the
+    # document, after the preamble a format is dumped from.
+    tex_source = apply_output_profile(tex_source, backend, profile)
+
+    # Start from a precompiled format of the preamble when the source marks
+    # one (see klartex/tex_format.py).
+    fmt_args = []
+    fmt_dir = None
+    preamble = split_preamble(tex_source)
+    fmt = None
+    if preamble is not None and backend.supports_formats:
+        fmt = ensure_format(preamble, backend.name)
+    if fmt is not None:
+        fmt_dir, fmt_name = fmt
+        fmt_args = [f"-fmt={fmt_name}"]
+
+    with _job_dir(asset_dir, fmt_dir, search_cwd) as (tmp, env):
+        tmpdir = str(tmp)
 
         # Write .tex source
         tex_path = tmp / "document.tex"
         tex_path.write_text(tex_source, encoding="utf-8")
 
-        # Symlink entire cls/ directory so xelatex can find .cls and .sty files
-        (tmp / "cls").symlink_to(CLS_DIR)
-        # Also symlink klartex-base.cls at top level for \documentclass{klartex-base}
-        (tmp / "klartex-base.cls").symlink_to(CLS_DIR / "klartex-base.cls")
-
-        # Build environment with cls/, optional asset_dir, and caller's cwd
-        # on TEXINPUTS. asset_dir slots in after the bundled cls/ so server
-        # callers can resolve page-template bundles without chdir.
-        import os
-
-        env = os.environ.copy()
-        existing_texinputs = env.get("TEXINPUTS", "")
-        cwd = os.getcwd()
-        asset_part = f"{asset_dir}:" if asset_dir is not None else ""
-        env["TEXINPUTS"] = f".:{CLS_DIR}:{asset_part}{cwd}:{existing_texinputs}"
-
-        # Run xelatex twice (for page references).
+        # Run the engine until the .aux settles (for page references). The
+        # aux is read at \begin{document} and rewritten at the end, so a pass
+        # whose aux matches the previous one typeset against final values.
+        # xelatex passes stop at XDV (-no-pdf); which pass is the last is
+        # only known afterwards, so the driver stage runs once, below.
         # -no-shell-escape disables \write18 and shell command execution from
         # within the .tex source — important when callers (e.g. klartex.se)
         # render user-supplied page templates that could otherwise execute
         # arbitrary shell commands during compilation.
-        for _ in range(2):
-            try:
-                result = subprocess.run(
-                    [
-                        "xelatex",
-                        "-interaction=nonstopmode",
-                        "-halt-on-error",
-                        "-no-shell-escape",
-                        "document.tex",
-                    ],
+        aux_path = tmp / "document.aux"
+        if seed_aux is not None:
+            aux_path.write_bytes(seed_aux)
+        aux_digest = _file_digest(aux_path)
+        engine_args = [*backend.pass_args(), *fmt_args]
+        # Passes go to a warm process when engine_pool.start() was called and
+        # one is idle for this command line; otherwise they run cold.
+        pool = get_engine_pool()
+        source_size = len(tex_source.encode("utf-8"))
+        passes = 0
+        pages = 0
+        while True:
+
+            def on_page(n: int, pass_number: int = passes + 1) -> None:
+                limits.check_page_count(backend.name, n)
+                if progress is not None:
+                    progress(Progress(backend.name, pass_number, n))
+
+            watcher = PassWatcher(
+                backend.name,
+                stall_timeout=stall_timeout,
+                budget=pass_budget(source_size, pages),
+                on_page=on_page,
+            )
+            result = None
+            if pool is not None:
+                result = pool.run_pass(engine_args, env, tmp, watcher, limits=limits)
+            if result is None:
+                result = _run_pass(
+                    limits.command([*engine_args, "document.tex"]),
                     cwd=tmpdir,
-                    capture_output=True,
-                    timeout=60,
                     env=env,
+                    watcher=watcher,
                 )
-            except subprocess.TimeoutExpired as e:
-                raise RuntimeError(
-                    f"xelatex timed out after {e.timeout:.0f}s"
-                ) from e
+            pages = watcher.pages
+            output = result.stdout.decode(errors="replace")
+            limits.check_exit(
+                backend.name,
+                result.returncode,
+                output + result.stderr.decode(errors="replace"),
+                watcher.cpu_seconds,
+            )
             if result.returncode != 0:
                 raise RuntimeError(
-                    f"xelatex failed (exit {result.returncode}):\n"
-                    f"{result.stdout.decode(errors='replace')[-2000:]}"
+                    f"{backend.name} failed (exit {result.returncode}):\n"
+                    f"{output[-2000:]}"
                 )
+            limits.check_pages(backend.name, output)
+            passes += 1
+            new_digest = _file_digest(aux_path)
+            if new_digest == aux_digest or passes >= max_passes:
+                break
+            aux_digest = new_digest
 
         pdf_path = tmp / "document.pdf"
-        if not pdf_path.exists():
-            raise RuntimeError("xelatex did not produce a PDF")
+        if backend.produces_xdv:
+            _run_driver(tmp, env, limits, pass_budget(source_size, pages), profile)
+        elif not pdf_path.exists():
+            raise RuntimeError(f"{backend.name} did not produce a PDF")
+
+        block_costs = None
+        if instrument:
+            log_path = tmp / "document.log"
+            log = ""
+            if log_path.exists():
+                log = log_path.read_text(encoding="utf-8", errors="replace")
+            block_costs = parse_block_costs(log)
+
+        return RenderResult(
+            pdf=pdf_path.read_bytes(),
+            passes=passes,
+            aux=aux_path.read_bytes() if aux_path.exists() else None,
+            engine=backend.name,
+            block_costs=block_costs,
+        )
 
-        return pdf_path.read_bytes()
+
+def _run_pass(
+    cmd: list[str],
+    cwd: str,
+    env: dict[str, str],
+    watcher: PassWatcher,
+) -> subprocess.CompletedProcess:
+    """Run one cold pass under `watcher`; stderr is merged into stdout."""
+    proc = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    with proc:
+        stdout = watcher.run(proc)
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout=stdout, stderr=b"")
+
+
+def _run_driver(
+    tmp: Path,
+    env: dict[str, str],
+    limits: ResourceLimits,
+    timeout: float,
+    profile: OutputProfile = get_output_profile("default"),
+) -> None:
+    """Convert ``document.xdv`` in `tmp` to ``document.pdf`` with xdvipdfmx."""
+    if not (tmp / "document.xdv").exists():
+        raise RuntimeError("xelatex did not produce an XDV file")
+
+    # Driver stage: font subsetting, image embedding, PDF writing. Same
+    # flags xelatex passes to xdvipdfmx when it drives it itself, plus the
+    # output profile's.
+    try:
+        result = subprocess.run(
+            limits.command([
+                "xdvipdfmx", "-q", "-E", *profile.driver_args(),
+                "-o", "document.pdf", "document.xdv",
+            ]),
+            cwd=tmp,
+            capture_output=True,
+            timeout=timeout,
+            env=env,
+        )
+    except subprocess.TimeoutExpired as e:
+        raise RuntimeError(
+            f"xdvipdfmx timed out after {e.timeout:.0f}s"
+        ) from e
+    limits.check_exit(
+        "xdvipdfmx",
+        result.returncode,
+        (result.stdout + result.stderr).decode(errors="replace"),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"xdvipdfmx failed (exit {result.returncode}):\n"
+            f"{result.stderr.decode(errors='replace')[-2000:]}"
+        )
+    if not (tmp / "document.pdf").exists():
+        raise RuntimeError("xdvipdfmx did not produce a PDF")
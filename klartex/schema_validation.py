@@ -0,0 +1,83 @@
+"""Compiled JSON Schema validators, built once per schema.
+
+`jsonschema.validate` picks a validator class from the schema's
+``$schema``, checks the schema against its metaschema and builds a new
+validator on every call, and block schemas used to be re-read from disk
+for every block. A render now validates with validators compiled once:
+
+- block schemas are loaded once per file (`load_block_schema`) and their
+  validators kept in a registry keyed by block type and draft
+  (`block_validator`);
+- template and recipe schemas compile theirs on first use
+  (`compile_validator`).
+
+`validate` raises the same `jsonschema.ValidationError` (the best match)
+that `jsonschema.validate` would.
+"""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import jsonschema
+from jsonschema.protocols import Validator
+from jsonschema.validators import validator_for
+
+# Path to block schema files
+_SCHEMAS_DIR = Path(__file__).resolve().parent / "schemas" / "blocks"
+
+# (block type, draft) -> compiled validator, or None for blocks without a
+# schema.
+_block_validators: dict[tuple[str, str], Validator | None] = {}
+
+
+@lru_cache(maxsize=None)
+def load_block_schema(filename: str) -> dict | None:
+    """Load the block schema `filename`, or None if it does not exist.
+
+    The schema is shared between callers and must not be modified.
+    """
+    path = _SCHEMAS_DIR / filename
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def compile_validator(schema: dict) -> Validator:
+    """Check `schema` against its draft's metaschema and return a validator.
+
+    Raises:
+        jsonschema.SchemaError: if `schema` itself is invalid.
+    """
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+def block_validator(block_type: str) -> Validator | None:
+    """Return the compiled validator for `block_type`, or None if the block
+    has no schema.
+
+    Raises:
+        ValueError: if `block_type` is not a registered component.
+    """
+    from klartex.components import get_component
+
+    spec = get_component(block_type)
+    schema = spec.get_block_schema()
+    draft = validator_for(schema).__name__ if schema else ""
+    key = (block_type, draft)
+    if key not in _block_validators:
+        _block_validators[key] = compile_validator(schema) if schema else None
+    return _block_validators[key]
+
+
+def validate(validator: Validator, instance) -> None:
+    """Validate `instance`, raising like `jsonschema.validate`.
+
+    Raises:
+        jsonschema.ValidationError: the best-matching error, if any.
+    """
+    error = jsonschema.exceptions.best_match(validator.iter_errors(instance))
+    if error is not None:
+        raise error
@@ -0,0 +1,232 @@
+"""Column widths of table blocks, estimated from their content.
+
+A table block used to mark every column without an explicit width as a
+tabularx ``X`` column, and tabularx typesets the whole table several times
+to share out the width. `table_colspec` instead estimates each column's
+natural width in Python — from the cell text and Computer Modern / Latin
+Modern character widths — and emits fixed ``p{}`` columns, so TeX sets the
+table once. Widths are emitted as shares of what the fixed columns leave of
+``\\linewidth``, so the table still spans the line exactly under any page
+template; the estimate only decides how that width is divided.
+
+Columns are given their natural width when everything fits; otherwise
+narrow columns keep theirs and the wide ones share the rest in proportion to
+their natural width, never below their longest word when that can be
+avoided.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+# Width of the text block under klartex-base's geometry: A4 less 3 cm
+# margins, in pt.
+TEXT_WIDTH_PT = 426.79
+
+# \tabcolsep inside table blocks (see klartex/block_emitters.py), in pt.
+_TABCOLSEP_PT = 4.0
+
+_FONT_SIZES_PT = {"normal": 10.0, "small": 9.0, "footnotesize": 8.0}
+
+# Advance widths of cmr10 / lmr10 in em.
+_CHAR_WIDTHS = {
+    **dict(zip("abcdefghijklmnopqrstuvwxyz", (
+        0.5, 0.5556, 0.4444, 0.5556, 0.4444, 0.3056, 0.5, 0.5556, 0.2778,
+        0.3056, 0.5278, 0.2778, 0.8333, 0.5556, 0.5, 0.5556, 0.5278, 0.3917,
+        0.3944, 0.3889, 0.5556, 0.5278, 0.7222, 0.5278, 0.5278, 0.4444,
+    ))),
+    **dict(zip("ABCDEFGHIJKLMNOPQRSTUVWXYZ", (
+        0.75, 0.7083, 0.7222, 0.7639, 0.6806, 0.6528, 0.7847, 0.75, 0.3611,
+        0.5139, 0.7778, 0.625, 0.9167, 0.75, 0.7778, 0.6806, 0.7778, 0.7361,
+        0.5556, 0.7222, 0.75, 0.75, 1.0278, 0.75, 0.75, 0.6111,
+    ))),
+    **dict.fromkeys("0123456789", 0.5),
+    " ": 0.3333, ".": 0.2778, ",": 0.2778, ":": 0.2778, ";": 0.2778,
+    "!": 0.2778, "?": 0.4722, "'": 0.2778, '"': 0.5, "(": 0.3889,
+    ")": 0.3889, "[": 0.2778, "]": 0.2778, "-": 0.3333, "–": 0.5,
+    "—": 1.0, "/": 0.5, "%": 0.8333, "&": 0.7778, "+": 0.7778,
+    "=": 0.7778, "*": 0.5, "@": 0.7778, "#": 0.8333, "$": 0.5,
+}
+_DEFAULT_WIDTH = 0.5
+# cmbx10 runs about 15% wider than cmr10.
+_BOLD_FACTOR = 1.15
+# Slack per cell so estimates on the short side do not force a wrap.
+_PADDING_EM = 0.5
+
+# What tex_escape produced, back to the characters TeX prints.
+_ESCAPES_RE = re.compile(r"\\text(?:backslash|asciitilde|asciicircum)\{\}|\\([{}$#%&_])")
+_ESCAPED_WORDS = {"\\textbackslash{}": "\\", "\\textasciitilde{}": "~", "\\textasciicircum{}": "^"}
+# Inline markup markers (klartex/inline_markup.py) take no width.
+_MARKUP_RE = re.compile(r"\*\*|(?<!\\)\*|`")
+
+_UNIT_PT = {"pt": 1.0, "mm": 2.84528, "cm": 28.4528, "in": 72.27, "bp": 1.00375}
+_DIMEN_RE = re.compile(r"^\s*(\d+(?:\.\d*)?|\.\d+)\s*(pt|mm|cm|in|bp|em)\s*$")
+
+
+@lru_cache(maxsize=65536)
+def text_width_em(text: str, bold: bool = False) -> tuple[float, float]:
+    """Return the estimated (natural, longest word) width of escaped cell
+    `text` in em. Lines split on ``\\n`` are measured separately."""
+    text = _ESCAPES_RE.sub(lambda m: m.group(1) or _ESCAPED_WORDS[m.group(0)], text)
+    text = _MARKUP_RE.sub("", text)
+    natural = word = 0.0
+    for line in text.split("\n"):
+        width = 0.0
+        for part in line.split(" "):
+            part_width = sum(_char_width(c) for c in part)
+            word = max(word, part_width)
+            width += part_width
+        width += _CHAR_WIDTHS[" "] * line.count(" ")
+        natural = max(natural, width)
+    factor = _BOLD_FACTOR if bold else 1.0
+    return natural * factor, word * factor
+
+
+def _char_width(char: str) -> float:
+    width = _CHAR_WIDTHS.get(char)
+    if width is None:
+        # Accented letters (å, ä, ö, é...) are as wide as their base letter.
+        base = unicodedata.normalize("NFD", char)[:1]
+        width = _CHAR_WIDTHS.get(base, _DEFAULT_WIDTH)
+    return width
+
+
+def fixed_width_pt(width: str, size_pt: float) -> float | None:
+    """Return a fixed column width such as ``3.4cm`` in pt, or None if it is
+    not a plain dimension."""
+    m = _DIMEN_RE.match(width)
+    if m is None:
+        return None
+    value, unit = float(m.group(1)), m.group(2)
+    return value * (size_pt if unit == "em" else _UNIT_PT[unit])
+
+
+def column_shares(
+    header: list[str],
+    rows: list[list[str]],
+    fill_columns: list[int],
+    available_pt: float,
+    size_pt: float,
+) -> list[float]:
+    """Return the share of `available_pt` each column in `fill_columns` gets,
+    summing to 1."""
+    # Column index -> [natural, longest word] in em; one pass over the rows,
+    # each cell read once.
+    em = {
+        i: list(text_width_em(header[i], True)) if i < len(header) else [0.0, 0.0]
+        for i in fill_columns
+    }
+    for row in rows:
+        for i, cell in enumerate(row):
+            if cell and i in em:
+                cell_nat, cell_word = text_width_em(cell)
+                widths = em[i]
+                widths[0] = max(widths[0], cell_nat)
+                widths[1] = max(widths[1], cell_word)
+    natural = [(em[i][0] + _PADDING_EM) * size_pt for i in fill_columns]
+    minimum = [(em[i][1] + _PADDING_EM) * size_pt for i in fill_columns]
+    widths = _distribute(natural, minimum, available_pt)
+    total = sum(widths)
+    return [w / total for w in widths]
+
+
+def _distribute(natural: list[float], minimum: list[float], available: float) -> list[float]:
+    if sum(natural) <= available:
+        # Everything fits: stretch in proportion, as the table spans the line.
+        return natural
+    widths = list(natural)
+    capped = set()
+    while True:
+        # Columns narrower than an equal share of what is left keep their
+        # natural width; the rest share the remainder by natural width.
+        free = [i for i in range(len(widths)) if i not in capped]
+        left = available - sum(widths[i] for i in capped)
+        if not free or left <= 0:
+            return widths
+        share = left / len(free)
+        narrow = [i for i in free if natural[i] <= share]
+        if narrow:
+            capped.update(narrow)
+            continue
+        wide_total = sum(natural[i] for i in free)
+        for i in free:
+            widths[i] = left * natural[i] / wide_total
+        # Lift columns squeezed below their longest word, if the others can
+        # give way.
+        short = [i for i in free if widths[i] < minimum[i]]
+        if not short or sum(minimum[i] for i in free) > left:
+            return widths
+        for i in short:
+            widths[i] = minimum[i]
+            natural[i] = minimum[i]
+        capped.update(short)
+
+
+def table_colspec(
+    header: list[str],
+    rows: list[list[str]],
+    columns: list[dict] | None,
+    size: str = "small",
+    long: bool = False,
+    fit: str = "content",
+) -> str:
+    """Return the column specification (without the outer ``@{}``) of a
+    table block.
+
+    Args:
+        header, rows, columns, size: The block's fields (escaped).
+        long: The table is a longtable, which has no ``X`` columns.
+        fit: ``content`` sizes fill columns from their content; ``tabularx``
+            leaves them to tabularx (``X``), or gives them equal shares in a
+            longtable.
+    """
+    ncols = len(header)
+    size_pt = _FONT_SIZES_PT.get(size, _FONT_SIZES_PT["small"])
+    cols = [
+        (columns[i] if columns and i < len(columns) and columns[i] else {})
+        for i in range(ncols)
+    ]
+    fixed = []
+    fill = []
+    fixed_pt = 0.0
+    for i, col in enumerate(cols):
+        width = col.get("width", "fill")
+        if width == "fill":
+            fill.append(i)
+        else:
+            fixed.append(width)
+            fixed_pt += fixed_width_pt(width, size_pt) or 0.0
+    remaining = "\\linewidth" + "".join(f"-{w}" for w in fixed)
+    remaining += f"-{2 * (ncols - 1)}\\tabcolsep"
+
+    if fit == "tabularx" and not long:
+        shares = None
+    elif fit == "tabularx" or not fill:
+        shares = [1 / len(fill)] * len(fill) if fill else []
+    else:
+        available = TEXT_WIDTH_PT - fixed_pt - 2 * (ncols - 1) * _TABCOLSEP_PT
+        shares = column_shares(header, rows, fill, max(available, 1.0), size_pt)
+
+    spec = []
+    fill_index = 0
+    for col in cols:
+        align = _ALIGN_PREFIX.get(col.get("align", "left"), _ALIGN_PREFIX["left"])
+        width = col.get("width", "fill")
+        if width != "fill":
+            spec.append(f"{align}p{{{width}}}")
+        elif shares is None:
+            spec.append(f"{align}X")
+        else:
+            # Rounded down so the columns never add up to more than the line,
+            # and in fixed point: a TeX factor cannot have an exponent.
+            share = int(shares[fill_index] * 10000) / 10000
+            spec.append(f"{align}p{{{share:.4f}\\dimexpr({remaining})\\relax}}")
+            fill_index += 1
+    return "".join(spec)
+
+
+_ALIGN_PREFIX = {
+    "left": ">{\\raggedright\\arraybackslash}",
+    "right": ">{\\raggedleft\\arraybackslash}",
+    "center": ">{\\centering\\arraybackslash}",
+}
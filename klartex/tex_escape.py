@@ -1,4 +1,14 @@
-"""Escape user-provided strings for safe LaTeX rendering."""
+"""Escape user-provided strings for safe LaTeX rendering.
+
+`escape_view` is what renders use: a read-only view of the payload whose
+strings are escaped as they are read, so templates see escaped values
+without the payload ever being copied. `escape_data` builds an escaped copy
+instead.
+"""
+
+import re
+from collections.abc import Mapping, Sequence
+from typing import Any
 
 _REPLACEMENTS = {
     "\\": r"\textbackslash{}",
@@ -14,16 +24,21 @@ _REPLACEMENTS = {
 }
 
 
+# Splitting on a capturing class scans each string once and leaves the
+# specials at the odd indices, so the braces a replacement introduces are
+# never escaped again. (str.translate does the same in one pass, but falls
+# back to a dict lookup per character as soon as a string has non-ASCII
+# characters, which Swedish text nearly always has.)
+_SPECIALS_RE = re.compile("([" + re.escape("".join(_REPLACEMENTS)) + "])")
+
+
 def tex_escape(value: str) -> str:
     """Escape LaTeX special characters in a string."""
-    # Process backslash first to avoid double-escaping
-    result = value.replace("\\", "\x00BACKSLASH\x00")
-    for char, escaped in _REPLACEMENTS.items():
-        if char == "\\":
-            continue
-        result = result.replace(char, escaped)
-    result = result.replace("\x00BACKSLASH\x00", r"\textbackslash{}")
-    return result
+    parts = _SPECIALS_RE.split(value)
+    if len(parts) == 1:
+        return value
+    parts[1::2] = [_REPLACEMENTS[char] for char in parts[1::2]]
+    return "".join(parts)
 
 
 def escape_data(data: dict | list | str | int | float | bool | None) -> dict | list | str | int | float | bool | None:
@@ -35,3 +50,113 @@ def escape_data(data: dict | list | str | int | float | bool | None) -> dict | l
     if isinstance(data, list):
         return [escape_data(v) for v in data]
     return data
+
+
+def escape_view(value: Any, overrides: dict[int, dict[str, Any]] | None = None) -> Any:
+    """Return `value` with its strings escaped on access.
+
+    Strings are escaped right away, dicts and lists wrapped in read-only
+    views that escape what is read from them, and anything else is returned
+    as is. `overrides` maps the ``id()`` of dicts in `value` to entries that
+    replace (or add to) their items, unescaped — e.g. the block engine's
+    ``type`` keys, which dispatch on the raw name.
+    """
+    if isinstance(value, str):
+        return tex_escape(value)
+    if isinstance(value, dict):
+        return EscapedMapping(value, overrides)
+    if isinstance(value, list):
+        return EscapedSequence(value, overrides)
+    return value
+
+
+class EscapedMapping(Mapping):
+    """Read-only view of a dict; see `escape_view`.
+
+    Values are escaped once per view and kept for its lifetime, so a
+    template reading ``block.text`` twice escapes it once, and a block's
+    escaped values are freed with the block's view.
+    """
+
+    __slots__ = ("_data", "_overrides", "_extra", "_values")
+
+    def __init__(self, data: dict, overrides: dict[int, dict[str, Any]] | None = None):
+        self._data = data
+        self._overrides = overrides
+        self._extra = overrides.get(id(data)) if overrides else None
+        self._values = dict(self._extra) if self._extra else {}
+
+    def __getitem__(self, key):
+        values = self._values
+        if key in values:
+            return values[key]
+        value = self._data[key]
+        # Most values read are strings; skip the general dispatch for them.
+        if type(value) is str:
+            value = tex_escape(value)
+        else:
+            value = escape_view(value, self._overrides)
+        values[key] = value
+        return value
+
+    def get(self, key, default=None):
+        if key in self._values:
+            return self._values[key]
+        if key not in self._data:
+            return default
+        return self[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._data or bool(self._extra and key in self._extra)
+
+    def __iter__(self):
+        yield from self._data
+        if self._extra:
+            yield from (key for key in self._extra if key not in self._data)
+
+    def __len__(self) -> int:
+        if not self._extra:
+            return len(self._data)
+        return len(self._data) + sum(1 for key in self._extra if key not in self._data)
+
+    def __repr__(self) -> str:
+        return f"EscapedMapping({self._data!r})"
+
+
+class EscapedSequence(Sequence):
+    """Read-only view of a list; see `escape_view`."""
+
+    __slots__ = ("_data", "_overrides")
+
+    def __init__(self, data: list, overrides: dict[int, dict[str, Any]] | None = None):
+        self._data = data
+        self._overrides = overrides
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return EscapedSequence(self._data[index], self._overrides)
+        value = self._data[index]
+        if type(value) is str:
+            return tex_escape(value)
+        return escape_view(value, self._overrides)
+
+    def __iter__(self):
+        overrides = self._overrides
+        for value in self._data:
+            if type(value) is str:
+                yield tex_escape(value)
+            else:
+                yield escape_view(value, overrides)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"EscapedSequence({self._data!r})"
@@ -0,0 +1,172 @@
+"""Precompiled XeLaTeX formats for the klartex preamble.
+
+Loading ``klartex-base.cls`` — fontspec, hyperref, geometry and friends —
+plus the component packages a document uses is most of the wall-clock time
+of a one-page document. We dump the preamble into a format file
+(mylatexformat) once and start xelatex from that format on every later pass.
+
+Both meta-templates end the dumpable part of the preamble with
+``FORMAT_MARKER``. Everything before it is the class, the component packages
+and, for built-in page templates, the page template source; caller-supplied
+page templates are emitted after the marker so they never produce a format
+of their own. With the format loaded, mylatexformat skips the document up to
+the marker; without it the marker is a harmless ``\\relax``.
+
+Formats are keyed by the TeX engine version, a hash of the ``cls/`` contents
+and the preamble text, and stored under ``cache_dir("formats")``. A format
+that fails to build is remembered for the lifetime of the process and the
+document compiles without one.
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+from klartex.cache import cache_dir
+
+_CLS_DIR = Path(__file__).resolve().parent / "cls"
+
+# End of the dumpable preamble. \csname...\endcsname expands to \relax when
+# the document is compiled without a format.
+FORMAT_MARKER = r"\csname endofdump\endcsname"
+
+_tex_versions: dict[str, str | None] = {}
+_cls_digest: str | None = None
+# Format names whose build failed in this process — not retried.
+_failed: set[str] = set()
+
+
+def tex_version(engine: str = "xelatex") -> str | None:
+    """Return the first line of ``<engine> --version`` (cached), or None."""
+    if engine not in _tex_versions:
+        version = None
+        if shutil.which(engine):
+            try:
+                result = subprocess.run(
+                    [engine, "--version"], capture_output=True, timeout=30
+                )
+                lines = result.stdout.decode(errors="replace").splitlines()
+                version = lines[0].strip() if lines else None
+            except (OSError, subprocess.TimeoutExpired):
+                version = None
+        _tex_versions[engine] = version
+    return _tex_versions[engine]
+
+
+def cls_digest() -> str:
+    """Return a SHA-256 over the names and contents of the ``cls/`` files."""
+    global _cls_digest
+    if _cls_digest is None:
+        h = hashlib.sha256()
+        for path in sorted(_CLS_DIR.iterdir()):
+            if path.is_file():
+                h.update(path.name.encode())
+                h.update(b"\0")
+                h.update(path.read_bytes())
+                h.update(b"\0")
+        _cls_digest = h.hexdigest()
+    return _cls_digest
+
+
+def split_preamble(tex_source: str) -> str | None:
+    """Return the dumpable preamble of `tex_source`, or None if unmarked."""
+    preamble, marker, _ = tex_source.partition(FORMAT_MARKER)
+    if not marker:
+        return None
+    return preamble
+
+
+def format_name(preamble: str, engine: str = "xelatex") -> str:
+    """Return the cache key for a preamble, e.g. ``klartex-3f2a9c...``."""
+    h = hashlib.sha256()
+    for part in (engine, tex_version(engine) or "", cls_digest(), preamble):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return f"klartex-{h.hexdigest()[:20]}"
+
+
+def ensure_format(preamble: str, engine: str = "xelatex") -> tuple[Path, str] | None:
+    """Return ``(directory, name)`` of a format for `preamble`, building it
+    on first use. Returns None when the format cannot be built.
+    """
+    if os.environ.get("KLARTEX_NO_FORMATS"):
+        return None
+    if tex_version(engine) is None:
+        return None
+    name = format_name(preamble, engine)
+    if name in _failed:
+        return None
+    fmt_dir = cache_dir("formats")
+    if (fmt_dir / f"{name}.fmt").exists():
+        return fmt_dir, name
+    if _build_format(preamble, name, fmt_dir, engine):
+        return fmt_dir, name
+    _failed.add(name)
+    return None
+
+
+def _build_format(preamble: str, name: str, fmt_dir: Path, engine: str) -> bool:
+    """Dump `preamble` into ``fmt_dir/<name>.fmt``. Returns success."""
+    # Build next to the destination so the final move is an atomic rename.
+    # Concurrent builders of the same format race harmlessly: last one wins.
+    with tempfile.TemporaryDirectory(dir=fmt_dir) as tmpdir:
+        tmp = Path(tmpdir)
+        (tmp / "preamble.tex").write_text(
+            f"{preamble}{FORMAT_MARKER}\n", encoding="utf-8"
+        )
+        env = os.environ.copy()
+        env["TEXINPUTS"] = f".:{_CLS_DIR}:{env.get('TEXINPUTS', '')}"
+        try:
+            result = subprocess.run(
+                [
+                    engine,
+                    "-ini",
+                    f"-jobname={name}",
+                    "-interaction=nonstopmode",
+                    "-halt-on-error",
+                    "-no-shell-escape",
+                    f"&{engine}",
+                    "mylatexformat.ltx",
+                    "preamble.tex",
+                ],
+                cwd=tmpdir,
+                capture_output=True,
+                timeout=120,
+                env=env,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        built = tmp / f"{name}.fmt"
+        if result.returncode != 0 or not built.exists():
+            return False
+        os.replace(built, fmt_dir / f"{name}.fmt")
+    return True
+
+
+def warm_formats(engine: str = "xelatex") -> list[str]:
+    """Build `engine`'s formats for the bare class and every built-in page
+    template.
+
+    Returns the names of the formats that are available afterwards. Meant for
+    deployment images and server start-up, so the first render of each
+    page template does not pay for the dump.
+    """
+    from klartex.page_templates import list_page_templates
+    from klartex.renderer import _render_block_engine
+
+    tex_sources = [
+        _render_block_engine({"page_template": pt["name"], "body": []})
+        for pt in list_page_templates()
+    ]
+    # Caller-supplied page templates land after the marker, so they all
+    # share the bare-class preamble.
+    tex_sources.append(_render_block_engine({"body": []}, page_template_source=""))
+    names = []
+    for tex_source in tex_sources:
+        preamble = split_preamble(tex_source)
+        if preamble is not None and ensure_format(preamble, engine) is not None:
+            names.append(format_name(preamble, engine))
+    return sorted(set(names))
@@ -0,0 +1,213 @@
+"""Cheap structural checks for raw LaTeX before it reaches the engine.
+
+``latex`` blocks and custom page templates are injected verbatim, so an
+unbalanced brace or a stray ``\\end{document}`` only surfaced after a full
+xelatex run had failed. `preflight_tex` tokenizes the source once and
+reports the first obviously broken or disallowed construct:
+
+- ``\\documentclass``, ``\\begin{document}`` and ``\\end{document}`` — the
+  templates own the document structure;
+- commands that end the run, read from the terminal or change the
+  interaction mode (``\\stop``, ``\\@@end``, ``\\dump``, ``\\read16``,
+  ``\\errorstopmode``...) and ``\\write18``;
+- with `balance`, unbalanced braces and ``\\begin``/``\\end`` pairs that do
+  not match (checked outside brace groups only, so environments opened and
+  closed in different arguments of ``\\newenvironment`` and friends are
+  fine).
+
+A document may open a group or environment in one ``latex`` block and close
+it in a later one, so blocks are checked one by one without `balance`, and
+`preflight_balance` checks the balance of all of them read as one text.
+
+Verbatim environments and ``\\verb`` are skipped. After a ``\\catcode``
+assignment braces and environments can no longer be read without running
+TeX, so balance is not checked past it; disallowed control sequences are
+still looked for by name. Results of `preflight_tex` are cached by content
+hash, so a page template reused across renders is checked once.
+"""
+
+import hashlib
+import re
+
+# Commands that end the run, wait on the terminal or change how errors are
+# handled; the compile pipeline depends on all of these.
+_FORBIDDEN = frozenset({
+    "documentclass",
+    "stop",
+    "@@end",
+    "dump",
+    "errorstopmode",
+    "scrollmode",
+    "nonstopmode",
+    "batchmode",
+})
+
+# Environments whose contents are not LaTeX.
+_VERBATIM_ENVS = frozenset({
+    "verbatim", "verbatim*", "Verbatim", "lstlisting", "minted", "comment",
+})
+
+_TOKEN_RE = re.compile(r"\\([A-Za-z@]+|.)|%[^\n]*|[{}\n]", re.DOTALL)
+_ENV_ARG_RE = re.compile(r"\s*\{([^{}]*)\}")
+_SHELL_ESCAPE_RE = re.compile(r"\s*=?\s*18\b")
+# \read with a stream number rather than an opened stream's register reads
+# from the terminal and blocks.
+_TERMINAL_READ_RE = re.compile(r"\s*=?\s*-?\d")
+
+_cache: dict[tuple[str, bool], str | None] = {}
+_CACHE_SIZE = 4096
+
+
+def preflight_tex(source: str, balance: bool = True) -> str | None:
+    """Return the first problem found in `source`, or None if it looks sound.
+
+    Without `balance`, only disallowed constructs are reported. The result
+    is cached by the SHA-256 of `source`.
+    """
+    key = (hashlib.sha256(source.encode("utf-8")).hexdigest(), balance)
+    if key in _cache:
+        return _cache[key]
+    problem = _check(source, balance)
+    if len(_cache) >= _CACHE_SIZE:
+        _cache.clear()
+    _cache[key] = problem
+    return problem
+
+
+def preflight_balance(sources: list[str]) -> tuple[int, str] | None:
+    """Check brace and environment balance across `sources`, read as one
+    text (e.g. a document's ``latex`` blocks in order).
+
+    Returns (index of the source the problem is in, problem), or None.
+    Line numbers in the problem are relative to that source. Balance is not
+    checked past a ``\\catcode`` assignment (disallowed constructs are
+    left to `preflight_tex` on each source).
+    """
+    scan = _Scan(balance=True)
+    for index, source in enumerate(sources):
+        problem = scan.feed(source, index)
+        if problem:
+            return index, problem
+        if scan.stopped:
+            return None
+    return scan.finish()
+
+
+def _check(source: str, balance: bool = True) -> str | None:
+    scan = _Scan(balance)
+    problem = scan.feed(source)
+    if problem or scan.stopped:
+        return problem
+    unclosed = scan.finish()
+    return unclosed[1] if unclosed else None
+
+
+class _Scan:
+    """Tokenizer state carried from one source to the next."""
+
+    def __init__(self, balance: bool):
+        self.balance = balance
+        # Open braces as (source index, line), innermost last.
+        self.braces: list[tuple[int, int]] = []
+        # Open environments at brace depth 0: (name, source index, line).
+        self.envs: list[tuple[str, int, int]] = []
+        # A \catcode assignment stopped the balance tracking.
+        self.stopped = False
+
+    def feed(self, source: str, index: int = 0) -> str | None:
+        """Scan `source`; return the first problem in it, if any."""
+        balance = self.balance
+        braces = self.braces
+        envs = self.envs
+        line = 1
+        pos = 0
+        while True:
+            m = _TOKEN_RE.search(source, pos)
+            if m is None:
+                break
+            line += source.count("\n", pos, m.start())
+            pos = m.end()
+            token = m.group(0)
+            if token == "\n":
+                line += 1
+            elif token == "{":
+                if balance:
+                    braces.append((index, line))
+            elif token == "}":
+                if not balance:
+                    continue
+                if not braces:
+                    return f"unbalanced '}}' on line {line}"
+                braces.pop()
+            elif token.startswith("\\"):
+                name = m.group(1)
+                if name == "\n":
+                    line += 1
+                elif name == "catcode":
+                    self.stopped = True
+                    self.balance = balance = False
+                elif name in _FORBIDDEN:
+                    return f"\\{name} is not allowed (line {line})"
+                elif name == "write" and _SHELL_ESCAPE_RE.match(source, pos):
+                    return f"\\write18 is not allowed (line {line})"
+                elif name in ("read", "readline") and _TERMINAL_READ_RE.match(source, pos):
+                    return f"reading the terminal with \\{name} is not allowed (line {line})"
+                elif name == "verb":
+                    pos = _skip_verb(source, pos)
+                elif name in ("begin", "end"):
+                    arg = _ENV_ARG_RE.match(source, pos)
+                    if arg is None:
+                        continue
+                    env = arg.group(1).strip()
+                    if env == "document":
+                        return f"\\{name}{{document}} is not allowed (line {line})"
+                    line += source.count("\n", pos, arg.end())
+                    pos = arg.end()
+                    if name == "begin" and env in _VERBATIM_ENVS:
+                        end = source.find(f"\\end{{{env}}}", pos)
+                        if end < 0:
+                            if not balance:
+                                return None
+                            return f"unclosed \\begin{{{env}}} from line {line}"
+                        line += source.count("\n", pos, end)
+                        pos = end + len(f"\\end{{{env}}}")
+                    elif not balance or braces:
+                        continue
+                    elif name == "begin":
+                        envs.append((env, index, line))
+                    elif not envs:
+                        return f"\\end{{{env}}} on line {line} without a matching \\begin"
+                    elif envs[-1][0] != env:
+                        open_env, open_index, open_line = envs[-1]
+                        where = f"line {open_line}" if open_index == index else "an earlier block"
+                        return (
+                            f"\\end{{{env}}} on line {line} does not match "
+                            f"\\begin{{{open_env}}} on {where}"
+                        )
+                    else:
+                        envs.pop()
+        return None
+
+    def finish(self) -> tuple[int, str] | None:
+        """The innermost group or environment left open, as (source index,
+        problem)."""
+        if self.braces:
+            index, line = self.braces[-1]
+            return index, f"unclosed '{{' from line {line}"
+        if self.envs:
+            env, index, line = self.envs[-1]
+            return index, f"unclosed \\begin{{{env}}} from line {line}"
+        return None
+
+
+def _skip_verb(source: str, pos: int) -> int:
+    """Return the position after the ``\\verb`` argument starting at `pos`."""
+    if source.startswith("*", pos):
+        pos += 1
+    if pos >= len(source):
+        return pos
+    end = source.find(source[pos], pos + 1)
+    newline = source.find("\n", pos + 1)
+    if end < 0 or (0 <= newline < end):
+        return pos + 1
+    return end + 1
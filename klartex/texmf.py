@@ -0,0 +1,168 @@
+"""Private, indexed TeX search tree and per-worker TeX caches.
+
+kpathsea scans every directory on TEXINPUTS for every file lookup on every
+pass — including the caller's working directory, which in server
+deployments can be large. A path element prefixed with ``!!`` is looked up
+in an ``ls-R`` filename database instead and never scanned.
+
+klartex keeps a private texmf tree under ``cache_dir("texmf")`` with its
+``cls/`` files and an ``ls-R`` written here, one tree per version of the
+class files. Asset directories passed to `register_asset_dir` get a tree of
+their own; they are indexed at registration, so register again after adding
+files. Unregistered asset directories and the caller's cwd (unless
+``search_cwd=False``) are still searched by directory scan.
+
+Each worker process also gets its own TEXMFVAR and fontconfig cache
+(XDG_CACHE_HOME) under ``cache_dir("workers")``, so concurrent renders do
+not contend on shared caches. Worker slots are claimed with a file lock and
+reused by later processes, so the caches stay warm across restarts.
+"""
+
+import fcntl
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from klartex.cache import cache_dir
+from klartex.tex_format import cls_digest
+
+_CLS_DIR = Path(__file__).resolve().parent / "cls"
+
+LS_R_HEADER = "% ls-R -- filename database for kpathsea; do not change this line."
+
+_cls_tree: Path | None = None
+# Real path of a registered asset directory -> its indexed tree.
+_asset_trees: dict[str, Path] = {}
+_worker: Path | None = None
+# Keeps the worker slot lock held for the lifetime of the process.
+_worker_lock = None
+
+
+def write_ls_r(root: Path) -> None:
+    """Write the kpathsea ``ls-R`` database for the tree at `root`.
+
+    Symlinked directories are followed, so a tree may link to directories
+    that live elsewhere.
+    """
+    lines = [LS_R_HEADER, ""]
+    for dirpath, dirnames, filenames in os.walk(root, followlinks=True):
+        dirnames.sort()
+        rel = os.path.relpath(dirpath, root)
+        lines.append("./:" if rel == "." else f"./{rel}:")
+        lines.extend(sorted(n for n in dirnames + filenames if n != "ls-R"))
+        lines.append("")
+    tmp = root / "ls-R.tmp"
+    tmp.write_text("\n".join(lines), encoding="utf-8")
+    os.replace(tmp, root / "ls-R")
+
+
+def _build_tree(dest: Path, link_name: str, target: Path) -> Path:
+    """Create the tree ``dest/<link_name> -> target`` with its ls-R.
+
+    Built in a sibling temp directory and renamed into place; a concurrent
+    builder that got there first wins.
+    """
+    if (dest / "ls-R").exists():
+        return dest
+    tmp = Path(tempfile.mkdtemp(dir=dest.parent, prefix=".build-"))
+    (tmp / link_name).symlink_to(target)
+    write_ls_r(tmp)
+    try:
+        os.replace(tmp, dest)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return dest
+
+
+def cls_tree() -> Path:
+    """Return the indexed tree holding klartex's ``cls/`` files."""
+    global _cls_tree
+    if _cls_tree is None:
+        dest = cache_dir("texmf") / f"cls-{cls_digest()[:16]}"
+        _cls_tree = _build_tree(dest, "klartex", _CLS_DIR)
+    return _cls_tree
+
+
+def register_asset_dir(path: Path | str) -> Path:
+    """Index `path` so renders with it as ``asset_dir`` look files up in
+    an ls-R database instead of scanning it. Returns the tree's root.
+
+    Re-registering re-indexes the directory.
+    """
+    real = Path(path).resolve()
+    if not real.is_dir():
+        raise ValueError(f"Asset directory not found: {path}")
+    key = hashlib.sha256(str(real).encode("utf-8")).hexdigest()[:16]
+    dest = cache_dir("texmf") / f"asset-{key}"
+    if dest.exists():
+        write_ls_r(dest)
+    else:
+        _build_tree(dest, "files", real)
+    _asset_trees[str(real)] = dest
+    return dest
+
+
+def unregister_asset_dir(path: Path | str) -> None:
+    """Forget a registered asset directory; it is scanned again."""
+    _asset_trees.pop(str(Path(path).resolve()), None)
+
+
+def worker_dir() -> Path:
+    """Return this process's worker directory, claiming a free slot."""
+    global _worker, _worker_lock
+    if _worker is None:
+        workers = cache_dir("workers")
+        slot = 0
+        while True:
+            lock = open(workers / f"w{slot}.lock", "w")
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock.close()
+                slot += 1
+                continue
+            break
+        _worker_lock = lock
+        _worker = workers / f"w{slot}"
+        (_worker / "texmf-var").mkdir(parents=True, exist_ok=True)
+        (_worker / "xdg-cache").mkdir(exist_ok=True)
+    return _worker
+
+
+def tex_env(
+    asset_dir: Path | str | None = None,
+    fmt_dir: Path | None = None,
+    search_cwd: bool = True,
+) -> dict[str, str]:
+    """Return the environment for a compile.
+
+    TEXINPUTS is the working directory, the indexed cls/ tree, `asset_dir`
+    (indexed when registered), the caller's cwd when `search_cwd`, and the
+    caller's own TEXINPUTS. asset_dir slots in after the bundled cls/ so
+    server callers can resolve page-template bundles without chdir.
+    `fmt_dir` is prepended to TEXFORMATS. Trailing ':' keep the TeX Live
+    defaults searchable.
+    """
+    env = os.environ.copy()
+    trees = [cls_tree()]
+    parts = [".", f"!!{trees[0]}//"]
+    if asset_dir is not None:
+        tree = _asset_trees.get(str(Path(asset_dir).resolve()))
+        if tree is not None:
+            trees.append(tree)
+            parts.append(f"!!{tree}//")
+        else:
+            parts.append(str(asset_dir))
+    if search_cwd:
+        parts.append(os.getcwd())
+    parts.append(env.get("TEXINPUTS", ""))
+    env["TEXINPUTS"] = ":".join(parts)
+    env["TEXMFDBS"] = ":".join([*map(str, trees), env.get("TEXMFDBS", "")])
+    if fmt_dir is not None:
+        env["TEXFORMATS"] = f"{fmt_dir}:{env.get('TEXFORMATS', '')}"
+    worker = worker_dir()
+    env["TEXMFVAR"] = str(worker / "texmf-var")
+    env["XDG_CACHE_HOME"] = str(worker / "xdg-cache")
+    return env
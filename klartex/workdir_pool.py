@@ -0,0 +1,156 @@
+"""Long-lived, pre-staged working directories for compilation.
+
+A compile needs a directory holding ``document.tex`` next to symlinks into
+``cls/``, and an environment whose TEXINPUTS points at the bundled class
+files. Creating, staging and removing that directory on every render is
+measurable churn at thousands of renders per hour on shared disks.
+
+The pool keeps `size` directories staged once, optionally on tmpfs, and
+leases them to renders. Between jobs a directory is scrubbed back to its
+staged entries. Environments (klartex/texmf.py) are built once per
+(asset_dir, cwd, format directory) and reused, so later changes to
+``os.environ`` or asset registrations are not picked up until the pool is
+restarted.
+
+Usage::
+
+    from klartex import workdir_pool
+
+    workdir_pool.start(size=8, tmpfs=True)   # once, at server start-up
+    ...                                      # render() as usual
+    workdir_pool.stop()
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from klartex.texmf import tex_env
+
+_CLS_DIR = Path(__file__).resolve().parent / "cls"
+
+# Entries every working directory is staged with; scrubbing keeps them.
+_STAGED = ("cls", "klartex-base.cls")
+
+_TMPFS = Path("/dev/shm")
+
+
+def stage_workdir(path: Path) -> None:
+    """Make the bundled class files resolvable from `path`."""
+    # Symlink entire cls/ directory so xelatex can find .cls and .sty files
+    (path / "cls").symlink_to(_CLS_DIR)
+    # Also symlink klartex-base.cls at top level for \documentclass{klartex-base}
+    (path / "klartex-base.cls").symlink_to(_CLS_DIR / "klartex-base.cls")
+
+
+class WorkdirPool:
+    """`size` staged working directories, leased one render at a time."""
+
+    def __init__(self, size: int = 4, tmpfs: bool = False):
+        if size < 1:
+            raise ValueError(f"Pool size must be at least 1, got {size}")
+        parent = _TMPFS if tmpfs and _TMPFS.is_dir() else None
+        self._root = Path(tempfile.mkdtemp(prefix="klartex-work-", dir=parent))
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._free = [self._new_dir() for _ in range(size)]
+        self._envs: dict[tuple, dict[str, str]] = {}
+
+    def _new_dir(self) -> Path:
+        with self._lock:
+            self._counter += 1
+            path = self._root / f"d{self._counter}"
+        path.mkdir()
+        stage_workdir(path)
+        return path
+
+    def env(
+        self,
+        asset_dir: Path | str | None = None,
+        fmt_dir: Path | None = None,
+        search_cwd: bool = True,
+    ) -> dict[str, str]:
+        """Return the cached `tex_env()` for these arguments.
+
+        The returned dict is shared between renders and must not be mutated.
+        """
+        cwd = os.getcwd() if search_cwd else None
+        key = (str(asset_dir) if asset_dir is not None else None, cwd, fmt_dir)
+        env = self._envs.get(key)
+        if env is None:
+            env = self._envs[key] = tex_env(asset_dir, fmt_dir, search_cwd)
+        return env
+
+    @contextmanager
+    def lease(self) -> Iterator[Path]:
+        """Lease a staged directory for one render.
+
+        When every pooled directory is busy, a temporary one is staged for
+        the lease and removed afterwards.
+        """
+        with self._lock:
+            path = self._free.pop() if self._free else None
+        pooled = path is not None
+        if path is None:
+            path = self._new_dir()
+        try:
+            yield path
+        finally:
+            if pooled and _scrub(path):
+                with self._lock:
+                    self._free.append(path)
+            else:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def close(self) -> None:
+        """Remove all directories of the pool."""
+        with self._lock:
+            self._free.clear()
+        shutil.rmtree(self._root, ignore_errors=True)
+
+
+def _scrub(path: Path) -> bool:
+    """Remove everything but the staged entries from `path`. Returns success."""
+    try:
+        for entry in os.scandir(path):
+            if entry.name in _STAGED:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+    except OSError:
+        return False
+    return True
+
+
+_pool: WorkdirPool | None = None
+
+
+def start(size: int = 4, tmpfs: bool = False) -> WorkdirPool:
+    """Enable the process-wide pool used by `render()`."""
+    global _pool
+    stop()
+    _pool = WorkdirPool(size, tmpfs=tmpfs)
+    return _pool
+
+
+def stop() -> None:
+    """Disable and remove the process-wide pool, if any."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+def get_pool() -> WorkdirPool | None:
+    """Return the active process-wide pool, or None."""
+    return _pool
+
+
+atexit.register(stop)
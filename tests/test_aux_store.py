@@ -0,0 +1,58 @@
+"""Tests for the aux seed store."""
+
+import os
+
+from klartex.aux_store import aux_key, load_aux, may_use_store, store_aux
+
+
+class TestAuxKey:
+    BODY = {"body": [{"type": "heading", "text": "A"}]}
+
+    def test_same_request_same_key(self):
+        same = {"body": [{"type": "heading", "text": "A"}]}
+        assert aux_key("_block", self.BODY, ["xelatex"]) == aux_key("_block", same, ["xelatex"])
+
+    def test_content_changes_key(self):
+        other = {"body": [{"type": "heading", "text": "B"}]}
+        assert aux_key("_block", self.BODY) != aux_key("_block", other)
+
+    def test_lang_changes_key(self):
+        assert aux_key("_block", self.BODY) != aux_key("_block", {**self.BODY, "lang": "en"})
+
+    def test_page_template_changes_key(self):
+        formal = {**self.BODY, "page_template": "formal"}
+        assert aux_key("_block", self.BODY) != aux_key("_block", formal)
+
+    def test_options_change_key(self):
+        assert aux_key("_block", self.BODY, ["xelatex"]) != aux_key(
+            "_block", self.BODY, ["xelatex", "preview:None"]
+        )
+
+    def test_template_changes_key(self):
+        assert aux_key("_block", self.BODY) != aux_key("protokoll", self.BODY)
+
+
+def test_raw_tex_never_uses_store():
+    assert may_use_store(False)
+    assert not may_use_store(True)
+    assert not may_use_store(False, "% custom")
+
+
+def test_store_roundtrip(monkeypatch, tmp_path):
+    monkeypatch.setenv("KLARTEX_CACHE_DIR", str(tmp_path))
+    assert load_aux("k") is None
+    store_aux("k", b"\\relax\n")
+    assert load_aux("k") == b"\\relax\n"
+    store_aux("k", b"\\relax\n\\newlabel{LastPage}{{}{2}}\n")
+    assert load_aux("k").endswith(b"{2}}\n")
+    assert not list(tmp_path.glob("aux/*.tmp"))
+
+
+def test_store_evicts_least_recently_used(monkeypatch, tmp_path):
+    monkeypatch.setenv("KLARTEX_CACHE_DIR", str(tmp_path))
+    for i, key in enumerate(["a", "b", "c"]):
+        store_aux(key, b"x", max_entries=3)
+        os.utime(tmp_path / "aux" / f"{key}.aux", (i, i))
+    load_aux("a")
+    store_aux("d", b"x", max_entries=3)
+    assert sorted(p.stem for p in tmp_path.glob("aux/*.aux")) == ["a", "c", "d"]
@@ -0,0 +1,175 @@
+"""Golden tests for the native block emitters (klartex/block_emitters.py).
+
+The expected TeX lives in tests/fixtures/golden/. After an intended output
+change, regenerate it with ``KLARTEX_UPDATE_GOLDEN=1 python -m pytest
+tests/test_block_emitters.py`` and review the diff.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from klartex import block_engine
+from klartex.block_emitters import EMITTERS
+from klartex.block_engine import LONG_TABLE_ROWS, block_overrides
+from klartex.renderer import _render_block_engine
+from klartex.tex_escape import escape_view
+
+FIXTURES = Path(__file__).parent / "fixtures"
+GOLDEN = FIXTURES / "golden"
+
+BLOCK_FIXTURES = sorted(p.stem for p in FIXTURES.glob("*block*.json"))
+
+SPECIALS = " & 50% _x_ #1 {a} \\ ~^$ \"citat\" **fet** *kursiv* `kod`\nrad"
+
+
+def _tex(data: dict, instrument: bool = False) -> str:
+    escaped = escape_view(data, block_overrides(data["body"], paths=instrument))
+    return _render_block_engine(escaped, instrument=instrument)
+
+
+def _check_golden(name: str, tex: str) -> None:
+    path = GOLDEN / f"{name}.tex"
+    if os.environ.get("KLARTEX_UPDATE_GOLDEN"):
+        path.write_text(tex, encoding="utf-8")
+    assert tex == path.read_text(encoding="utf-8")
+
+
+def _people(n: int) -> list[dict]:
+    return [
+        {"name": f"Person {i} & co", "role": "Ledamot", **({"note": "Ny_"} if i % 3 else {})}
+        for i in range(n)
+    ]
+
+
+def _rows(n: int) -> list[list[str]]:
+    return [[f"Rad {i}", f"{i * 100}", "Lång cell med *markup*\noch radbrytning"] for i in range(n)]
+
+
+def _resultatrakning(**extra) -> dict:
+    return {
+        "type": "resultatrakning",
+        "rubrik_ar1": "2025",
+        "rubrik_ar2": "2024",
+        "grupper": [
+            {
+                "rubrik": "Intäkter & bidrag",
+                "poster": [
+                    {"post": f"Post {i}", "belopp_ar1": 1234.5 * i, "belopp_ar2": -i, "notref": i}
+                    for i in range(30)
+                ] + [{"post": "Utan not", "belopp_ar1": None, "belopp_ar2": ""}],
+                "summa": {"label": "Summa", "belopp_ar1": 99999, "belopp_ar2": -5},
+            }
+        ],
+        "resultat": {"label": "Resultat", "belopp_ar1": 1, "belopp_ar2": 2},
+        **extra,
+    }
+
+
+def _budgettabell(**extra) -> dict:
+    return {
+        "type": "budgettabell",
+        "rubrik_budget": "Budget",
+        "rubrik_ar1": "2025",
+        "rubrik_ar2": "2024",
+        "poster": [
+            {"konto": "3010", "post": f"Post {i}", "budget": 1000 * i, "utfall_ar1": 12.5,
+             "utfall_ar2": 0, **({"procent": 12.5} if i % 2 else {})}
+            for i in range(50)
+        ] + [{"post": "Utan konto", "budget": 1, "utfall_ar1": 2, "utfall_ar2": 3}],
+        **extra,
+    }
+
+
+def _heavy_body() -> list[dict]:
+    """Every emitted type, at the top level and nested, both sides of the
+    long-table threshold, next to blocks rendered by Jinja."""
+    table = {"type": "table", "header": ["Namn", "Belopp", "Text"], "rows": _rows(5)}
+    long_table = {**table, "rows": _rows(LONG_TABLE_ROWS + 1)}
+    nested = [
+        {"type": "text", "text": "Inne" + SPECIALS},
+        long_table,
+        {"type": "callout", "variant": "tip", "text": "Tips"},
+        {"type": "list", "items": ["x", {"text": "y", "content": [{"type": "quote", "text": "Q"}]}]},
+        {"type": "name_roster", "title": "Närvarande", "people": _people(LONG_TABLE_ROWS + 2)},
+        _resultatrakning(transport=True),
+        _budgettabell(transport=True),
+    ]
+    return [
+        {"type": "heading", "text": "Rubrik"},
+        {"type": "text", "text": "Stycke" + SPECIALS},
+        {"type": "text", "text": "Luft", "spacing_before": "2em", "spacing_after": "3em"},
+        table,
+        long_table,
+        {**long_table, "column_fit": "tabularx", "size": "footnotesize"},
+        {**table, "column_fit": "tabularx", "columns": [{"width": "3cm", "align": "right"}, {}, {"align": "center"}]},
+        {**table, "rows": [], "size": "huge", "spacing_after": "0pt"},
+        {"type": "list", "style": "numbered", "items": [
+            "Ett" + SPECIALS,
+            {"text": "Två", "content": nested},
+            {"text": "Tre", "content": [{"type": "list", "items": [{"text": "Djup", "content": nested}]}]},
+            {"text": "Tom"},
+        ]},
+        {"type": "columns", "items": [nested, [{"type": "text", "text": "Höger"}, table]]},
+        {"type": "columns", "items": [[{"type": "text", "text": "Ensam"}, _resultatrakning()]]},
+        {"type": "columns", "items": [[table], [], [{"type": "latex", "source": "\\relax"}]]},
+        {"type": "name_roster", "title": "Kort", "people": _people(3)},
+        {"type": "name_roster", "title": "Lång", "people": _people(LONG_TABLE_ROWS + 1)},
+        _resultatrakning(),
+        _resultatrakning(transport=True),
+        {**_resultatrakning(), "resultat": None},
+        _budgettabell(),
+        _budgettabell(transport=True),
+        {"type": "notapparat", "noter": [{"notnr": 1, "text": "Not" + SPECIALS}, {"notnr": "2a", "text": ""}]},
+        {"type": "clause", "number": "§ 1", "text": "Villkor", "content": nested},
+    ]
+
+
+class TestRegistry:
+    def test_hot_types_have_emitters(self):
+        for block_type in ("table", "list", "name_roster", "resultatrakning"):
+            assert block_type in EMITTERS
+
+    def test_emitters_cover_known_types_only(self):
+        assert set(EMITTERS) <= block_engine.KNOWN_BLOCK_TYPES
+
+    def test_context_lists_native_types(self):
+        context = block_engine.prepare_block_context({"body": []})
+        assert context["native_blocks"] == frozenset(EMITTERS)
+
+
+class TestGolden:
+    @pytest.mark.parametrize("fixture", BLOCK_FIXTURES)
+    def test_fixture(self, fixture):
+        data = json.loads((FIXTURES / f"{fixture}.json").read_text())
+        _check_golden(fixture, _tex(data))
+
+    @pytest.mark.parametrize("fixture", ["block_simple", "block_spacing_all"])
+    def test_fixture_instrumented(self, fixture):
+        data = json.loads((FIXTURES / f"{fixture}.json").read_text())
+        _check_golden(f"{fixture}.instrument", _tex(data, instrument=True))
+
+    @pytest.mark.parametrize("lang, instrument", [("sv", False), ("en", False), ("sv", True)])
+    def test_heavy_document(self, lang, instrument):
+        tex = _tex({"lang": lang, "body": _heavy_body()}, instrument)
+        assert "\\begin{longtable}" in tex and "\\kxtransport" in tex
+        _check_golden(f"heavy.{lang}{'.instrument' if instrument else ''}", tex)
+
+    def test_block_settings(self):
+        data = {
+            "block_settings": {
+                "text": {"spacing_before": "1pt", "spacing_after": "2pt"},
+                "list": {"spacing_before": "3pt"},
+                "table": {"spacing_after": "4pt"},
+            },
+            "body": _heavy_body(),
+        }
+        tex = _tex(data)
+        assert "\\vspace{3pt}" in tex
+        _check_golden("heavy.block_settings", tex)
+
+    def test_nested_non_native_blocks_use_jinja(self):
+        body = [{"type": "list", "items": [{"text": "a", "content": [{"type": "callout", "text": "c"}]}]}]
+        assert "\\begin{callout}{note}{Notera}" in _tex({"body": body})
@@ -81,6 +81,60 @@ class TestPrepareBlockContext:
         assert ctx["lang"] == "en"
 
 
+class TestComponentPackagesOnDemand:
+    """Only the component packages a body uses are loaded."""
+
+    def test_plain_body_loads_no_component_packages(self):
+        data = {"body": [{"type": "heading", "text": "T"}, {"type": "text", "text": "x"}]}
+        assert prepare_block_context(data)["sty_packages"] == []
+
+    def test_nested_blocks_are_collected(self):
+        data = {
+            "body": [
+                {
+                    "type": "columns",
+                    "items": [
+                        [{"type": "callout", "variant": "info", "text": "x"}],
+                        [{"type": "clause", "title": "A", "content": [
+                            {"type": "name_roster", "title": "S", "people": []},
+                        ]}],
+                    ],
+                },
+            ],
+        }
+        packages = prepare_block_context(data)["sty_packages"]
+        assert packages == ["klartex-name-roster", "klartex-callout"]
+
+    def test_latex_block_loads_all_packages(self):
+        from klartex.components import list_components
+
+        data = {"body": [{"type": "latex", "source": r"\klartexnum{1}"}]}
+        packages = prepare_block_context(data)["sty_packages"]
+        expected = {s.sty_package for s in list_components().values() if s.sty_package}
+        assert set(packages) == expected | {"klartex-numformat"}
+
+    def test_packages_are_in_dumpable_preamble(self):
+        from klartex.renderer import _render_block_engine
+        from klartex.tex_format import split_preamble
+
+        data = {"body": [{"type": "parties", "party1": {"name": "A"}, "party2": {"name": "B"}}]}
+        tex = _render_block_engine(data, page_template_source="% custom")
+        assert r"\usepackage{klartex-fieldset}" in split_preamble(tex)
+        plain = _render_block_engine({"body": [{"type": "text", "text": "x"}]})
+        assert r"\usepackage" not in plain
+
+    def test_custom_page_template_loads_all_packages(self):
+        from klartex.preview import Preview
+        from klartex.renderer import _render_block_engine
+
+        data = {"body": [{"type": "text", "text": "x"}]}
+        assert _render_block_engine(data).startswith("\\documentclass{klartex-base}")
+        tex = _render_block_engine(data, page_template_source="% custom")
+        assert tex.startswith("\\documentclass[components]{klartex-base}")
+        tex = _render_block_engine(data, page_template_source="% custom", preview=Preview(pages=1))
+        assert tex.startswith("\\documentclass[preview,components]{klartex-base}")
+
+
 class TestBlockTypeValidation:
     """Tests for block type detection and per-block schema validation."""
 
@@ -861,11 +915,11 @@ class TestClauseBlock:
     def _render_tex(self, data: dict) -> str:
         """Helper: run the renderer's pre-compile pipeline and return the
         rendered LaTeX source (no xelatex needed)."""
-        from klartex.renderer import _render_block_engine, _restore_block_types
-        from klartex.tex_escape import escape_data
+        from klartex.block_engine import block_overrides
+        from klartex.renderer import _render_block_engine
+        from klartex.tex_escape import escape_view
 
-        escaped = escape_data(data)
-        _restore_block_types(data["body"], escaped["body"])
+        escaped = escape_view(data, block_overrides(data["body"]))
         return _render_block_engine(escaped)
 
     def test_number_required(self):
@@ -1067,11 +1121,11 @@ class TestRecipeTemplatesStillWork:
 def _render_tex(data: dict) -> str:
     """Module helper: run the renderer's pre-compile pipeline and return the
     rendered LaTeX source (no xelatex needed)."""
-    from klartex.renderer import _render_block_engine, _restore_block_types
-    from klartex.tex_escape import escape_data
+    from klartex.block_engine import block_overrides
+    from klartex.renderer import _render_block_engine
+    from klartex.tex_escape import escape_view
 
-    escaped = escape_data(data)
-    _restore_block_types(data["body"], escaped["body"])
+    escaped = escape_view(data, block_overrides(data["body"]))
     return _render_block_engine(escaped)
 
 
@@ -1245,6 +1299,62 @@ class TestTableColumnAlign:
         assert render(BLOCK_ENGINE_TEMPLATE, data)[:5] == b"%PDF-"
 
 
+class TestLongTable:
+    """Tables over LONG_TABLE_ROWS rows become a page-breaking longtable."""
+
+    @staticmethod
+    def _table(nrows, **extra):
+        rows = [[f"r{i}", "x", "1"] for i in range(nrows)]
+        return {"type": "table", "header": ["A", "B", "C"], "rows": rows, **extra}
+
+    def test_short_table_is_not_long(self):
+        from klartex.block_engine import LONG_TABLE_ROWS
+
+        tex = _render_tex({"body": [self._table(LONG_TABLE_ROWS)]})
+        assert r"\begin{tabular}" in tex
+        assert "longtable" not in tex.split(r"\begin{document}")[1]
+
+    def test_long_table_repeats_header(self):
+        from klartex.block_engine import LONG_TABLE_ROWS
+
+        tex = _render_tex({"body": [self._table(LONG_TABLE_ROWS + 1)]})
+        body = tex.split(r"\begin{document}")[1]
+        assert r"\begin{longtable}" in body
+        assert "tabularx" not in body
+        head = body[body.index(r"\begin{longtable}"):body.index(r"\endhead")]
+        assert r"\textbf{A} & \textbf{B} & \textbf{C}" in head
+        assert body.index(r"\endlastfoot") < body.index("r0 & x & 1")
+
+    def test_long_table_fill_columns_get_fixed_widths(self):
+        columns = [{"width": "2cm"}, {}, {"align": "right"}]
+        data = {"body": [self._table(100, columns=columns, column_fit="tabularx")]}
+        tex = _render_tex(data)
+        fill = r"p{0.5000\dimexpr(\linewidth-2cm-4\tabcolsep)\relax}"
+        assert (
+            r"\begin{longtable}{@{}>{\raggedright\arraybackslash}p{2cm}"
+            r">{\raggedright\arraybackslash}" + fill
+            + r">{\raggedleft\arraybackslash}" + fill + "@{}}"
+        ) in tex
+
+    def test_nested_long_table_is_not_long(self):
+        data = {"body": [{"type": "columns", "items": [[self._table(100)], [self._table(1)]]}]}
+        body = _render_tex(data).split(r"\begin{document}")[1]
+        assert "longtable" not in body
+        assert body.count(r"\begin{tabular}") == 2
+
+    @pytest.mark.skipif(not HAS_XELATEX, reason="xelatex not installed")
+    def test_long_table_compiles_across_pages(self):
+        from klartex.renderer import render_detailed
+
+        events = []
+        result = render_detailed(
+            BLOCK_ENGINE_TEMPLATE, {"body": [self._table(300)]},
+            aux_store=False, progress=events.append,
+        )
+        assert result.pdf[:5] == b"%PDF-"
+        assert max(e.pages for e in events) > 1
+
+
 class TestTitlePageOptionalParties:
     """title_page without parties renders only the title — no stray 'Och'
     or blank party rows (handled inside \\makedoctitle)."""
@@ -1,8 +1,11 @@
 """Tests for the component registry."""
 
+from pathlib import Path
+
 import pytest
 
 from klartex.components import (
+    component_packages,
     get_component,
     list_components,
     resolve_data_path,
@@ -119,6 +122,16 @@ class TestComponentRegistry:
         spec = get_component("notapparat")
         assert spec.sty_package == "klartex-notapparat"
 
+    def test_parties_component_sty(self):
+        spec = get_component("parties")
+        assert spec.sty_package == "klartex-fieldset"
+
+    def test_every_sty_package_exists(self):
+        cls_dir = Path(__file__).resolve().parent.parent / "klartex" / "cls"
+        for spec in list_components().values():
+            if spec.sty_package:
+                assert (cls_dir / f"{spec.sty_package}.sty").exists(), spec.sty_package
+
     def test_recipe_component_no_block_schema(self):
         """Recipe-only components (invoice_*) don't need block schemas."""
         spec = get_component("invoice_header")
@@ -132,6 +145,16 @@ class TestComponentRegistry:
             assert spec.block_schema_path is None
 
 
+class TestComponentPackages:
+    def test_components_without_package_need_none(self):
+        assert component_packages(["heading", "text", "table"]) == []
+
+    def test_deduplicated_in_registry_order(self):
+        a = component_packages(["callout", "agenda", "callout"])
+        b = component_packages(["agenda", "callout"])
+        assert a == b == ["klartex-agenda", "klartex-callout"]
+
+
 class TestResolveDataPath:
     """Tests for dot-notation data path resolution."""
 
@@ -0,0 +1,208 @@
+"""Tests for the warm xelatex process pool."""
+
+import shutil
+import sys
+import threading
+import time
+
+import pytest
+
+from klartex import engine_pool
+from klartex.engine_pool import EnginePool
+from klartex.progress import PassWatcher
+
+HAS_XELATEX = shutil.which("xelatex") is not None
+
+# Stand-in engine: parks on stdin like the real one, then "typesets" the
+# named file by copying it to document.xdv and extending document.aux.
+FAKE_ENGINE = f"""#!{sys.executable}
+import sys, time
+from pathlib import Path
+name = sys.stdin.readline().strip()
+if "SLEEP" in Path(name).read_text():
+    time.sleep(30)
+Path("document.xdv").write_text(Path(name).read_text())
+aux = Path("document.aux")
+aux.write_text((aux.read_text() if aux.exists() else "") + "pass;")
+print(" ".join(sys.argv[1:]))
+"""
+
+
+@pytest.fixture
+def fake_engine(tmp_path):
+    path = tmp_path / "fake-xelatex"
+    path.write_text(FAKE_ENGINE)
+    path.chmod(0o755)
+    return str(path)
+
+
+@pytest.fixture
+def pool():
+    p = EnginePool(size=1)
+    yield p
+    p.close()
+
+
+def _wait_idle(pool, args, env):
+    key = pool._key(args, env)
+    deadline = time.monotonic() + 10
+    while not pool._idle.get(key):
+        assert time.monotonic() < deadline, "pool did not warm up"
+        time.sleep(0.01)
+
+
+def _watcher(stall_timeout=10):
+    return PassWatcher("xelatex", stall_timeout=stall_timeout, budget=10)
+
+
+def _jobdir(tmp_path, tex="hello", aux=None):
+    jobdir = tmp_path / "job"
+    jobdir.mkdir(parents=True)
+    (jobdir / "document.tex").write_text(tex)
+    if aux is not None:
+        (jobdir / "document.aux").write_text(aux)
+    return jobdir
+
+
+class TestEnginePool:
+    def test_recurring_key_is_warmed(self, pool, fake_engine, tmp_path):
+        args, env = [fake_engine, "-no-pdf"], {"TEXINPUTS": "a"}
+        assert pool.run_pass(args, env, _jobdir(tmp_path / "1"), _watcher()) is None
+        time.sleep(0.2)
+        assert not pool._idle.get(pool._key(args, env))
+        assert not pool._pending.get(pool._key(args, env))
+        assert pool.run_pass(args, env, _jobdir(tmp_path / "2"), _watcher()) is None
+        _wait_idle(pool, args, env)
+
+    def test_warm_pass_round_trips_files(self, pool, fake_engine, tmp_path):
+        args, env = [fake_engine, "-interaction=nonstopmode", "-no-pdf"], {}
+        pool._replenish(pool._key(args, env), args, env)
+        jobdir = _jobdir(tmp_path, tex="body", aux="seed;")
+        result = pool.run_pass(args, env, jobdir, _watcher())
+        assert result.returncode == 0
+        assert (jobdir / "document.xdv").read_text() == "body"
+        assert (jobdir / "document.aux").read_text() == "seed;pass;"
+        cmdline = result.stdout.decode()
+        assert "-interaction=scrollmode" in cmdline
+        assert "-interaction=nonstopmode" not in cmdline
+        assert "-jobname=document" in cmdline
+        assert engine_pool._PARK_LINE in cmdline
+
+    def test_leased_process_is_replaced(self, pool, fake_engine, tmp_path):
+        args, env = [fake_engine], {}
+        assert pool.run_pass(args, env, _jobdir(tmp_path / "1"), _watcher()) is None
+        pool._replenish(pool._key(args, env), args, env)
+        assert pool.run_pass(args, env, _jobdir(tmp_path / "2"), _watcher()) is not None
+        _wait_idle(pool, args, env)
+
+    def test_key_includes_search_path(self, pool, fake_engine, tmp_path):
+        args = [fake_engine]
+        pool._replenish(pool._key(args, {"TEXINPUTS": "a"}), args, {"TEXINPUTS": "a"})
+        jobdir = _jobdir(tmp_path)
+        assert pool.run_pass(args, {"TEXINPUTS": "b"}, jobdir, _watcher()) is None
+
+    def test_timeout_kills_process(self, pool, fake_engine, tmp_path):
+        args, env = [fake_engine], {}
+        pool._replenish(pool._key(args, env), args, env)
+        with pytest.raises(RuntimeError, match="stalled"):
+            pool.run_pass(
+                args, env, _jobdir(tmp_path, tex="SLEEP"), _watcher(stall_timeout=0.5)
+            )
+
+    def test_close_stops_idle_processes(self, fake_engine):
+        pool = EnginePool(size=2)
+        args, env = [fake_engine], {}
+        pool._replenish(pool._key(args, env), args, env)
+        procs = [w.proc for w in pool._idle[pool._key(args, env)]]
+        root = pool._root
+        pool.close()
+        assert all(p.poll() is not None for p in procs)
+        assert not root.exists()
+
+    def test_concurrent_passes_do_not_overfill(self, fake_engine, tmp_path):
+        pool = EnginePool(size=2)
+        args, env = [fake_engine], {}
+        key = pool._key(args, env)
+        try:
+            threads = [
+                threading.Thread(
+                    target=pool.run_pass, args=(args, env, _jobdir(tmp_path / str(i)), _watcher())
+                )
+                for i in range(8)
+            ] + [threading.Thread(target=pool._replenish, args=(key, args, env)) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            deadline = time.monotonic() + 10
+            while pool._pending.get(key):
+                assert time.monotonic() < deadline, "spawns did not finish"
+                time.sleep(0.01)
+            assert len(pool._idle[key]) == 2
+        finally:
+            pool.close()
+
+    def test_spawn_failure_releases_reservation(self, pool, tmp_path):
+        args, env = [str(tmp_path / "missing-xelatex")], {}
+        key = pool._key(args, env)
+        pool._replenish(key, args, env)
+        assert pool._pending[key] == 0
+        assert not pool._idle.get(key)
+
+    def test_least_recently_used_key_is_evicted(self, fake_engine, tmp_path):
+        pool = EnginePool(size=1, max_idle=2)
+        keys = []
+        try:
+            for name in ("a", "b", "c"):
+                args, env = [fake_engine], {"TEXINPUTS": name}
+                pool.run_pass(args, env, _jobdir(tmp_path / name), _watcher())
+                key = pool._key(args, env)
+                pool._replenish(key, args, env)
+                keys.append(key)
+            a, b, c = keys
+            assert a not in pool._idle
+            assert len(pool._idle[b]) == len(pool._idle[c]) == 1
+        finally:
+            pool.close()
+
+    def test_evicted_processes_are_killed(self, fake_engine):
+        pool = EnginePool(size=1, max_idle=1)
+        try:
+            first = [fake_engine], {"TEXINPUTS": "a"}
+            pool._replenish(pool._key(*first), *first)
+            proc = pool._idle[pool._key(*first)][0].proc
+            second = [fake_engine], {"TEXINPUTS": "b"}
+            pool._replenish(pool._key(*second), *second)
+            assert proc.poll() is not None
+            assert list(pool._idle) == [pool._key(*second)]
+        finally:
+            pool.close()
+
+    def test_size_must_be_positive(self):
+        with pytest.raises(ValueError, match="at least 1"):
+            EnginePool(size=0)
+        with pytest.raises(ValueError, match="max_idle"):
+            EnginePool(size=2, max_idle=1)
+
+
+def test_module_pool_start_stop():
+    assert engine_pool.get_pool() is None
+    pool = engine_pool.start(size=1)
+    try:
+        assert engine_pool.get_pool() is pool
+    finally:
+        engine_pool.stop()
+    assert engine_pool.get_pool() is None
+
+
+@pytest.mark.skipif(not HAS_XELATEX, reason="xelatex not installed")
+def test_render_through_pool():
+    from klartex.renderer import render
+
+    data = {"page_template": "clean", "body": [{"type": "text", "text": "Hej"}]}
+    engine_pool.start(size=1)
+    try:
+        for _ in range(3):
+            assert render("_block", data)[:5] == b"%PDF-"
+    finally:
+        engine_pool.stop()
@@ -0,0 +1,154 @@
+"""Tests for TeX engine backends and automatic engine selection."""
+
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from klartex.engines import ENGINES, get_engine, needs_unicode_engine, select_engine
+from klartex.renderer import _render_block_engine
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+HAS_PDFLATEX = shutil.which("pdflatex") is not None
+HAS_LUALATEX = shutil.which("lualatex") is not None
+
+
+class TestSelectEngine:
+    def test_latin1_block_document_uses_pdflatex(self):
+        data = json.loads((FIXTURES / "block_simple.json").read_text())
+        assert select_engine(_render_block_engine(data)) == "pdflatex"
+
+    def test_typographic_punctuation_stays_on_pdflatex(self):
+        assert select_engine("Hej – “citat” … 100 €") == "pdflatex"
+
+    @pytest.mark.parametrize("char", ["′", "″"])
+    def test_characters_inputenc_does_not_declare_need_unicode_engine(self, char):
+        assert select_engine(f"5{char} 30{char}") == "xelatex"
+
+    def test_non_latin1_text_needs_unicode_engine(self):
+        assert select_engine("Łódź") == "xelatex"
+        assert select_engine("東京") == "xelatex"
+
+    @pytest.mark.parametrize(
+        "source",
+        [
+            r"\setmainfont{Inter}",
+            r"\newfontfamily\brand{Inter}",
+            r"\usepackage{fontspec}",
+        ],
+    )
+    def test_fontspec_needs_unicode_engine(self, source):
+        assert needs_unicode_engine(source)
+
+    def test_external_page_template_font_is_detected(self):
+        tex = _render_block_engine({"body": []}, page_template_source=r"\setmainfont{Inter}")
+        assert select_engine(tex) == "xelatex"
+
+
+class TestEngines:
+    def test_unknown_engine_raises(self):
+        with pytest.raises(ValueError, match="Unknown engine 'tectonic'"):
+            get_engine("tectonic")
+
+    def test_only_xelatex_stops_at_xdv(self):
+        assert "-no-pdf" in ENGINES["xelatex"].pass_args()
+        assert "-no-pdf" not in ENGINES["pdflatex"].pass_args()
+        assert "-no-pdf" not in ENGINES["lualatex"].pass_args()
+
+    def test_render_rejects_unknown_engine_before_compiling(self):
+        from klartex.renderer import render
+
+        with pytest.raises(ValueError, match="Unknown engine"):
+            render("_block", {"body": []}, engine="tectonic")
+
+
+def _fake_engine_run(monkeypatch):
+    """Patch subprocess.run with a fake engine that writes the PDF itself."""
+    from klartex import renderer as renderer_mod
+
+    monkeypatch.setattr(renderer_mod.shutil, "which", lambda name: f"/usr/bin/{name}")
+    calls = []
+
+    def fake_run(cmd, cwd, **kwargs):
+        calls.append(cmd)
+        (Path(cwd) / "document.aux").write_text("aux")
+        (Path(cwd) / "document.pdf").write_bytes(b"%PDF-direct")
+        return subprocess.CompletedProcess(cmd, 0, stdout=b"", stderr=b"")
+
+    monkeypatch.setattr(renderer_mod.subprocess, "run", fake_run)
+    monkeypatch.setattr(renderer_mod, "_run_pass", fake_run)
+    return calls
+
+
+def test_pdflatex_writes_pdf_without_driver(monkeypatch):
+    from klartex import renderer as renderer_mod
+
+    formats = []
+    monkeypatch.setattr(
+        renderer_mod, "ensure_format", lambda preamble, engine: formats.append(engine)
+    )
+    calls = _fake_engine_run(monkeypatch)
+    tex = _render_block_engine({"body": []})
+    result = renderer_mod._compile_tex(tex, engine="pdflatex")
+    assert result.pdf == b"%PDF-direct"
+    assert result.engine == "pdflatex"
+    assert [c[0] for c in calls] == ["pdflatex", "pdflatex"]
+    assert formats == ["pdflatex"]
+
+
+def test_lualatex_skips_formats(monkeypatch):
+    from klartex import renderer as renderer_mod
+
+    def no_formats(preamble, engine):
+        raise AssertionError("lualatex must not use formats")
+
+    monkeypatch.setattr(renderer_mod, "ensure_format", no_formats)
+    calls = _fake_engine_run(monkeypatch)
+    result = renderer_mod._compile_tex(_render_block_engine({"body": []}), engine="lualatex")
+    assert result.engine == "lualatex"
+    assert all(not any(a.startswith("-fmt=") for a in c) for c in calls)
+
+
+def test_missing_engine_names_it(monkeypatch):
+    from klartex import renderer as renderer_mod
+
+    monkeypatch.setattr(renderer_mod.shutil, "which", lambda name: None)
+    with pytest.raises(RuntimeError, match="pdflatex not found"):
+        renderer_mod._compile_tex("x", engine="pdflatex")
+
+
+def test_render_auto_resolves_engine(monkeypatch):
+    from klartex import renderer as renderer_mod
+
+    seen = []
+
+    def fake_compile(tex_source, engine, **kwargs):
+        seen.append(engine)
+        return renderer_mod.RenderResult(pdf=b"%PDF-", passes=1, engine=engine)
+
+    monkeypatch.setattr(renderer_mod, "_compile_tex", fake_compile)
+    data = {"body": [{"type": "text", "text": "Hej"}]}
+    renderer_mod.render("_block", data, engine="auto", aux_store=False)
+    data = {"body": [{"type": "text", "text": "Łódź"}]}
+    renderer_mod.render("_block", data, engine="auto", aux_store=False)
+    assert seen == ["pdflatex", "xelatex"]
+
+
+@pytest.mark.skipif(not HAS_PDFLATEX, reason="pdflatex not installed")
+@pytest.mark.parametrize("template_name", ["kvitto", "budgetrapport"])
+def test_render_pdflatex(template_name):
+    from klartex.renderer import render
+
+    data = json.loads((FIXTURES / f"{template_name}.json").read_text())
+    assert render(template_name, data, engine="pdflatex")[:5] == b"%PDF-"
+
+
+@pytest.mark.skipif(not HAS_LUALATEX, reason="lualatex not installed")
+def test_render_lualatex():
+    from klartex.renderer import render
+
+    data = json.loads((FIXTURES / "block_simple.json").read_text())
+    assert render("_block", data, engine="lualatex")[:5] == b"%PDF-"
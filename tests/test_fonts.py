@@ -0,0 +1,167 @@
+"""Tests for the page-template font preflight."""
+
+import pytest
+
+from klartex import fonts
+from klartex.fonts import FontFiles, apply_font_files, referenced_fonts, resolve_font
+
+
+@pytest.fixture
+def fake_fontconfig(monkeypatch, tmp_path):
+    """Pretend fontconfig knows 'Inter' (static faces in one directory,
+    medium sorting before regular) and 'Flex' (variable font only). Returns
+    the list of queried families."""
+    monkeypatch.setenv("KLARTEX_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(fonts, "_resolved", None)
+    monkeypatch.setattr(fonts.shutil, "which", lambda name: f"/usr/bin/{name}")
+    font_dir = tmp_path / "fonts"
+    font_dir.mkdir()
+    faces = {
+        "Inter-Medium.otf": (100, 0),
+        "Inter-MediumItalic.otf": (100, 100),
+        "Inter-Regular.otf": (80, 0),
+        "Inter-Bold.otf": (200, 0),
+        "Inter-Italic.otf": (80, 100),
+        "Inter-BoldItalic.otf": (200, 100),
+    }
+    for name in [*faces, "Flex.ttf"]:
+        (font_dir / name).write_bytes(b"")
+    queried = []
+
+    def fake_fc_list(family, fmt):
+        queried.append(family)
+        if family == "Inter":
+            rows = [(str(font_dir / n), w, s) for n, (w, s) in faces.items()]
+        elif family == "Flex":
+            rows = [(str(font_dir / "Flex.ttf"), "[100 900]", 0)]
+        else:
+            rows = []
+        if "%{weight}" in fmt:
+            return [f"{f}\t{w}\t{s}" for f, w, s in rows]
+        return [f for f, _, _ in rows]
+
+    monkeypatch.setattr(fonts, "_fc_list", fake_fc_list)
+    return queried, font_dir
+
+
+class TestReferencedFonts:
+    def test_font_commands(self):
+        source = (
+            r"\setmainfont{Inter}[Scale=0.95]"
+            r"\setsansfont[Ligatures=TeX]{Open Sans}"
+            r"\newfontfamily\brand{Brand Serif}"
+            r"\setmonofont{DejaVuSansMono.ttf}"
+        )
+        assert referenced_fonts(source) == ["Inter", "Open Sans", "Brand Serif"]
+
+    def test_package_name_is_not_a_font(self):
+        assert referenced_fonts(r"\usepackage{fontspec}") == []
+
+
+class TestApplyFontFiles:
+    def test_rewrites_to_file_loading(self, fake_fontconfig):
+        _, font_dir = fake_fontconfig
+        out = apply_font_files(r"\setmainfont{Inter}")
+        assert out == (
+            rf"\setmainfont{{Inter-Regular.otf}}[Path={font_dir}/, "
+            "BoldFont=Inter-Bold.otf, ItalicFont=Inter-Italic.otf, "
+            "BoldItalicFont=Inter-BoldItalic.otf]"
+        )
+
+    def test_keeps_user_options(self, fake_fontconfig):
+        out = apply_font_files(r"\newfontfamily\brand[Scale=0.9]{Inter}[Color=red]")
+        assert out.startswith(r"\newfontfamily\brand{Inter-Regular.otf}[Path=")
+        assert out.endswith("Scale=0.9, Color=red]")
+
+    def test_face_options_are_left_alone(self, fake_fontconfig):
+        source = r"\setmainfont{Inter}[BoldFont=Inter Black]"
+        assert apply_font_files(source) == source
+
+    def test_file_names_are_left_alone(self, fake_fontconfig):
+        queried, _ = fake_fontconfig
+        source = r"\setmainfont{Inter-Regular.otf}"
+        assert apply_font_files(source) == source
+        assert queried == []
+
+    def test_variable_font_loads_by_name(self, fake_fontconfig):
+        assert apply_font_files(r"\setmainfont{Flex}") == r"\setmainfont{Flex}"
+
+    def test_missing_font_fails_fast(self, fake_fontconfig):
+        with pytest.raises(ValueError, match=r"Font 'Nope' \(\\setsansfont in page template\)"):
+            apply_font_files(r"\setsansfont{Nope}")
+
+    def test_without_fontconfig_source_is_unchanged(self, monkeypatch):
+        monkeypatch.setattr(fonts.shutil, "which", lambda name: None)
+        assert apply_font_files(r"\setmainfont{Nope}") == r"\setmainfont{Nope}"
+
+
+class TestFacePicking:
+    def test_medium_only_stands_in_for_regular(self, fake_fontconfig):
+        files = resolve_font("Inter")
+        assert files.regular.endswith("Inter-Regular.otf")
+        assert files.italic.endswith("Inter-Italic.otf")
+
+    def test_medium_without_regular(self):
+        faces = [("A-Medium.otf", 100, 0), ("A-Thin.otf", 0, 0), ("A-MediumItalic.otf", 100, 100)]
+        assert fonts._pick(faces, fonts._REGULAR_WEIGHTS, {0}) == "A-Medium.otf"
+        assert fonts._pick(faces, fonts._REGULAR_WEIGHTS, {100, 110}) == "A-MediumItalic.otf"
+
+
+class TestResolutionCache:
+    def test_resolved_once(self, fake_fontconfig):
+        queried, _ = fake_fontconfig
+        resolve_font("Inter")
+        resolve_font("Inter")
+        assert queried == ["Inter"]
+
+    def test_persisted_across_processes(self, fake_fontconfig, monkeypatch):
+        queried, _ = fake_fontconfig
+        first = resolve_font("Inter")
+        monkeypatch.setattr(fonts, "_resolved", None)
+        assert resolve_font("Inter") == first
+        assert queried == ["Inter"]
+
+    def test_variable_font_resolved_once(self, fake_fontconfig, monkeypatch):
+        queried, _ = fake_fontconfig
+        for _ in range(3):
+            assert apply_font_files(r"\setmainfont{Flex}") == r"\setmainfont{Flex}"
+        monkeypatch.setattr(fonts, "_resolved", None)
+        assert resolve_font("Flex") is None
+        assert fonts.font_exists("Flex")
+        assert queried == ["Flex"]
+
+    def test_concurrent_resolution(self, fake_fontconfig, monkeypatch):
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(resolve_font, ["Inter", "Flex", "Nope"] * 20))
+        assert {r.regular for r in results if r} == {resolve_font("Inter").regular}
+        monkeypatch.setattr(fonts, "_resolved", None)
+        assert set(fonts._load_cache()) == {"Inter", "Flex"}
+
+    def test_stale_entry_is_re_resolved(self, fake_fontconfig):
+        queried, font_dir = fake_fontconfig
+        fonts._load_cache()["Inter"] = FontFiles(regular=str(font_dir / "gone.otf"))
+        assert resolve_font("Inter").regular.endswith("Inter-Regular.otf")
+        assert queried == ["Inter"]
+
+
+def test_render_fails_before_compiling(fake_fontconfig, monkeypatch):
+    from klartex import renderer as renderer_mod
+
+    def no_compile(*args, **kwargs):
+        raise AssertionError("xelatex must not start")
+
+    monkeypatch.setattr(renderer_mod, "_compile_tex", no_compile)
+    with pytest.raises(ValueError, match="Font 'Nope'"):
+        renderer_mod.render(
+            "_block",
+            {"body": [{"type": "text", "text": "x"}]},
+            page_template_source=r"\setmainfont{Nope}",
+        )
+
+
+def test_preflight_covers_given_sources(fake_fontconfig):
+    resolved = fonts.preflight_fonts({"custom": r"\setmainfont{Inter}\setsansfont{Nope}"})
+    assert resolved["Inter"].bold.endswith("Inter-Bold.otf")
+    assert resolved["Nope"] is None
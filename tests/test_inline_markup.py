@@ -1,5 +1,8 @@
 """Tests for inline markup → LaTeX (#25)."""
 
+import random
+import re
+
 from klartex.inline_markup import render_inline
 
 
@@ -87,3 +90,99 @@ def test_multiple_newlines():
 
 def test_newline_works_with_other_markup():
     assert render_inline("**bold**\n*italic*") == r"\textbf{bold} \\ \textit{italic}"
+
+
+# The regex-pass implementation render_inline replaced, kept as the oracle
+# for the tokenizer.
+_CODE_RE = re.compile(r"`([^`]+)`")
+# Bold must run before italic (longer marker wins). Non-greedy so adjacent
+# pairs don't merge: ``**a** **b**`` → two bolds, not one.
+_BOLD_RE = re.compile(r"\*\*(.+?)\*\*", re.DOTALL)
+# Italic: a single * not adjacent to another *.
+_ITALIC_RE = re.compile(r"(?<!\*)\*([^*\n]+)\*(?!\*)")
+
+# (open, close) for paired double quotes per language.
+_QUOTE_PAIRS = {
+    "sv": ("”", "”"),  # ”…” — Språkrådet style
+    "en": ("“", "”"),  # “…”
+}
+
+_CODE_PLACEHOLDER = "\x00KX_CODE_{}\x00"
+
+
+def _legacy_render_inline(text: str, lang: str = "sv", newlines: str = "break") -> str:
+    if not text:
+        return text
+
+    code_spans: list[str] = []
+
+    def stash(match: re.Match) -> str:
+        code_spans.append(match.group(1))
+        return _CODE_PLACEHOLDER.format(len(code_spans) - 1)
+
+    text = _CODE_RE.sub(stash, text)
+    text = _BOLD_RE.sub(r"\\textbf{\1}", text)
+    text = _ITALIC_RE.sub(r"\\textit{\1}", text)
+    text = _legacy_smart_quotes(text, lang)
+
+    for i, code in enumerate(code_spans):
+        text = text.replace(_CODE_PLACEHOLDER.format(i), f"\\texttt{{{code}}}")
+
+    # Literal newlines in JSON strings ("line 1\nline 2") become LaTeX line
+    # breaks within the current paragraph. For separate paragraphs, use
+    # separate text blocks. Done last so it doesn't interfere with the regex
+    # passes above that operate within a single line.
+    if newlines == "cell":
+        text = text.replace("\n", " \\newline ")
+    elif newlines == "space":
+        text = text.replace("\n", " ")
+    else:
+        text = text.replace("\n", " \\\\ ")
+
+    return text
+
+
+def _legacy_smart_quotes(text: str, lang: str) -> str:
+    open_q, close_q = _QUOTE_PAIRS.get(lang, _QUOTE_PAIRS["sv"])
+    if open_q == close_q:
+        return text.replace('"', open_q)
+    out: list[str] = []
+    in_quote = False
+    for ch in text:
+        if ch == '"':
+            out.append(close_q if in_quote else open_q)
+            in_quote = not in_quote
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+class TestMatchesLegacyRenderer:
+    ALPHABET = ["*", "*", "*", "`", '"', "\n", "a", "b", " ", "{", "\\"]
+
+    def test_random_markup(self):
+        rng = random.Random(20260117)
+        for _ in range(5000):
+            text = "".join(rng.choices(self.ALPHABET, k=rng.randint(0, 30)))
+            for lang in ("sv", "en", "de"):
+                for newlines in ("break", "cell", "space"):
+                    expected = _legacy_render_inline(text, lang, newlines)
+                    assert render_inline(text, lang, newlines) == expected, repr(text)
+
+    def test_tricky_cases(self):
+        for text in [
+            "***a***", "**a *b** c*", "*a **b** c*", "****", "**a** **b**", "*a**b*",
+            "a``b`c`", "**a `b** c`", "`x\ny`", '"a `"` b"', "*a\nb*", "** **", "*a* *b*",
+        ]:
+            for lang in ("sv", "en"):
+                assert render_inline(text, lang) == _legacy_render_inline(text, lang), repr(text)
+
+
+def test_results_are_cached():
+    render_inline.cache_clear()
+    for _ in range(100):
+        render_inline("Styrelseledamot", "sv", "cell")
+    info = render_inline.cache_info()
+    assert (info.hits, info.misses) == (99, 1)
+    # The newline mode is part of the key.
+    assert render_inline("a\nb", "sv", "cell") != render_inline("a\nb", "sv", "space")
@@ -0,0 +1,115 @@
+"""Tests for per-block TeX cost attribution."""
+
+import copy
+import shutil
+
+import pytest
+
+from klartex.block_engine import block_overrides
+from klartex.instrument import BlockCost, parse_block_costs, unwrap_log
+from klartex.renderer import RenderResult, _render_block_engine, render_detailed
+from klartex.tex_escape import escape_view
+
+HAS_XELATEX = shutil.which("xelatex") is not None
+
+DATA = {
+    "body": [
+        {"type": "heading", "text": "Rubrik"},
+        {"type": "list", "items": [
+            "a",
+            {"text": "b", "content": [{"type": "text", "text": "inne"}]},
+        ]},
+        {"type": "columns", "items": [[{"type": "text", "text": "v"}], [{"type": "text", "text": "h"}]]},
+        {"type": "clause", "number": "1.", "text": "Villkor", "content": [
+            {"type": "clause", "number": "1.1", "text": "Under"},
+        ]},
+    ]
+}
+
+
+def test_block_paths():
+    body = escape_view(DATA["body"], block_overrides(DATA["body"], paths=True))
+    assert body[0]["_kx_path"] == "body[0]"
+    assert body[1]["items"][1]["content"][0]["_kx_path"] == "body[1].items[1].content[0]"
+    assert body[2]["items"][1][0]["_kx_path"] == "body[2].items[1][0]"
+    assert body[3]["content"][0]["_kx_path"] == "body[3].content[0]"
+    assert "_kx_path" not in DATA["body"][0]
+
+
+class TestInstrumentedSource:
+    def test_off_by_default(self):
+        tex = _render_block_engine(copy.deepcopy(DATA))
+        assert "\\kxblockstart" not in tex
+        assert "klartex-instrument" not in tex
+
+    def test_every_block_is_marked(self):
+        data = escape_view(DATA, block_overrides(DATA["body"], paths=True))
+        tex = _render_block_engine(data, instrument=True)
+        assert "\\usepackage{klartex-instrument}" in tex
+        for path in (
+            "body[0]", "body[1]", "body[1].items[1].content[0]", "body[2]",
+            "body[2].items[0][0]", "body[2].items[1][0]", "body[3]", "body[3].content[0]",
+        ):
+            assert tex.count(f"\\kxblockstart{{{path}}}") == 1, path
+            assert tex.count(f"\\kxblockend{{{path}}}") == 1, path
+        assert tex.index("\\kxblockstart{body[3]}") < tex.index(
+            "\\kxblockstart{body[3].content[0]}"
+        ) < tex.index("\\kxblockend{body[3].content[0]}") < tex.index("\\kxblockend{body[3]}")
+
+
+class TestParseBlockCosts:
+    def test_times_and_pages(self):
+        log = "\n".join([
+            "KXTIME:start:body[0]:65536",
+            "KXTIME:end:body[0]:98304",
+            "KXTIME:start:body[1]:98304",
+            "KXPAGE:start:body[0]:1",
+            "KXPAGE:end:body[0]:1",
+            "KXPAGE:start:body[1]:1",
+            "KXTIME:end:body[1]:262144",
+            "KXPAGE:end:body[1]:3",
+        ])
+        costs = parse_block_costs(log)
+        assert list(costs) == ["body[0]", "body[1]"]
+        assert costs["body[0]"] == BlockCost("body[0]", 0.5, 1, 1)
+        assert costs["body[1]"] == BlockCost("body[1]", 2.5, 1, 3)
+
+    def test_unshipped_marker(self):
+        costs = parse_block_costs("KXTIME:start:body[9]:0\nKXTIME:end:body[9]:0")
+        assert costs["body[9]"].first_page is None
+
+    def test_wrapped_log_lines(self):
+        path = "body[12].items[3].content[0]" + ".content[1]" * 6
+        line = f"KXTIME:start:{path}:123456"
+        assert len(line) > 79
+        log = "\n".join([line[:79], line[79:], f"KXTIME:end:{path}:123456"])
+        assert unwrap_log(log).splitlines()[0] == line
+        assert list(parse_block_costs(log)) == [path]
+
+
+def test_render_passes_instrument_to_compile(monkeypatch):
+    from klartex import renderer as renderer_mod
+
+    seen = []
+
+    def fake_compile(tex_source, **kwargs):
+        seen.append((tex_source, kwargs["instrument"]))
+        return RenderResult(pdf=b"%PDF", passes=1, block_costs={})
+
+    monkeypatch.setattr(renderer_mod, "_compile_tex", fake_compile)
+    render_detailed("_block", DATA, instrument=True, aux_store=False)
+    tex, instrument = seen[0]
+    assert instrument is True
+    assert "\\kxblockstart{body[0]}" in tex
+    # The caller's data is not annotated.
+    assert "_kx_path" not in DATA["body"][0]
+
+
+@pytest.mark.skipif(not HAS_XELATEX, reason="xelatex not installed")
+def test_instrumented_render_reports_costs():
+    body = [{"type": "text", "text": "Ett"}, {"type": "page_break"}, {"type": "text", "text": "Två"}]
+    result = render_detailed("_block", {"body": body}, instrument=True, aux_store=False)
+    assert list(result.block_costs) == ["body[0]", "body[1]", "body[2]"]
+    assert result.block_costs["body[0]"].first_page == 1
+    assert result.block_costs["body[2]"].first_page == 2
+    assert all(c.seconds >= 0 for c in result.block_costs.values())
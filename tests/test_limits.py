@@ -0,0 +1,195 @@
+"""Tests for per-render resource limits."""
+
+import shutil
+import signal
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from klartex import ResourceLimitExceeded, ResourceLimits, render
+from klartex.limits import wait_cpu_seconds
+
+HAS_XELATEX = shutil.which("xelatex") is not None
+HAS_PRLIMIT = shutil.which("prlimit") is not None
+
+TEX = "\\documentclass{article}\\begin{document}x\\end{document}"
+
+
+def _fake_engine(monkeypatch, returncode=0, stdout=b""):
+    """Patch subprocess.run with an engine that exits with `returncode` and
+    prints `stdout`. Returns the command line of every call."""
+    from klartex import renderer as renderer_mod
+
+    monkeypatch.setattr(renderer_mod.shutil, "which", lambda name: f"/usr/bin/{name}")
+    calls = []
+
+    def fake_run(cmd, cwd, **kwargs):
+        calls.append(cmd)
+        if "xdvipdfmx" in cmd:
+            (Path(cwd) / "document.pdf").write_bytes(b"%PDF-stub")
+            return subprocess.CompletedProcess(cmd, 0, stdout=b"", stderr=b"")
+        (Path(cwd) / "document.aux").write_text("\\relax")
+        (Path(cwd) / "document.xdv").write_bytes(b"xdv")
+        return subprocess.CompletedProcess(cmd, returncode, stdout=stdout, stderr=b"")
+
+    monkeypatch.setattr(renderer_mod.subprocess, "run", fake_run)
+    monkeypatch.setattr(renderer_mod, "_run_pass", fake_run)
+    return calls
+
+
+class TestResourceLimits:
+    def test_no_rlimits_command_unchanged(self):
+        assert ResourceLimits().command(["xelatex", "x.tex"]) == ["xelatex", "x.tex"]
+        assert ResourceLimits(max_pages=3).command(["xelatex"]) == ["xelatex"]
+
+    def test_command_runs_under_prlimit(self, monkeypatch):
+        from klartex import limits as limits_mod
+
+        monkeypatch.setattr(limits_mod.shutil, "which", lambda name: f"/usr/bin/{name}")
+        cmd = ResourceLimits(address_space=100, cpu_seconds=5, file_size=7).command(["xelatex"])
+        assert cmd == [
+            "/usr/bin/prlimit", "--as=100:100", "--cpu=5:6", "--fsize=7:7", "--", "xelatex",
+        ]
+
+    def test_missing_prlimit(self, monkeypatch):
+        from klartex import limits as limits_mod
+
+        monkeypatch.setattr(limits_mod.shutil, "which", lambda name: None)
+        with pytest.raises(RuntimeError, match="prlimit not found"):
+            ResourceLimits(cpu_seconds=5).command(["xelatex"])
+
+    def test_cpu_signal_maps_to_cpu_limit(self):
+        limits = ResourceLimits(cpu_seconds=5)
+        with pytest.raises(ResourceLimitExceeded, match="CPU limit of 5s") as e:
+            limits.check_exit("xelatex", -signal.SIGXCPU, "")
+        assert e.value.limit == "cpu_seconds"
+
+    def test_sigkill_is_cpu_limit_only_when_cpu_reached_it(self):
+        limits = ResourceLimits(cpu_seconds=5)
+        # OOM killer, stall watchdog, pool shutdown, or an unmeasured run.
+        limits.check_exit("xelatex", -signal.SIGKILL, "")
+        limits.check_exit("xelatex", -signal.SIGKILL, "", cpu_used=0.4)
+        with pytest.raises(ResourceLimitExceeded) as e:
+            limits.check_exit("xelatex", -signal.SIGKILL, "", cpu_used=6.0)
+        assert e.value.limit == "cpu_seconds"
+
+    def test_signal_without_matching_limit_is_not_mapped(self):
+        ResourceLimits().check_exit("xelatex", -signal.SIGXCPU, "")
+        ResourceLimits(cpu_seconds=5).check_exit("xelatex", -signal.SIGXFSZ, "")
+
+    def test_file_size_signal(self):
+        limits = ResourceLimits(file_size=1024)
+        with pytest.raises(ResourceLimitExceeded) as e:
+            limits.check_exit("xdvipdfmx", -signal.SIGXFSZ, "")
+        assert e.value.limit == "file_size"
+
+    def test_out_of_memory_output(self):
+        limits = ResourceLimits(address_space=256 * 1024**2)
+        with pytest.raises(ResourceLimitExceeded) as e:
+            limits.check_exit("xelatex", 1, "! fatal: memory exhausted (xmalloc of 8 bytes).")
+        assert e.value.limit == "address_space"
+
+    def test_page_count(self):
+        output = "Output written on document.xdv (12 pages, 3456 bytes)."
+        ResourceLimits(max_pages=12).check_pages("xelatex", output)
+        with pytest.raises(ResourceLimitExceeded, match="12 pages") as e:
+            ResourceLimits(max_pages=11).check_pages("xelatex", output)
+        assert e.value.limit == "max_pages"
+
+    def test_is_a_runtime_error(self):
+        assert issubclass(ResourceLimitExceeded, RuntimeError)
+
+    @pytest.mark.skipif(not HAS_PRLIMIT, reason="prlimit not installed")
+    def test_command_applies_rlimits(self):
+        limits = ResourceLimits(cpu_seconds=7, file_size=4096)
+        out = subprocess.run(
+            limits.command([
+                sys.executable,
+                "-c",
+                "import resource;"
+                "print(resource.getrlimit(resource.RLIMIT_CPU),"
+                " resource.getrlimit(resource.RLIMIT_FSIZE))",
+            ]),
+            capture_output=True,
+            text=True,
+        ).stdout
+        assert out.strip() == "(7, 8) (4096, 4096)"
+
+    @pytest.mark.skipif(not HAS_PRLIMIT, reason="prlimit not installed")
+    def test_cpu_limit_kills_busy_loop(self):
+        limits = ResourceLimits(cpu_seconds=1)
+        result = subprocess.run(
+            limits.command([sys.executable, "-c", "while True: pass"]),
+            capture_output=True,
+            timeout=30,
+        )
+        with pytest.raises(ResourceLimitExceeded):
+            limits.check_exit("python", result.returncode, "")
+
+    @pytest.mark.skipif(not HAS_PRLIMIT, reason="prlimit not installed")
+    def test_sigkill_backstop_is_measured(self):
+        # The process ignores SIGXCPU, so the hard limit kills it.
+        limits = ResourceLimits(cpu_seconds=1)
+        proc = subprocess.Popen(limits.command([
+            sys.executable, "-c",
+            "import signal; signal.signal(signal.SIGXCPU, signal.SIG_IGN)\nwhile True: pass",
+        ]))
+        cpu = wait_cpu_seconds(proc)
+        assert proc.returncode == -signal.SIGKILL
+        assert cpu >= 1
+        with pytest.raises(ResourceLimitExceeded):
+            limits.check_exit("python", proc.returncode, "", cpu)
+
+    @pytest.mark.skipif(sys.platform != "linux", reason="/proc")
+    def test_sigkill_from_elsewhere_is_not_cpu(self):
+        limits = ResourceLimits(cpu_seconds=5)
+        proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        proc.kill()
+        cpu = wait_cpu_seconds(proc)
+        assert cpu is not None and cpu < 5
+        limits.check_exit("python", proc.returncode, "", cpu)
+
+
+class TestCompileWithLimits:
+    def test_engine_and_driver_run_under_prlimit(self, monkeypatch):
+        from klartex.renderer import _compile_tex
+
+        calls = _fake_engine(monkeypatch)
+        _compile_tex(TEX, limits=ResourceLimits(cpu_seconds=10))
+        assert len(calls) >= 2
+        assert all(Path(cmd[0]).name == "prlimit" and "--cpu=10:11" in cmd for cmd in calls)
+
+    def test_engine_killed_by_cpu_limit(self, monkeypatch):
+        from klartex.renderer import _compile_tex
+
+        _fake_engine(monkeypatch, returncode=-signal.SIGXCPU)
+        with pytest.raises(ResourceLimitExceeded, match="xelatex exceeded the CPU"):
+            _compile_tex(TEX, limits=ResourceLimits(cpu_seconds=10))
+
+    def test_unlimited_failure_stays_generic(self, monkeypatch):
+        from klartex.renderer import _compile_tex
+
+        _fake_engine(monkeypatch, returncode=-signal.SIGXCPU)
+        with pytest.raises(RuntimeError, match="xelatex failed") as e:
+            _compile_tex(TEX)
+        assert not isinstance(e.value, ResourceLimitExceeded)
+
+    def test_page_limit(self, monkeypatch):
+        from klartex.renderer import _compile_tex
+
+        _fake_engine(monkeypatch, stdout=b"Output written on document.xdv (40 pages, 1 bytes).")
+        with pytest.raises(ResourceLimitExceeded, match="40 pages"):
+            _compile_tex(TEX, limits=ResourceLimits(max_pages=30))
+
+
+@pytest.mark.skipif(not HAS_XELATEX, reason="xelatex not installed")
+def test_render_within_limits():
+    data = {"body": [{"type": "text", "text": "Hej"}]}
+    pdf = render(
+        "_block",
+        data,
+        limits=ResourceLimits(address_space=4 * 1024**3, cpu_seconds=60, max_pages=5),
+    )
+    assert pdf[:5] == b"%PDF-"
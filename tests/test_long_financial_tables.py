@@ -0,0 +1,178 @@
+"""Tests for page-breaking financial tables, transport lines and long rosters."""
+
+import copy
+import dataclasses
+import json
+import shutil
+import time
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+import yaml
+
+from klartex.block_engine import BLOCK_ENGINE_TEMPLATE, LONG_TABLE_ROWS
+from klartex.numformat import RunningTotals
+
+FIXTURES = Path(__file__).parent / "fixtures"
+HAS_XELATEX = shutil.which("xelatex") is not None
+
+
+def _sie_report(rows: int) -> dict:
+    """The sie-exportrapport fixture grown to about `rows` line items."""
+    data = json.loads((FIXTURES / "sie-exportrapport.json").read_text())
+    template = data["grupper"]
+    grupper = []
+    count = 0
+    while count < rows:
+        grupp = copy.deepcopy(template[len(grupper) % len(template)])
+        grupp["rubrik"] = f"{len(grupper)} — {grupp['rubrik']}"
+        grupp["poster"] = [
+            {**post, "post": f"{1000 + count + i} {post['post']}"}
+            for i, post in enumerate(grupp["poster"] * 25)
+        ]
+        count += len(grupp["poster"])
+        grupper.append(grupp)
+    data["grupper"] = grupper
+    return data
+
+
+def _recipe_tex(data: dict, recipe_path: Path | None = None) -> str:
+    """sie-exportrapport TeX, from `recipe_path` instead of the shipped recipe
+    if given."""
+    from klartex.renderer import _render_recipe, get_registry
+    from klartex.tex_escape import escape_view
+
+    info = get_registry()["sie-exportrapport"]
+    if recipe_path is not None:
+        info = dataclasses.replace(info, recipe_path=recipe_path)
+    return _render_recipe(info, escape_view(data))
+
+
+def _transport_recipe(tmp_path: Path) -> Path:
+    """The sie-exportrapport recipe with `transport: true` on its
+    resultatrakning."""
+    from klartex.renderer import get_registry
+
+    raw = yaml.safe_load(get_registry()["sie-exportrapport"].recipe_path.read_text())
+    for comp in raw["components"]:
+        if comp["type"] == "resultatrakning":
+            comp["options"] = {"transport": True}
+    path = tmp_path / "recipe.yaml"
+    path.write_text(yaml.safe_dump(raw, allow_unicode=True))
+    return path
+
+
+def _block_tex(body: list) -> str:
+    from klartex.block_engine import block_overrides
+    from klartex.renderer import _render_block_engine
+    from klartex.tex_escape import escape_view
+
+    escaped = escape_view({"body": body}, block_overrides(body))
+    return _render_block_engine(escaped)
+
+
+class TestRunningTotals:
+    def test_sums_are_exact_and_formatted(self):
+        carry = RunningTotals("a", "b")
+        assert carry.add({"a": 0.1, "b": 1000}) == "{0}{1\\,000}"
+        for _ in range(9):
+            carry.add({"a": 0.1, "b": -250})
+        assert carry.sums == [Decimal("1.0"), Decimal("-1250")]
+
+    def test_missing_fields_count_as_zero(self):
+        carry = RunningTotals("budget", "utfall_ar1")
+        carry.add({"budget": 5})
+        assert carry.add({"utfall_ar1": 7}) == "{5}{7}"
+
+
+class TestTransport:
+    def test_sie_report_has_no_transport_by_default(self):
+        data = json.loads((FIXTURES / "sie-exportrapport.json").read_text())
+        tex = _recipe_tex(data)
+        assert "\\begin{resultatrakning}{2025}{2024}" in tex
+        assert "\\kxtransport" not in tex
+
+    def test_recipe_option_carries_running_totals(self, tmp_path):
+        data = json.loads((FIXTURES / "sie-exportrapport.json").read_text())
+        tex = _recipe_tex(data, _transport_recipe(tmp_path))
+        assert "\\begin{resultatrakning}[transport]" in tex
+        posts = sum(len(g["poster"]) for g in data["grupper"])
+        assert tex.count("\\kxtransport{") == posts
+        # 84 000 + 36 000 after the second line item.
+        assert "\\kxtransport{{120\\,000}{112\\,000}}" in tex
+
+    def test_block_option(self):
+        block = json.loads((FIXTURES / "block_budgettabell.json").read_text())["body"][1]
+        plain = _block_tex([block])
+        assert "\\begin{budgettabell}{" in plain
+        assert "\\kxtransport" not in plain
+        tex = _block_tex([{**block, "transport": True}])
+        assert "\\begin{budgettabell}[transport]" in tex
+        assert "\\kxtransport{{50\\,000}{45\\,000}{42\\,000}}" in tex
+        assert "\\kxtransport{{68\\,000}{60\\,000}{54\\,000}}" in tex
+
+    def test_nested_tables_do_not_break(self):
+        block = json.loads((FIXTURES / "block_budgettabell.json").read_text())["body"][1]
+        tex = _block_tex([{"type": "columns", "items": [[{**block, "transport": True}], []]}])
+        assert "\\begin{budgettabell}[nobreak]" in tex
+        assert "\\kxtransport" not in tex
+
+
+class TestLongRoster:
+    @staticmethod
+    def _roster(n):
+        people = [{"name": f"Person {i}", "role": "Medlem"} for i in range(n)]
+        return {"type": "name_roster", "title": "Medlemmar", "people": people}
+
+    def test_long_roster_uses_environment(self):
+        tex = _block_tex([self._roster(LONG_TABLE_ROWS + 1)])
+        assert "\\begin{rollista}{Medlemmar}" in tex
+        assert "\\namnrollista" not in tex
+
+    def test_short_and_nested_rosters_keep_macro(self):
+        assert "\\namnrollista{" in _block_tex([self._roster(3)])
+        nested = _block_tex([{"type": "columns", "items": [[self._roster(100)], []]}])
+        assert "\\namnrollista{" in nested
+        assert "rollista}" not in nested
+
+
+class TestScaling:
+    """Source size and render time per line item stay flat as reports grow."""
+
+    @staticmethod
+    def _measure(rows):
+        data = _sie_report(rows)
+        posts = sum(len(g["poster"]) for g in data["grupper"])
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            tex = _recipe_tex(data)
+            best = min(best, time.perf_counter() - start)
+        return posts, len(tex), best
+
+    def test_per_row_cost_is_flat(self):
+        small_rows, small_size, small_time = self._measure(1_000)
+        big_rows, big_size, big_time = self._measure(10_000)
+        assert big_rows >= 10 * small_rows * 0.9
+        size_ratio = (big_size / big_rows) / (small_size / small_rows)
+        assert 0.9 < size_ratio < 1.15
+        assert (big_time / big_rows) / (small_time / small_rows) < 3
+
+    @pytest.mark.skipif(not HAS_XELATEX, reason="xelatex not installed")
+    def test_long_report_compiles_across_pages(self):
+        from klartex.renderer import render_detailed
+
+        events = []
+        result = render_detailed(
+            "sie-exportrapport", _sie_report(600), aux_store=False, progress=events.append
+        )
+        assert result.pdf[:5] == b"%PDF-"
+        assert max(e.pages for e in events) > 5
+
+
+@pytest.mark.skipif(not HAS_XELATEX, reason="xelatex not installed")
+def test_long_roster_compiles():
+    from klartex.renderer import render
+
+    assert render(BLOCK_ENGINE_TEMPLATE, {"body": [TestLongRoster._roster(400)]})[:5] == b"%PDF-"
@@ -0,0 +1,99 @@
+"""Tests for Python-side formatting of financial amounts."""
+
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from klartex.numformat import format_amount
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (0, "0"),
+        (7, "7"),
+        (999, "999"),
+        (1000, "1\\,000"),
+        (45000, "45\\,000"),
+        (1234567, "1\\,234\\,567"),
+        (-26000, "$-$26\\,000"),
+        (-512, "$-$512"),
+        (1234.5, "1\\,235"),
+        (2.5, "3"),
+        (-2.5, "$-$3"),
+        (0.49, "0"),
+        (-0.4, "0"),
+        (12345.678, "12\\,346"),
+        ("4711", "4\\,711"),
+    ],
+)
+def test_swedish_conventions(value, expected):
+    assert format_amount(value) == expected
+
+
+def test_decimal_places():
+    assert format_amount(1234.567, places=2) == "1\\,234,57"
+    assert format_amount(0.05, places=1) == "0,1"
+    assert format_amount(-3, places=2) == "$-$3,00"
+
+
+def test_non_numbers_pass_through():
+    assert format_amount(None) == ""
+    assert format_amount("") == ""
+    assert format_amount("n/a") == "n/a"
+
+
+class TestTemplates:
+    def test_block_engine_tables_use_formatted_amounts(self):
+        from klartex.renderer import _render_block_engine
+
+        data = json.loads((FIXTURES / "block_budgettabell.json").read_text())
+        tex = _render_block_engine(data)
+        assert "{50\\,000}{45\\,000}{42\\,000}" in tex
+        assert "{$-$26\\,000}" in tex
+        assert "\\klartexnum" not in tex
+        assert "numformat" not in tex
+
+    def test_recipe_tables_use_formatted_amounts(self):
+        from klartex.renderer import _render_recipe, get_registry
+
+        info = get_registry()["resultatrakning"]
+        example = json.loads((info.recipe_path.parent / "example.json").read_text())
+        tex = _render_recipe(info, example)
+        assert "\\rrpost" in tex
+        assert "\\," in tex
+        assert "\\klartexnum" not in tex
+
+    def test_component_packages_do_not_load_siunitx(self):
+        cls = Path(__file__).parent.parent / "klartex" / "cls"
+        for name in ("klartex-resultatrakning.sty", "klartex-budgettabell.sty"):
+            source = (cls / name).read_text()
+            assert "numformat" not in source
+            assert "siunitx" not in source
+
+
+@pytest.mark.skipif(shutil.which("xelatex") is None, reason="xelatex not installed")
+def test_raw_latex_amounts_are_formatted_in_tex():
+    from klartex.block_engine import BLOCK_ENGINE_TEMPLATE
+    from klartex.renderer import render
+
+    source = (
+        "\\begin{resultatrakning}{2025}{2024}\n"
+        "\\rrpost{Plain}{1234.5}{-500}\n"
+        "\\rrsumma{Formatted}{1\\,235}{$-$500}\n"
+        "\\end{resultatrakning}"
+    )
+    body = [
+        {"type": "latex", "source": source},
+        {
+            "type": "resultatrakning",
+            "rubrik_ar1": "2025",
+            "rubrik_ar2": "2024",
+            "grupper": [{"rubrik": "G", "poster": [{"post": "P", "belopp_ar1": 1234.5}]}],
+        },
+    ]
+    assert render(BLOCK_ENGINE_TEMPLATE, {"body": body})[:5] == b"%PDF-"
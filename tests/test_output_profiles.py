@@ -0,0 +1,102 @@
+"""Tests for PDF output profiles."""
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from klartex.engines import ENGINES
+from klartex.output_profiles import (
+    OUTPUT_PROFILES,
+    apply_output_profile,
+    get_output_profile,
+)
+from klartex.tex_format import FORMAT_MARKER, split_preamble
+
+HAS_XELATEX = shutil.which("xelatex") is not None
+
+TEX = f"\\documentclass{{klartex-base}}\n{FORMAT_MARKER}\n\\begin{{document}}x\\end{{document}}"
+
+
+class TestOutputProfile:
+    def test_default_changes_nothing(self):
+        profile = get_output_profile("default")
+        assert profile.driver_args() == []
+        for engine in ENGINES.values():
+            assert apply_output_profile(TEX, engine, profile) == TEX
+
+    def test_archive_driver_args(self):
+        assert OUTPUT_PROFILES["archive"].driver_args() == ["-z", "9", "-V", "7"]
+
+    def test_preview_driver_args(self):
+        assert OUTPUT_PROFILES["preview"].driver_args() == ["-z", "0"]
+
+    def test_pdflatex_setup(self):
+        setup = OUTPUT_PROFILES["archive"].engine_setup(ENGINES["pdflatex"])
+        assert setup.splitlines() == [
+            "\\pdfcompresslevel=9",
+            "\\pdfobjcompresslevel=2",
+            "\\pdfminorversion=7",
+        ]
+
+    def test_lualatex_setup(self):
+        setup = OUTPUT_PROFILES["preview"].engine_setup(ENGINES["lualatex"])
+        assert setup.splitlines() == [
+            "\\pdfvariable compresslevel=0",
+            "\\pdfvariable objcompresslevel=0",
+        ]
+
+    def test_xelatex_has_no_engine_setup(self):
+        assert OUTPUT_PROFILES["archive"].engine_setup(ENGINES["xelatex"]) == ""
+
+    def test_setup_goes_after_format_preamble(self):
+        tex = apply_output_profile(TEX, ENGINES["pdflatex"], OUTPUT_PROFILES["archive"])
+        assert split_preamble(tex) == split_preamble(TEX)
+        assert "\\pdfminorversion=7\n\\begin{document}" in tex
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError, match="Unknown output profile 'tiny'"):
+            get_output_profile("tiny")
+
+    def test_render_rejects_unknown_profile_before_compiling(self):
+        from klartex.renderer import render
+
+        with pytest.raises(ValueError, match="Unknown output profile"):
+            render("_block", {"body": []}, output_profile="tiny")
+
+
+def test_compile_passes_profile_to_driver(monkeypatch):
+    from klartex import renderer as renderer_mod
+
+    monkeypatch.setattr(renderer_mod.shutil, "which", lambda _: "/usr/bin/xelatex")
+    monkeypatch.setattr(renderer_mod, "ensure_format", lambda preamble, engine: None)
+    calls = []
+
+    def fake_run(cmd, cwd, **kwargs):
+        calls.append(cmd)
+        if cmd[0] == "xdvipdfmx":
+            (Path(cwd) / "document.pdf").write_bytes(b"%PDF-stub")
+        else:
+            (Path(cwd) / "document.aux").write_text("aux")
+            (Path(cwd) / "document.xdv").write_bytes(b"xdv")
+        return subprocess.CompletedProcess(cmd, 0, stdout=b"", stderr=b"")
+
+    monkeypatch.setattr(renderer_mod.subprocess, "run", fake_run)
+    monkeypatch.setattr(renderer_mod, "_run_pass", fake_run)
+    renderer_mod._compile_tex(TEX, output_profile="archive")
+    driver = calls[-1]
+    assert driver[0] == "xdvipdfmx"
+    assert driver[driver.index("-z") + 1] == "9"
+    assert driver[-1] == "document.xdv"
+
+
+@pytest.mark.skipif(not HAS_XELATEX, reason="xelatex not installed")
+def test_archive_is_smaller_than_preview():
+    from klartex.renderer import render
+
+    data = {"body": [{"type": "text", "text": "Hej " * 400}]}
+    archive = render("_block", data, output_profile="archive", aux_store=False)
+    preview = render("_block", data, output_profile="preview", aux_store=False)
+    assert archive.startswith(b"%PDF-1.7")
+    assert len(archive) < len(preview)
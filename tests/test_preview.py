@@ -0,0 +1,137 @@
+"""Tests for draft preview rendering."""
+
+import json
+import re
+import shutil
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from klartex.cli import app
+from klartex.preview import Preview, parse_block_range
+from klartex.renderer import RenderResult, _render_block_engine, render_detailed
+from klartex.tex_format import split_preamble
+
+HAS_XELATEX = shutil.which("xelatex") is not None
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+DATA = {
+    "body": [
+        {"type": "heading", "text": "Rubrik"},
+        {"type": "text", "text": "Ett"},
+        {"type": "text", "text": "Två"},
+        {"type": "text", "text": "Tre"},
+    ]
+}
+
+
+class TestPreviewOptions:
+    def test_select_body(self):
+        body = list(range(10))
+        assert Preview().select_body(body) is body
+        assert Preview(blocks=(2, 5)).select_body(body) == [2, 3, 4]
+        assert Preview(blocks=(8, None)).select_body(body) == [8, 9]
+
+    def test_range_past_end(self):
+        with pytest.raises(ValueError, match="body has 3 blocks"):
+            Preview(blocks=(3, 4)).select_body([1, 2, 3])
+
+    @pytest.mark.parametrize("kwargs", [{"pages": 0}, {"blocks": (5, 5)}, {"blocks": (-1, 2)}])
+    def test_invalid(self, kwargs):
+        with pytest.raises(ValueError):
+            Preview(**kwargs)
+
+    def test_parse_block_range(self):
+        assert parse_block_range("10:20") == (10, 20)
+        assert parse_block_range(":5") == (0, 5)
+        assert parse_block_range("7:") == (7, None)
+        with pytest.raises(ValueError, match="expected START:END"):
+            parse_block_range("7")
+
+
+class TestPreviewSource:
+    def test_full_render_is_unchanged(self):
+        tex = _render_block_engine(DATA)
+        assert "\\documentclass{klartex-base}" in tex
+        assert "\\kxpreviewcheck" not in tex
+
+    def test_class_option_and_page_limit(self):
+        tex = _render_block_engine(DATA, preview=Preview(pages=2))
+        assert "\\documentclass[preview]{klartex-base}" in tex
+        assert "\\kxpreviewpages{2}" not in split_preamble(tex)
+        assert "\\kxpreviewpages{2}\n\\begin{document}" in tex
+        assert tex.count("\\kxpreviewcheck") == len(DATA["body"])
+
+    def test_page_limit_shares_the_preview_format(self):
+        one = _render_block_engine(DATA, preview=Preview(pages=1))
+        all_pages = _render_block_engine(DATA, preview=Preview())
+        assert split_preamble(one) == split_preamble(all_pages)
+        assert "\\kxpreviewcheck" not in all_pages
+
+
+class TestRenderPreview:
+    @pytest.fixture
+    def compiled(self, monkeypatch):
+        from klartex import renderer as renderer_mod
+
+        calls = []
+
+        def fake_compile(tex_source, **kwargs):
+            calls.append((tex_source, kwargs))
+            return RenderResult(pdf=b"%PDF-stub", passes=1, aux=b"preview-aux")
+
+        stored = []
+        monkeypatch.setattr(renderer_mod, "_compile_tex", fake_compile)
+        monkeypatch.setattr(renderer_mod, "store_aux", lambda k, a: stored.append(k))
+        return calls, stored
+
+    def test_single_pass_preview_profile_no_store(self, compiled):
+        calls, stored = compiled
+        render_detailed("_block", DATA, preview=Preview())
+        _, kwargs = calls[0]
+        assert kwargs["max_passes"] == 1
+        assert kwargs["output_profile"] == "preview"
+        assert stored == []
+
+    def test_explicit_profile_is_kept(self, compiled):
+        calls, _ = compiled
+        render_detailed("_block", DATA, preview=Preview(), output_profile="archive")
+        assert calls[0][1]["output_profile"] == "archive"
+
+    def test_block_range(self, compiled):
+        calls, _ = compiled
+        render_detailed("_block", DATA, preview=Preview(blocks=(2, 3)))
+        tex = calls[0][0]
+        assert "Två" in tex
+        assert "Ett" not in tex and "Tre" not in tex
+
+    def test_block_range_needs_block_engine(self, compiled):
+        data = json.loads((FIXTURES / "protokoll.json").read_text(encoding="utf-8"))
+        with pytest.raises(ValueError, match="block-engine template"):
+            render_detailed("protokoll", data, preview=Preview(blocks=(0, 1)))
+
+    def test_recipe_preview(self, compiled):
+        calls, _ = compiled
+        data = json.loads((FIXTURES / "protokoll.json").read_text(encoding="utf-8"))
+        render_detailed("protokoll", data, preview=Preview(pages=1))
+        tex = calls[0][0]
+        assert "\\documentclass[preview]{klartex-base}" in tex
+        assert "\\kxpreviewpages{1}" in tex
+
+
+def test_cli_rejects_bad_block_range(tmp_path):
+    data = tmp_path / "doc.json"
+    data.write_text(json.dumps(DATA), encoding="utf-8")
+    result = CliRunner().invoke(app, ["-d", str(data), "--preview-blocks", "x"])
+    assert result.exit_code == 1
+
+
+@pytest.mark.skipif(not HAS_XELATEX, reason="xelatex not installed")
+def test_preview_stops_after_pages():
+    body = [{"type": "text", "text": "Sida"}, {"type": "page_break"}] * 6
+    pdf = render_detailed(
+        "_block", {"body": body}, preview=Preview(pages=2), aux_store=False
+    ).pdf
+    assert len(re.findall(rb"/Type\s*/Page\b", pdf)) == 2
@@ -0,0 +1,167 @@
+"""Tests for streamed pass supervision: shipout progress and stall detection."""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from klartex.limits import ResourceLimitExceeded, ResourceLimits
+from klartex.progress import PassWatcher, Progress, ShipoutCounter, pass_budget
+
+# Stand-in engine: writes the pass outputs and ships out PAGES pages, one
+# line of terminal output each, DELAY seconds apart.
+FAKE_ENGINE = """
+import sys, time
+from pathlib import Path
+Path("document.aux").write_text("\\\\relax")
+Path("document.xdv").write_text("xdv")
+print("This is XeTeX (fake)", flush=True)
+for n in range(1, {pages} + 1):
+    time.sleep({delay})
+    print(f"[{{n}}]", end=" " if n % 2 else "\\n", flush=True)
+print("\\nOutput written on document.xdv ({pages} pages, 1 bytes).")
+"""
+
+
+def _spawn(script: str, cwd: Path) -> subprocess.Popen:
+    """Run `script` in `cwd`, where the fake engine writes its outputs."""
+    return subprocess.Popen(
+        [sys.executable, "-c", script],
+        cwd=cwd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+
+
+class TestShipoutCounter:
+    def test_counts_xetex_and_pdftex_shipouts(self):
+        counter = ShipoutCounter()
+        out = (
+            b"(./document.aux) [1] [2]\n"
+            b"[3{/usr/share/texmf/fonts/map/pdftex/updmap/pdftex.map}] [4.2]\n"
+            b"[-1] (./document.aux) )\n"
+        )
+        assert counter.feed(out) == 5
+        assert counter.pages == 5
+
+    def test_ignores_non_page_brackets(self):
+        counter = ShipoutCounter()
+        out = (
+            b"Overfull \\hbox (1.2pt too wide) in paragraph at lines 3--4\n"
+            b" []\\TU/lmr/m/n/10 x[12]y\n"
+            b"[Loading MPS to PDF converter (version 2006.09.02).]\n"
+            b"Package x Warning: ref[3] undefined\n"
+        )
+        assert counter.feed(out) == 0
+
+    def test_tokens_split_across_chunks(self):
+        out = b"(./document.tex [1] [2]\n[3] [10] [11] [12]\n [13])"
+        for size in range(1, 8):
+            counter = ShipoutCounter()
+            for i in range(0, len(out), size):
+                counter.feed(out[i : i + size])
+            assert counter.pages == 7, size
+
+
+class TestPassWatcher:
+    def test_streams_pages_to_callback(self, tmp_path):
+        seen = []
+        watcher = PassWatcher("xelatex", stall_timeout=5, budget=30, on_page=seen.append)
+        output = watcher.run(_spawn(FAKE_ENGINE.format(pages=5, delay=0), tmp_path))
+        assert seen == [1, 2, 3, 4, 5]
+        assert watcher.pages == 5
+        assert b"Output written on document.xdv (5 pages" in output
+
+    def test_stall_kills_silent_process(self, tmp_path):
+        proc = _spawn("import time; time.sleep(30)", tmp_path)
+        watcher = PassWatcher("xelatex", stall_timeout=0.3, budget=30)
+        start = time.monotonic()
+        with pytest.raises(RuntimeError, match="stalled: no output for 0.3s"):
+            watcher.run(proc)
+        assert time.monotonic() - start < 10
+        assert proc.returncode is not None
+
+    def test_slow_but_steady_process_is_not_stalled(self, tmp_path):
+        watcher = PassWatcher("xelatex", stall_timeout=0.5, budget=30)
+        watcher.run(_spawn(FAKE_ENGINE.format(pages=6, delay=0.2), tmp_path))
+        assert watcher.pages == 6
+
+    def test_budget_caps_chatty_process(self, tmp_path):
+        proc = _spawn("import time\nwhile True:\n    print('.', flush=True)\n    time.sleep(0.05)", tmp_path)
+        watcher = PassWatcher("xelatex", stall_timeout=5, budget=0.5)
+        with pytest.raises(RuntimeError, match="timed out after"):
+            watcher.run(proc)
+        assert proc.returncode is not None
+
+    def test_callback_error_kills_process(self, tmp_path):
+        def stop(n):
+            if n == 2:
+                raise ResourceLimitExceeded("max_pages", "too many")
+
+        proc = _spawn(FAKE_ENGINE.format(pages=50, delay=0.05), tmp_path)
+        with pytest.raises(ResourceLimitExceeded):
+            PassWatcher("xelatex", on_page=stop).run(proc)
+        assert proc.returncode is not None
+
+    def test_input_is_sent(self, tmp_path):
+        proc = _spawn("import sys; print(sys.stdin.readline().strip(), '[1]')", tmp_path)
+        watcher = PassWatcher("xelatex")
+        assert watcher.run(proc, input=b"document.tex\n").startswith(b"document.tex")
+        assert watcher.pages == 1
+
+
+def test_budget_scales_with_document():
+    small = pass_budget(10 * 1024)
+    assert pass_budget(2 * 1024**2) > small
+    assert pass_budget(10 * 1024, pages=300) > small
+
+
+class TestCompileProgress:
+    """_compile_tex streams a cold pass through the watcher."""
+
+    @pytest.fixture
+    def fake_xelatex(self, monkeypatch):
+        from klartex import renderer as renderer_mod
+
+        monkeypatch.setattr(renderer_mod.shutil, "which", lambda _: "/usr/bin/xelatex")
+        real_popen = subprocess.Popen
+        pages = {"n": 3}
+
+        def popen(cmd, **kwargs):
+            script = FAKE_ENGINE.format(pages=pages["n"], delay=0)
+            return real_popen([sys.executable, "-c", script], **kwargs)
+
+        def fake_driver(cmd, cwd, **kwargs):
+            (Path(cwd) / "document.pdf").write_bytes(b"%PDF-stub")
+            return subprocess.CompletedProcess(cmd, 0, stdout=b"", stderr=b"")
+
+        monkeypatch.setattr(renderer_mod.subprocess, "Popen", popen)
+        monkeypatch.setattr(renderer_mod.subprocess, "run", fake_driver)
+        return pages
+
+    TEX = "\\documentclass{article}\\begin{document}x\\end{document}"
+
+    def test_progress_callback(self, fake_xelatex):
+        from klartex.renderer import _compile_tex
+
+        events = []
+        result = _compile_tex(self.TEX, progress=events.append)
+        assert result.pdf == b"%PDF-stub"
+        assert events[:3] == [
+            Progress("xelatex", 1, 1),
+            Progress("xelatex", 1, 2),
+            Progress("xelatex", 1, 3),
+        ]
+        assert {e.pass_number for e in events} == set(range(1, result.passes + 1))
+
+    def test_page_limit_stops_pass_early(self, fake_xelatex):
+        from klartex.renderer import _compile_tex
+
+        fake_xelatex["n"] = 500
+        events = []
+        with pytest.raises(ResourceLimitExceeded, match="11 pages"):
+            _compile_tex(self.TEX, limits=ResourceLimits(max_pages=10), progress=events.append)
+        assert len(events) == 10
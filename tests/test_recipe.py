@@ -114,6 +114,31 @@ class TestPrepareRecipeContext:
         assert len(agenda) == 1
         assert agenda[0]["data"]["items"] == data["agenda_items"]
 
+    def test_sty_packages_from_components(self):
+        recipe = load_recipe(TEMPLATES_DIR / "protokoll" / "recipe.yaml")
+        data = json.loads((FIXTURES / "protokoll.json").read_text())
+        ctx = prepare_recipe_context(recipe, data)
+        assert ctx["sty_packages"] == ["klartex-agenda"]
+
+    def test_sty_packages_rendered_into_preamble(self):
+        from klartex.renderer import _render_recipe, get_registry
+        from klartex.tex_escape import escape_data
+        from klartex.tex_format import split_preamble
+
+        data = json.loads((FIXTURES / "protokoll.json").read_text())
+        tex = _render_recipe(get_registry()["protokoll"], escape_data(data))
+        assert r"\usepackage{klartex-agenda}" in split_preamble(tex)
+
+    def test_custom_page_template_loads_all_packages(self):
+        from klartex.renderer import _render_recipe, get_registry
+        from klartex.tex_escape import escape_data
+
+        data = escape_data(json.loads((FIXTURES / "protokoll.json").read_text()))
+        info = get_registry()["protokoll"]
+        assert _render_recipe(info, data).startswith("\\documentclass{klartex-base}")
+        tex = _render_recipe(info, data, page_template_source="% custom")
+        assert tex.startswith("\\documentclass[components]{klartex-base}")
+
 
 class TestRecipeEscaping:
     """Tests for LaTeX escaping safety in recipe rendering."""
@@ -156,17 +156,179 @@ def test_kvitto_minimal_payload_skips_metadata_list():
     assert " None" not in tex
 
 
-def test_xelatex_timeout_raises_runtime_error(monkeypatch):
-    """TimeoutExpired must be translated to the pipeline's RuntimeError contract."""
+def test_stalled_pass_raises_runtime_error(monkeypatch):
+    """A pass that prints nothing for stall_timeout seconds is killed."""
     import subprocess
+    import sys
 
     from klartex import renderer as renderer_mod
 
     monkeypatch.setattr(renderer_mod.shutil, "which", lambda _: "/usr/bin/xelatex")
+    real_popen = subprocess.Popen
+
+    def hanging_engine(cmd, **kwargs):
+        return real_popen([sys.executable, "-c", "import time; time.sleep(30)"], **kwargs)
+
+    monkeypatch.setattr(renderer_mod.subprocess, "Popen", hanging_engine)
+    with pytest.raises(RuntimeError, match="xelatex stalled: no output"):
+        renderer_mod._compile_tex(
+            "\\documentclass{article}\\begin{document}x\\end{document}",
+            stall_timeout=0.5,
+        )
+
+
+def test_driver_timeout_raises_runtime_error(monkeypatch, tmp_path):
+    """TimeoutExpired must be translated to the pipeline's RuntimeError contract."""
+    import subprocess
+
+    from klartex import renderer as renderer_mod
+    from klartex.limits import ResourceLimits
 
     def fake_run(*args, **kwargs):
-        raise subprocess.TimeoutExpired(cmd="xelatex", timeout=60)
+        raise subprocess.TimeoutExpired(cmd="xdvipdfmx", timeout=60)
+
+    monkeypatch.setattr(renderer_mod.subprocess, "run", fake_run)
+    (tmp_path / "document.xdv").write_bytes(b"xdv")
+    with pytest.raises(RuntimeError, match="xdvipdfmx timed out after 60s"):
+        renderer_mod._run_driver(tmp_path, {}, ResourceLimits(), 60)
+
+
+def _fake_xelatex(monkeypatch, aux_per_pass):
+    """Patch subprocess.run with a fake xelatex that writes the given .aux
+    content on each successive pass (last entry repeats) and a stub XDV, and
+    a fake xdvipdfmx that turns it into a stub PDF. Returns all command lines
+    in call order."""
+    import subprocess
+
+    from klartex import renderer as renderer_mod
+
+    monkeypatch.setattr(renderer_mod.shutil, "which", lambda _: "/usr/bin/xelatex")
+    calls = []
+
+    def fake_run(cmd, cwd, **kwargs):
+        if cmd[0] == "xdvipdfmx":
+            calls.append(cmd)
+            (Path(cwd) / "document.pdf").write_bytes(b"%PDF-stub")
+            return subprocess.CompletedProcess(cmd, 0, stdout=b"", stderr=b"")
+        passes = [c for c in calls if c[0] == "xelatex"]
+        aux = aux_per_pass[min(len(passes), len(aux_per_pass) - 1)]
+        calls.append(cmd)
+        (Path(cwd) / "document.aux").write_text(aux)
+        (Path(cwd) / "document.xdv").write_bytes(b"xdv")
+        return subprocess.CompletedProcess(cmd, 0, stdout=b"", stderr=b"")
 
     monkeypatch.setattr(renderer_mod.subprocess, "run", fake_run)
-    with pytest.raises(RuntimeError, match="timed out"):
-        renderer_mod._compile_tex("\\documentclass{article}\\begin{document}x\\end{document}")
+    monkeypatch.setattr(renderer_mod, "_run_pass", fake_run)
+    return calls
+
+
+class TestPassConvergence:
+    TEX = "\\documentclass{article}\\begin{document}x\\end{document}"
+
+    def test_stops_when_aux_is_stable(self, monkeypatch):
+        from klartex.renderer import _compile_tex
+
+        calls = _fake_xelatex(monkeypatch, ["\\relax"])
+        result = _compile_tex(self.TEX)
+        assert result.passes == 2
+        assert len(calls) == 3
+        assert result.pdf == b"%PDF-stub"
+
+    def test_keeps_going_while_aux_changes(self, monkeypatch):
+        from klartex.renderer import _compile_tex
+
+        calls = _fake_xelatex(monkeypatch, ["a", "b", "c", "c"])
+        result = _compile_tex(self.TEX, max_passes=10)
+        assert result.passes == 4
+        assert len(calls) == 5
+
+    def test_max_passes_caps_unstable_aux(self, monkeypatch):
+        from klartex.renderer import _compile_tex
+
+        calls = _fake_xelatex(monkeypatch, ["1", "2", "3", "4", "5"])
+        result = _compile_tex(self.TEX, max_passes=3)
+        assert result.passes == 3
+        assert len(calls) == 4
+
+    def test_passes_emit_xdv_and_driver_runs_once(self, monkeypatch):
+        from klartex.renderer import _compile_tex
+
+        calls = _fake_xelatex(monkeypatch, ["a", "b", "b"])
+        _compile_tex(self.TEX)
+        xelatex = [c for c in calls if c[0] == "xelatex"]
+        driver = [c for c in calls if c[0] == "xdvipdfmx"]
+        assert all("-no-pdf" in c for c in xelatex)
+        assert len(driver) == 1
+        assert calls[-1] is driver[0]
+        assert driver[0][-1] == "document.xdv"
+
+    def test_driver_failure_raises(self, monkeypatch):
+        import subprocess
+
+        from klartex import renderer as renderer_mod
+
+        _fake_xelatex(monkeypatch, ["a"])
+        inner = renderer_mod.subprocess.run
+
+        def failing_driver(cmd, cwd, **kwargs):
+            if cmd[0] == "xdvipdfmx":
+                return subprocess.CompletedProcess(cmd, 1, stdout=b"", stderr=b"boom")
+            return inner(cmd, cwd, **kwargs)
+
+        monkeypatch.setattr(renderer_mod.subprocess, "run", failing_driver)
+        with pytest.raises(RuntimeError, match="xdvipdfmx failed"):
+            renderer_mod._compile_tex(self.TEX)
+
+    def test_matching_seed_aux_converges_in_one_pass(self, monkeypatch):
+        from klartex.renderer import _compile_tex
+
+        _fake_xelatex(monkeypatch, ["stable"])
+        result = _compile_tex(self.TEX, seed_aux=b"stable")
+        assert result.passes == 1
+        assert result.aux == b"stable"
+
+    def test_stale_seed_aux_reruns(self, monkeypatch):
+        from klartex.renderer import _compile_tex
+
+        _fake_xelatex(monkeypatch, ["fresh"])
+        result = _compile_tex(self.TEX, seed_aux=b"stale")
+        assert result.passes == 2
+
+    def test_render_seeds_from_and_updates_store(self, monkeypatch, tmp_path):
+        from klartex.renderer import render_detailed
+
+        monkeypatch.setenv("KLARTEX_CACHE_DIR", str(tmp_path))
+        monkeypatch.setattr("klartex.renderer.ensure_format", lambda preamble, engine: None)
+        _fake_xelatex(monkeypatch, ["\\newlabel{LastPage}{{}{1}}"])
+        data = {"body": [{"type": "text", "text": "Hej"}]}
+        assert render_detailed("_block", data).passes == 2
+        assert not list(tmp_path.glob("aux/*.aux"))
+        assert render_detailed("_block", data, aux_store=True).passes == 2
+        # Same request: seeded from the store, one pass.
+        assert render_detailed("_block", data, aux_store=True).passes == 1
+        # Edited text or another language: not seeded.
+        edited = {"body": [{"type": "text", "text": "Hej hej"}]}
+        assert render_detailed("_block", edited, aux_store=True).passes == 2
+        assert render_detailed("_block", {**data, "lang": "en"}, aux_store=True).passes == 2
+
+    def test_store_skipped_for_raw_tex(self, monkeypatch, tmp_path):
+        from klartex.renderer import render_detailed
+
+        monkeypatch.setenv("KLARTEX_CACHE_DIR", str(tmp_path))
+        monkeypatch.setattr("klartex.renderer.ensure_format", lambda preamble, engine: None)
+        monkeypatch.setattr("klartex.renderer.apply_font_files", lambda source: source)
+        _fake_xelatex(monkeypatch, ["\\newlabel{LastPage}{{}{1}}"])
+        data = {"body": [{"type": "latex", "source": "\\relax"}]}
+        for _ in range(2):
+            assert render_detailed("_block", data, aux_store=True).passes == 2
+        plain = {"body": [{"type": "text", "text": "Hej"}]}
+        for _ in range(2):
+            result = render_detailed("_block", plain, "% custom", aux_store=True)
+            assert result.passes == 2
+        assert not list(tmp_path.glob("aux/*.aux"))
+
+    def test_max_passes_must_be_positive(self):
+        from klartex.renderer import _compile_tex
+
+        with pytest.raises(ValueError, match="max_passes"):
+            _compile_tex(self.TEX, max_passes=0)
@@ -0,0 +1,73 @@
+"""Tests for cached schemas and compiled validators."""
+
+from pathlib import Path
+
+import jsonschema
+import pytest
+
+from klartex import schema_validation
+from klartex.components import get_component
+from klartex.renderer import _validate_blocks, get_registry
+from klartex.schema_validation import block_validator, compile_validator, validate
+
+BODY = [
+    {"type": "heading", "text": "Rubrik"},
+    {"type": "clause", "number": "§ 1.", "content": [{"type": "text", "text": "x"}]},
+    {"type": "table", "header": ["A"], "rows": [["1"]]},
+] * 20
+
+
+def test_block_schemas_are_read_once(monkeypatch):
+    _validate_blocks(BODY, "body")
+    reads = []
+    real_read_text = Path.read_text
+
+    def read_text(self, *args, **kwargs):
+        reads.append(self)
+        return real_read_text(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", read_text)
+    _validate_blocks(BODY, "body")
+    assert reads == []
+    assert get_component("heading").get_block_schema() is get_component("heading").get_block_schema()
+
+
+def test_validators_are_compiled_once(monkeypatch):
+    first = block_validator("heading")
+    monkeypatch.setattr(
+        schema_validation, "compile_validator", lambda schema: pytest.fail("recompiled")
+    )
+    assert block_validator("heading") is first
+    _validate_blocks(BODY, "body")
+    assert ("heading", "Draft7Validator") in schema_validation._block_validators
+
+
+def test_template_validator_is_cached():
+    info = get_registry()["faktura"]
+    assert info.get_validator() is info.get_validator()
+
+
+def test_block_without_schema():
+    assert block_validator("invoice_header") is None
+
+
+def test_errors_match_jsonschema_validate():
+    schema = get_component("signatures").get_block_schema()
+    block = {"type": "signatures", "parties": [{"name": "A"}], "spacing_before": "1em"}
+    with pytest.raises(jsonschema.ValidationError) as expected:
+        jsonschema.validate(block, schema)
+    with pytest.raises(jsonschema.ValidationError) as actual:
+        validate(block_validator("signatures"), block)
+    assert actual.value.message == expected.value.message
+    assert list(actual.value.path) == list(expected.value.path)
+
+
+def test_invalid_schema_is_rejected():
+    with pytest.raises(jsonschema.SchemaError):
+        compile_validator({"$schema": "http://json-schema.org/draft-07/schema#", "type": 5})
+
+
+def test_nested_error_path():
+    body = [{"type": "clause", "number": "§ 1.", "content": [{"type": "text"}]}]
+    with pytest.raises(ValueError, match=r"Invalid 'text' block at body\[0\]\.content\[0\]"):
+        _validate_blocks(body, "body")
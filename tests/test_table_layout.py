@@ -0,0 +1,132 @@
+"""Tests for content-based column widths of table blocks."""
+
+import re
+import shutil
+
+import pytest
+
+from klartex.table_layout import (
+    TEXT_WIDTH_PT,
+    column_shares,
+    fixed_width_pt,
+    table_colspec,
+    text_width_em,
+)
+
+HAS_XELATEX = shutil.which("xelatex") is not None
+
+_SHARE_RE = re.compile(r"p\{([\d.]+)\\dimexpr")
+
+
+def _shares(spec: str) -> list[float]:
+    return [float(s) for s in _SHARE_RE.findall(spec)]
+
+
+class TestTextWidth:
+    def test_metrics(self):
+        assert text_width_em("mmm")[0] > text_width_em("iii")[0]
+        assert text_width_em("Åsa")[0] == pytest.approx(text_width_em("Asa")[0])
+        assert text_width_em("Ab", bold=True)[0] > text_width_em("Ab")[0]
+
+    def test_longest_word_and_lines(self):
+        natural, word = text_width_em("a verylongword b")
+        assert word == pytest.approx(text_width_em("verylongword")[0])
+        assert natural > word
+        assert text_width_em("short\nshort")[0] == pytest.approx(text_width_em("short")[0])
+
+    def test_escapes_and_markup_are_measured_as_printed(self):
+        assert text_width_em("A\\&B")[0] == pytest.approx(text_width_em("A&B")[0])
+        assert text_width_em("**fet**")[0] == pytest.approx(text_width_em("fet")[0])
+        assert text_width_em("\\textbackslash{}")[0] == pytest.approx(0.5)
+
+
+def test_fixed_width_units():
+    assert fixed_width_pt("1in", 10) == pytest.approx(72.27)
+    assert fixed_width_pt("2.5cm", 10) == pytest.approx(71.132)
+    assert fixed_width_pt("3em", 9) == pytest.approx(27)
+    assert fixed_width_pt("0.3\\textbackslash{}linewidth", 9) is None
+
+
+class TestShares:
+    def test_narrow_columns_keep_natural_width(self):
+        header = ["Nr", "Beskrivning", "Belopp"]
+        rows = [["1", "Lorem ipsum dolor sit amet " * 8, "1\\,000"]]
+        shares = column_shares(header, rows, [0, 1, 2], TEXT_WIDTH_PT, 9.0)
+        assert sum(shares) == pytest.approx(1)
+        nr, text, amount = (s * TEXT_WIDTH_PT for s in shares)
+        assert nr == pytest.approx((text_width_em("Nr", True)[0] + 0.5) * 9)
+        assert text > 5 * amount
+
+    def test_everything_fits_is_proportional(self):
+        shares = column_shares(["a", "bb"], [["aaaa", "bbbbbbbb"]], [0, 1], TEXT_WIDTH_PT, 9.0)
+        assert shares[1] > shares[0]
+        assert sum(shares) == pytest.approx(1)
+
+    def test_wide_columns_keep_longest_word(self):
+        long_word = "Donaudampfschifffahrtsgesellschaft"
+        rows = [["lorem " * 80, f"{long_word} " + "x " * 10]]
+        shares = column_shares(["A", "B"], rows, [0, 1], 200.0, 9.0)
+        assert shares[1] * 200 >= (text_width_em(long_word)[0] + 0.5) * 9 - 1e-6
+
+
+class TestColspec:
+    def test_content_fit_emits_p_columns(self):
+        spec = table_colspec(
+            ["Konto", "Benämning", "Belopp"],
+            [["1930", "Företagskonto hos banken", "12\\,000"]],
+            [{"width": "2cm"}, {}, {"align": "right"}],
+        )
+        assert "X" not in spec
+        assert spec.startswith(">{\\raggedright\\arraybackslash}p{2cm}")
+        assert "\\dimexpr(\\linewidth-2cm-4\\tabcolsep)\\relax" in spec
+        assert ">{\\raggedleft\\arraybackslash}p{" in spec
+        assert sum(_shares(spec)) <= 1
+
+    def test_tabularx_fallback(self):
+        spec = table_colspec(["A", "B"], [["x", "y"]], None, fit="tabularx")
+        assert spec == ">{\\raggedright\\arraybackslash}X" * 2
+        long = table_colspec(["A", "B"], [["x", "y"]], None, long=True, fit="tabularx")
+        assert _shares(long) == [0.5, 0.5]
+
+
+    def test_extreme_width_ratio_uses_fixed_point_factors(self):
+        spec = table_colspec(["A", "B", "C"], [["lorem " * 3000, "y", ""]], None)
+        factors = re.findall(r"p\{([^\\}]*)\\dimexpr", spec)
+        assert len(factors) == 3
+        assert all(re.fullmatch(r"\d\.\d{4}", f) for f in factors)
+        assert float(factors[0]) > 0.9
+        assert sum(map(float, factors)) <= 1
+
+
+class TestTemplate:
+    @staticmethod
+    def _tex(block):
+        from klartex.block_engine import block_overrides
+        from klartex.renderer import _render_block_engine
+        from klartex.tex_escape import escape_view
+
+        data = {"body": [block]}
+        escaped = escape_view(data, block_overrides(data["body"]))
+        return _render_block_engine(escaped)
+
+    def test_table_is_typeset_once(self):
+        block = {"type": "table", "header": ["A", "B"], "rows": [["kort", "en längre cell"]]}
+        tex = self._tex(block)
+        assert "\\noindent\\begin{tabular}{@{}" in tex
+        assert "tabularx" not in tex.split("\\begin{document}")[1]
+
+    def test_column_fit_tabularx(self):
+        block = {"type": "table", "header": ["A", "B"], "rows": [["1", "2"]], "column_fit": "tabularx"}
+        tex = self._tex(block)
+        assert "\\begin{tabularx}{\\linewidth}{@{}>{\\raggedright\\arraybackslash}X" in tex
+
+    @pytest.mark.skipif(not HAS_XELATEX, reason="xelatex not installed")
+    def test_fitted_table_compiles(self):
+        from klartex.renderer import render
+
+        block = {
+            "type": "table", "header": ["Nr", "Text", "Belopp"],
+            "rows": [[str(i), "Lorem ipsum dolor sit amet " * (i % 5), "1\\,000"] for i in range(20)],
+            "columns": [{}, {}, {"align": "right"}],
+        }
+        assert render("_block", {"body": [block]})[:5] == b"%PDF-"
@@ -1,6 +1,8 @@
 """Tests for LaTeX escaping."""
 
-from klartex.tex_escape import tex_escape, escape_data
+from collections.abc import Mapping, Sequence
+
+from klartex.tex_escape import escape_data, escape_view, tex_escape
 
 
 def test_plain_text_unchanged():
@@ -42,3 +44,117 @@ def test_escape_data_recursive():
     assert result["count"] == 42
     assert result["active"] is True
     assert result["note"] is None
+
+
+def _legacy_tex_escape(value: str) -> str:
+    """The replace-chain escaper that tex_escape replaced."""
+    from klartex.tex_escape import _REPLACEMENTS
+
+    result = value.replace("\\", "\x00BACKSLASH\x00")
+    for char, escaped in _REPLACEMENTS.items():
+        if char == "\\":
+            continue
+        result = result.replace(char, escaped)
+    return result.replace("\x00BACKSLASH\x00", r"\textbackslash{}")
+
+
+class TestMatchesLegacyEscaper:
+    """tex_escape is byte-identical to the replace chain it replaced."""
+
+    ALPHABET = "\\{}$#%&_~^ abcXYZ019åäöÅÄÖé—–€\n\t\x00"
+
+    def test_random_strings(self):
+        import random
+
+        rng = random.Random(20260117)
+        for _ in range(5000):
+            value = "".join(rng.choices(self.ALPHABET, k=rng.randint(0, 40)))
+            assert tex_escape(value) == _legacy_tex_escape(value), repr(value)
+
+    def test_every_pair_of_characters(self):
+        for a in self.ALPHABET:
+            for b in self.ALPHABET:
+                assert tex_escape(a + b) == _legacy_tex_escape(a + b)
+
+    def test_long_strings(self):
+        for value in ["å" * 5000 + "&", "x" * 5000, "\\" * 1000, "{}" * 1000]:
+            assert tex_escape(value) == _legacy_tex_escape(value)
+
+    def test_fixtures(self):
+        import json
+        from pathlib import Path
+
+        def strings(data):
+            if isinstance(data, str):
+                yield data
+            elif isinstance(data, dict):
+                for v in data.values():
+                    yield from strings(v)
+            elif isinstance(data, list):
+                for v in data:
+                    yield from strings(v)
+
+        fixtures = Path(__file__).parent / "fixtures"
+        for path in sorted(fixtures.glob("*.json")):
+            for value in strings(json.loads(path.read_text(encoding="utf-8"))):
+                assert tex_escape(value) == _legacy_tex_escape(value), path.name
+
+
+class TestEscapeView:
+    DATA = {
+        "title": "A & B",
+        "rows": [["50%", 3], ["x_y", None]],
+        "nested": {"flag": True, "note": "#1"},
+    }
+
+    def test_strings_are_escaped_on_access(self):
+        view = escape_view(self.DATA)
+        assert view["title"] == r"A \& B"
+        assert view["rows"][0][0] == r"50\%"
+        assert view["rows"][0][1] == 3
+        assert view["rows"][1][1] is None
+        assert view["nested"]["flag"] is True
+        assert view.get("nested").get("note") == r"\#1"
+        assert view.get("missing", "default") == "default"
+
+    def test_mapping_and_sequence_protocols(self):
+        view = escape_view(self.DATA)
+        assert isinstance(view, Mapping)
+        assert isinstance(view["rows"], Sequence)
+        assert list(view) == ["title", "rows", "nested"]
+        assert len(view) == 3 and len(view["rows"]) == 2
+        assert "title" in view and "other" not in view
+        assert [row[0] for row in view["rows"]] == [r"50\%", r"x\_y"]
+        assert list(view["rows"][1:]) == [escape_view(["x_y", None])]
+        assert dict(view["nested"]) == {"flag": True, "note": r"\#1"}
+        assert view == escape_data(self.DATA)
+
+    def test_nothing_is_copied_or_modified(self):
+        data = {"items": [{"text": "&"}]}
+        view = escape_view(data)
+        assert view["items"][0]["text"] == r"\&"
+        assert data == {"items": [{"text": "&"}]}
+        data["items"][0]["text"] = "%"
+        assert view["items"][0]["text"] == r"\%"
+
+    def test_overrides_are_raw(self):
+        block = {"type": "name_roster", "note": "a_b"}
+        view = escape_view({"body": [block]}, {id(block): {"type": "name_roster", "_kx_path": "body[0]"}})
+        item = view["body"][0]
+        assert item["type"] == "name_roster"
+        assert item["note"] == r"a\_b"
+        assert item["_kx_path"] == "body[0]"
+        assert list(item) == ["type", "note", "_kx_path"]
+        assert len(item) == 3
+        assert "_kx_path" not in block
+
+    def test_jinja_reads_the_view(self):
+        import jinja2
+
+        template = jinja2.Environment().from_string(
+            "{{ d.title }}|{% for r in d.rows %}{{ r[0] }};{% endfor %}|{{ d.nested.note }}"
+            "|{{ d.rows | length }}|{{ d.get('title') }}"
+        )
+        assert template.render(d=escape_view(self.DATA)) == (
+            r"A \& B|50\%;x\_y;|\#1|2|A \& B"
+        )
@@ -0,0 +1,108 @@
+"""Tests for precompiled preamble formats."""
+
+import shutil
+
+import pytest
+
+from klartex import tex_format
+from klartex.renderer import _render_block_engine
+from klartex.tex_format import FORMAT_MARKER, format_name, split_preamble
+
+HAS_XELATEX = shutil.which("xelatex") is not None
+
+
+class TestPreambleSplit:
+    def test_unmarked_source_has_no_preamble(self):
+        assert split_preamble(r"\documentclass{article}\begin{document}x\end{document}") is None
+
+    def test_builtin_page_template_is_inside_preamble(self):
+        tex = _render_block_engine({"page_template": "formal", "body": []})
+        preamble = split_preamble(tex)
+        assert preamble is not None
+        assert preamble.startswith(r"\documentclass{klartex-base}")
+        assert r"\fancyfoot[C]" in preamble
+        assert tex.count(FORMAT_MARKER) == 1
+
+    def test_external_page_template_is_after_marker(self):
+        tex = _render_block_engine(
+            {"body": []}, page_template_source=r"\fancyhead[L]{Custom}"
+        )
+        preamble = split_preamble(tex)
+        assert "Custom" not in preamble
+        assert r"\fancyhead[L]{Custom}" in tex.partition(FORMAT_MARKER)[2]
+
+    def test_external_templates_share_bare_preamble(self):
+        a = split_preamble(_render_block_engine({"body": []}, page_template_source="% a"))
+        b = split_preamble(_render_block_engine({"body": []}, page_template_source="% b"))
+        assert a == b
+
+    def test_recipe_and_block_paths_share_preamble(self):
+        from klartex.renderer import _render_recipe, get_registry
+
+        data = {
+            "receipt_number": "K-1",
+            "date": "2026-07-06",
+            "total_amount": 1,
+            "items": [{"description": "x"}],
+            "page_template": "formal",
+        }
+        recipe_tex = _render_recipe(get_registry()["kvitto"], data)
+        block_tex = _render_block_engine({"page_template": "formal", "body": []})
+        assert split_preamble(recipe_tex) == split_preamble(block_tex)
+
+
+class TestFormatKey:
+    def test_name_is_stable(self):
+        assert format_name("x") == format_name("x")
+
+    def test_name_depends_on_preamble(self):
+        assert format_name("x") != format_name("y")
+
+    def test_name_depends_on_tex_version(self, monkeypatch):
+        monkeypatch.setitem(tex_format._tex_versions, "xelatex", "XeTeX (TeX Live 2024)")
+        a = format_name("x")
+        monkeypatch.setitem(tex_format._tex_versions, "xelatex", "XeTeX (TeX Live 2025)")
+        assert format_name("x") != a
+
+    def test_name_depends_on_cls_contents(self, monkeypatch):
+        a = format_name("x")
+        monkeypatch.setattr(tex_format, "_cls_digest", "0" * 64)
+        assert format_name("x") != a
+
+
+def test_compile_uses_available_format(monkeypatch, tmp_path):
+    """_compile_tex must start xelatex from the cached format when one exists."""
+    import subprocess
+
+    from klartex import renderer as renderer_mod
+
+    monkeypatch.setattr(renderer_mod.shutil, "which", lambda _: "/usr/bin/xelatex")
+    monkeypatch.setattr(
+        renderer_mod, "ensure_format", lambda preamble, engine: (tmp_path, "klartex-test")
+    )
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append((cmd, kwargs["env"]))
+        return subprocess.CompletedProcess(cmd, 1, stdout=b"stop", stderr=b"")
+
+    monkeypatch.setattr(renderer_mod.subprocess, "run", fake_run)
+    monkeypatch.setattr(renderer_mod, "_run_pass", fake_run)
+    tex = f"\\documentclass{{klartex-base}}\n{FORMAT_MARKER}\n\\begin{{document}}x\\end{{document}}"
+    with pytest.raises(RuntimeError, match="xelatex failed"):
+        renderer_mod._compile_tex(tex)
+    cmd, env = calls[0]
+    assert "-fmt=klartex-test" in cmd
+    assert env["TEXFORMATS"].startswith(f"{tmp_path}:")
+
+
+@pytest.mark.skipif(not HAS_XELATEX, reason="xelatex not installed")
+def test_render_with_format_cache(monkeypatch, tmp_path):
+    from klartex.renderer import render
+
+    monkeypatch.setenv("KLARTEX_CACHE_DIR", str(tmp_path))
+    data = {"page_template": "clean", "body": [{"type": "text", "text": "Hej"}]}
+    first = render("_block", data)
+    assert first[:5] == b"%PDF-"
+    # Second render starts from the dumped format (or falls back cleanly).
+    assert render("_block", data)[:5] == b"%PDF-"
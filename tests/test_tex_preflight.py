@@ -0,0 +1,173 @@
+"""Tests for the raw-LaTeX preflight."""
+
+from pathlib import Path
+
+import pytest
+
+from klartex import tex_preflight
+from klartex.renderer import render
+from klartex.tex_preflight import preflight_balance, preflight_tex
+
+PAGE_TEMPLATES = Path(__file__).resolve().parent.parent / "klartex" / "page_templates"
+
+
+class TestPreflight:
+    @pytest.mark.parametrize(
+        "source",
+        [
+            "\\textbf{Hej} \\{ \\} 100\\% {}",
+            "\\begin{tabular}{ll}a & b\\\\\\end{tabular}",
+            "% unbalanced } in a comment\n\\emph{x}",
+            "\\newenvironment{kx}{\\begin{center}}{\\end{center}}",
+            "\\verb|}{| and \\verb*+\\end{document}+",
+            "\\begin{verbatim}\n}{ \\end{document}\n\\end{verbatim}",
+            "\\makeatletter\\def\\kx@x{\\@gobble}\\makeatother",
+            "\\newread\\kxin \\openin\\kxin=data.txt \\read\\kxin to \\kxline",
+            "\\catcode`\\}=12 }",
+            "\\ProvidesFile{kx}\n\\fancyfoot{x}\n\\endinput",
+        ],
+    )
+    def test_accepts(self, source):
+        assert preflight_tex(source) is None
+
+    @pytest.mark.parametrize(
+        "source, problem",
+        [
+            ("x}", "unbalanced '}' on line 1"),
+            ("\\textbf{a\n\nb", "unclosed '{' from line 1"),
+            ("\\begin{itemize}\n\\item a\n\\end{enumerate}",
+             "\\end{enumerate} on line 3 does not match \\begin{itemize} on line 1"),
+            ("\\begin{center}\nx", "unclosed \\begin{center} from line 1"),
+            ("x\\end{center}", "\\end{center} on line 1 without a matching \\begin"),
+            ("\\end{document}", "\\end{document} is not allowed (line 1)"),
+            ("\n\\begin {document}", "\\begin{document} is not allowed (line 2)"),
+            ("\\documentclass{article}", "\\documentclass is not allowed (line 1)"),
+            ("\\immediate\\write18{rm -rf x}", "\\write18 is not allowed (line 1)"),
+            ("\\read16 to \\x", "reading the terminal with \\read is not allowed (line 1)"),
+            ("\\makeatletter\\@@end", "\\@@end is not allowed (line 1)"),
+            ("\\errorstopmode", "\\errorstopmode is not allowed (line 1)"),
+            ("\\begin{verbatim}x", "unclosed \\begin{verbatim} from line 1"),
+            # A catcode change only stops the balance check.
+            ("\\catcode`\\@=11 \\write18{rm x}", "\\write18 is not allowed (line 1)"),
+            ("\\catcode`\\}=12 }\n\\end{document}", "\\end{document} is not allowed (line 2)"),
+            ("\\catcode`\\{=12 \\read16 to\\x", "reading the terminal with \\read is not allowed (line 1)"),
+            ("\\catcode`\\@=11 \\@@end", "\\@@end is not allowed (line 1)"),
+        ],
+    )
+    def test_rejects(self, source, problem):
+        assert preflight_tex(source) == problem
+
+    @pytest.mark.parametrize(
+        "source, problem",
+        [
+            ("\\begin{multicols}{2}", None),
+            ("\\end{multicols}{", None),
+            ("x}", None),
+            ("\\begin{verbatim}x", None),
+            ("{\\end{document}", "\\end{document} is not allowed (line 1)"),
+            ("\\begingroup\n\\write18{x}", "\\write18 is not allowed (line 2)"),
+        ],
+    )
+    def test_without_balance_only_forbidden_constructs(self, source, problem):
+        assert preflight_tex(source, balance=False) == problem
+
+    @pytest.mark.parametrize("path", sorted(PAGE_TEMPLATES.glob("*.tex.jinja")))
+    def test_builtin_page_templates_pass(self, path):
+        assert preflight_tex(path.read_text(encoding="utf-8")) is None
+
+    def test_results_are_cached(self, monkeypatch):
+        calls = []
+        real = tex_preflight._check
+        monkeypatch.setattr(tex_preflight, "_check", lambda s, *a: calls.append(s) or real(s, *a))
+        source = "\\textbf{cached preflight %s}" % id(calls)
+        assert preflight_tex(source) is None
+        assert preflight_tex(source) is None
+        assert calls == [source]
+
+
+class TestBalanceAcrossSources:
+    def test_environment_spanning_sources(self):
+        assert preflight_balance(["\\begin{multicols}{2}\n{\\small", "x", "}\\end{multicols}"]) is None
+
+    def test_problem_located_in_its_source(self):
+        sources = ["\\begin{center}", "ok", "\n\\end{itemize}"]
+        assert preflight_balance(sources) == (
+            2, "\\end{itemize} on line 2 does not match \\begin{center} on an earlier block"
+        )
+        assert preflight_balance(["{", "\n\n{}"]) == (0, "unclosed '{' from line 1")
+        assert preflight_balance(["{}", "x\n}"]) == (1, "unbalanced '}' on line 2")
+
+    def test_catcode_stops_the_balance_check(self):
+        assert preflight_balance(["\\catcode`\\{=12 {", "}}"]) is None
+        assert preflight_tex("\\catcode`\\{=12 {", balance=False) is None
+        assert preflight_tex("\\catcode`\\{=12 {\\stop", balance=False) == (
+            "\\stop is not allowed (line 1)"
+        )
+
+
+class TestRenderPreflight:
+    """Rejected sources fail before any compilation."""
+
+    @pytest.fixture(autouse=True)
+    def no_compile(self, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("compiled despite failing preflight")
+
+        monkeypatch.setattr("klartex.renderer._compile_tex", fail)
+
+    def test_latex_block_error_has_path(self):
+        data = {
+            "body": [
+                {"type": "text", "text": "x"},
+                {"type": "list", "items": [
+                    {"text": "a", "content": [{"type": "latex", "source": "\\textbf{"}]},
+                ]},
+            ]
+        }
+        with pytest.raises(ValueError, match=(
+            r"Invalid 'latex' block at body\[1\]\.items\[0\]\.content\[0\]: "
+            r"unclosed '\{' from line 1"
+        )):
+            render("_block", data)
+
+    def test_unclosed_across_blocks_names_the_opening_block(self):
+        data = {
+            "body": [
+                {"type": "latex", "source": "\\begin{center}"},
+                {"type": "text", "text": "x"},
+                {"type": "latex", "source": "{\\small"},
+            ]
+        }
+        with pytest.raises(ValueError, match=(
+            r"Invalid 'latex' block at body\[2\]: unclosed '\{' from line 1"
+        )):
+            render("_block", data)
+
+    def test_page_template_error(self):
+        with pytest.raises(ValueError, match="Invalid page template: \\\\end\\{document\\}"):
+            render(
+                "_block",
+                {"body": [{"type": "text", "text": "x"}]},
+                page_template_source="\\fancyfoot{x}\n\\end{document}",
+            )
+
+
+def test_environment_may_span_latex_blocks(monkeypatch):
+    from klartex import renderer as renderer_mod
+
+    compiled = []
+
+    def fake_compile(tex, **kwargs):
+        compiled.append(tex)
+        return renderer_mod.RenderResult(pdf=b"%PDF", passes=1)
+
+    monkeypatch.setattr(renderer_mod, "_compile_tex", fake_compile)
+    data = {
+        "body": [
+            {"type": "latex", "source": "\\begin{center}\n\\begingroup{\\bfseries"},
+            {"type": "text", "text": "Mitt"},
+            {"type": "latex", "source": "}\\endgroup\n\\end{center}"},
+        ]
+    }
+    assert render("_block", data, aux_store=False) == b"%PDF"
+    assert len(compiled) == 1
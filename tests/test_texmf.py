@@ -0,0 +1,135 @@
+"""Tests for the private texmf tree and per-worker TeX caches."""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from klartex import texmf
+from klartex.texmf import LS_R_HEADER, register_asset_dir, tex_env, write_ls_r
+
+HAS_KPSEWHICH = shutil.which("kpsewhich") is not None
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(monkeypatch, tmp_path):
+    """Fresh cache root and module state for every test."""
+    monkeypatch.setenv("KLARTEX_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(texmf, "_cls_tree", None)
+    monkeypatch.setattr(texmf, "_asset_trees", {})
+    monkeypatch.setattr(texmf, "_worker", None)
+    monkeypatch.setattr(texmf, "_worker_lock", None)
+
+
+class TestLsR:
+    def test_lists_every_directory(self, tmp_path):
+        root = tmp_path / "tree"
+        (root / "tex" / "sub").mkdir(parents=True)
+        (root / "tex" / "a.sty").write_text("")
+        (root / "tex" / "sub" / "b.png").write_text("")
+        write_ls_r(root)
+        text = (root / "ls-R").read_text()
+        assert text.startswith(LS_R_HEADER + "\n")
+        assert "./:\ntex\n" in text
+        assert "./tex:\na.sty\nsub\n" in text
+        assert "./tex/sub:\nb.png\n" in text
+
+    def test_follows_symlinked_directories(self, tmp_path):
+        target = tmp_path / "assets"
+        target.mkdir()
+        (target / "logo.png").write_text("")
+        root = tmp_path / "tree"
+        root.mkdir()
+        (root / "files").symlink_to(target)
+        write_ls_r(root)
+        assert "./files:\nlogo.png\n" in (root / "ls-R").read_text()
+
+
+class TestTree:
+    def test_cls_tree_indexes_class_files(self):
+        tree = texmf.cls_tree()
+        assert (tree / "klartex" / "klartex-base.cls").exists()
+        assert "klartex-base.cls" in (tree / "ls-R").read_text()
+        assert texmf.cls_tree() == tree
+
+    def test_registered_asset_dir_is_indexed(self, tmp_path):
+        assets = tmp_path / "assets"
+        assets.mkdir()
+        (assets / "logo.png").write_text("")
+        tree = register_asset_dir(assets)
+        assert "logo.png" in (tree / "ls-R").read_text()
+        (assets / "new.png").write_text("")
+        assert register_asset_dir(assets) == tree
+        assert "new.png" in (tree / "ls-R").read_text()
+
+    def test_register_missing_dir_raises(self, tmp_path):
+        with pytest.raises(ValueError, match="not found"):
+            register_asset_dir(tmp_path / "nope")
+
+
+class TestTexEnv:
+    def test_search_path_order(self, tmp_path):
+        env = tex_env(tmp_path)
+        parts = env["TEXINPUTS"].split(":")
+        assert parts[0] == "."
+        assert parts[1] == f"!!{texmf.cls_tree()}//"
+        assert parts[2] == str(tmp_path)
+        assert parts[3] == os.getcwd()
+        assert env["TEXMFDBS"].startswith(f"{texmf.cls_tree()}:")
+
+    def test_registered_asset_dir_is_hashed_lookup(self, tmp_path):
+        tree = register_asset_dir(tmp_path)
+        env = tex_env(tmp_path)
+        assert f"!!{tree}//" in env["TEXINPUTS"].split(":")
+        assert str(tree) in env["TEXMFDBS"].split(":")
+
+    def test_search_cwd_false_drops_cwd(self):
+        env = tex_env(search_cwd=False)
+        assert os.getcwd() not in env["TEXINPUTS"].split(":")
+
+    def test_per_worker_caches(self):
+        env = tex_env()
+        worker = texmf.worker_dir()
+        assert env["TEXMFVAR"] == str(worker / "texmf-var")
+        assert env["XDG_CACHE_HOME"] == str(worker / "xdg-cache")
+        assert os.path.isdir(env["TEXMFVAR"])
+
+    @pytest.mark.skipif(not HAS_KPSEWHICH, reason="kpsewhich not installed")
+    def test_kpsewhich_finds_class_through_index(self, tmp_path):
+        env = tex_env(search_cwd=False)
+        result = subprocess.run(
+            ["kpsewhich", "klartex-agenda.sty"],
+            cwd=tmp_path, env=env, capture_output=True, text=True,
+        )
+        assert result.stdout.strip().startswith(str(texmf.cls_tree()))
+
+
+def test_worker_slots_are_exclusive(monkeypatch):
+    """A second process-level claim gets the next slot."""
+    first = texmf.worker_dir()
+    held = texmf._worker_lock
+    monkeypatch.setattr(texmf, "_worker", None)
+    # flock is per open file description, so a new open in this process
+    # contends like another process would.
+    second = texmf.worker_dir()
+    assert first.name == "w0"
+    assert second.name == "w1"
+    held.close()
+
+
+def test_compile_without_cwd_search(monkeypatch):
+    from klartex import renderer as renderer_mod
+
+    monkeypatch.setattr(renderer_mod.shutil, "which", lambda _: "/usr/bin/xelatex")
+    envs = []
+
+    def fake_run(cmd, **kwargs):
+        envs.append(kwargs["env"])
+        return subprocess.CompletedProcess(cmd, 1, stdout=b"stop", stderr=b"")
+
+    monkeypatch.setattr(renderer_mod.subprocess, "run", fake_run)
+    monkeypatch.setattr(renderer_mod, "_run_pass", fake_run)
+    with pytest.raises(RuntimeError):
+        renderer_mod._compile_tex("x", search_cwd=False)
+    assert os.getcwd() not in envs[0]["TEXINPUTS"].split(":")
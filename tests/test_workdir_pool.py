@@ -0,0 +1,93 @@
+"""Tests for pooled, pre-staged working directories."""
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from klartex import workdir_pool
+from klartex.workdir_pool import WorkdirPool
+
+
+@pytest.fixture
+def pool():
+    p = WorkdirPool(size=1)
+    yield p
+    p.close()
+
+
+class TestWorkdirPool:
+    def test_directories_are_staged(self, pool):
+        with pool.lease() as path:
+            assert (path / "klartex-base.cls").exists()
+            assert (path / "cls" / "klartex-base.cls").exists()
+
+    def test_directory_is_reused_and_scrubbed(self, pool):
+        with pool.lease() as first:
+            (first / "document.tex").write_text("x")
+            (first / "sub").mkdir()
+            (first / "sub" / "f").write_text("y")
+        with pool.lease() as second:
+            assert second == first
+            assert sorted(p.name for p in second.iterdir()) == ["cls", "klartex-base.cls"]
+
+    def test_overflow_lease_is_temporary(self, pool):
+        with pool.lease() as pooled:
+            with pool.lease() as extra:
+                assert extra != pooled
+                assert (extra / "klartex-base.cls").exists()
+            assert not extra.exists()
+        assert pooled.exists()
+
+    def test_env_is_cached_per_arguments(self, pool, tmp_path):
+        assert pool.env() is pool.env()
+        assert pool.env(tmp_path) is not pool.env()
+        assert f":{tmp_path}:" in pool.env(tmp_path)["TEXINPUTS"]
+        assert pool.env(fmt_dir=tmp_path)["TEXFORMATS"].startswith(f"{tmp_path}:")
+
+    def test_close_removes_directories(self):
+        pool = WorkdirPool(size=2)
+        with pool.lease() as path:
+            pass
+        pool.close()
+        assert not path.exists()
+
+    @pytest.mark.skipif(not Path("/dev/shm").is_dir(), reason="no tmpfs")
+    def test_tmpfs_root(self):
+        pool = WorkdirPool(size=1, tmpfs=True)
+        try:
+            with pool.lease() as path:
+                assert str(path).startswith("/dev/shm/")
+        finally:
+            pool.close()
+
+
+def test_compile_leases_pooled_directory(monkeypatch):
+    """Consecutive renders run in the same pooled directory, scrubbed."""
+    from klartex import renderer as renderer_mod
+
+    monkeypatch.setattr(renderer_mod.shutil, "which", lambda _: "/usr/bin/xelatex")
+    monkeypatch.setattr(renderer_mod, "ensure_format", lambda preamble, engine: None)
+    seen = []
+
+    def fake_run(cmd, cwd, **kwargs):
+        cwd = Path(cwd)
+        if cmd[0] == "xdvipdfmx":
+            (cwd / "document.pdf").write_bytes(b"%PDF-stub")
+        else:
+            seen.append((cwd, sorted(p.name for p in cwd.iterdir())))
+            (cwd / "document.xdv").write_bytes(b"xdv")
+            (cwd / "document.aux").write_text("aux")
+        return subprocess.CompletedProcess(cmd, 0, stdout=b"", stderr=b"")
+
+    monkeypatch.setattr(renderer_mod.subprocess, "run", fake_run)
+    monkeypatch.setattr(renderer_mod, "_run_pass", fake_run)
+    workdir_pool.start(size=1)
+    try:
+        for _ in range(2):
+            result = renderer_mod._compile_tex("x", max_passes=1)
+            assert result.pdf == b"%PDF-stub"
+    finally:
+        workdir_pool.stop()
+    assert seen[0][0] == seen[1][0]
+    assert seen[1][1] == ["cls", "document.tex", "klartex-base.cls"]